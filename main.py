@@ -1,104 +1,72 @@
+from __future__ import annotations
+import time
+started_at: float = time.perf_counter()  # Startup timings are measured from here, before any other import
 import sys
 import os
+import threading
 from tkinter import *
 import random
-from typing import Any, Dict, List, Literal, Optional, Tuple, Type, Union # type: ignore
-import numpy as np
-import pickle
-from src.utils.types import  QTable, State, StateKey
-from  src.utils.constants import APP_NAME, GAME_WIDTH, GAME_HEIGHT, SPEED, SPACE_SIZE, BODY_PARTS, SNAKE_COLOR, SNAKE_HEAD_COLOR, FOOD_COLOR, BACKGROUND_COLOR, BACKGROUND_MUSIC_FILES, HUMAN_AGENT, RL_AGENT, episodes, icon_file_path, soundtrack_path, text_file_path, q_table_file_path
-from src.utils.utils import load_high_score, save_high_score
-
-
-class QLearningAgent:
-    def __init__(self, alpha: float = 0.1, gamma: float = 0.99, epsilon: float = 1.0, epsilon_decay: float = 0.995, epsilon_min: float = 0.01) -> None:
-        self.alpha = alpha  # Learning rate
-        self.gamma = gamma  # Discount factor
-        self.epsilon = epsilon  # Exploration rate
-        self.epsilon_decay = epsilon_decay
-        self.epsilon_min = epsilon_min
-        self.q_table: QTable = QTable(__root__={})  # Q-table
-
-    def get_state_key(self, state: Optional[State]) -> StateKey:
-        if state is None:
-            raise ValueError("State cannot be None.")
-        
-        head_x, head_y = state['head']
-        food_x, food_y = state['food']
-        body = tuple(tuple(part) for part in state['body'])
-        near_border = state['near_border']
-        
-        # Calculate relative position of the food to the snake's head
-        rel_food_x = food_x - head_x
-        rel_food_y = food_y - head_y
-
-        # Calculate relative positions of the snake's body parts to the snake's head
-        rel_body = tuple((part_x - head_x, part_y - head_y) for part_x, part_y in body)
-        
-        return (rel_food_x, rel_food_y, len(state['body']), rel_body, near_border)
-
-    def choose_action(self, state: State) -> int:
-        if np.random.rand() < self.epsilon:
-            return np.random.choice(4)  # Explore: choose random action
-
-        state_key = self.get_state_key(state)
-        q_table_root = self.q_table['__root__']
-
-        if state_key not in q_table_root:
-            q_table_root[state_key] = np.zeros(4)  # Initialize Q-values for new state
-        
-        return int(np.argmax(q_table_root[state_key]))  # Exploit: choose best action
-
-    def learn(self, state: State, action: int, reward: int, next_state: State, done: bool) -> None:
-        state_key = self.get_state_key(state)
-        next_state_key = self.get_state_key(next_state)
-        q_table_root = self.q_table['__root__']
-
-        if state_key not in q_table_root:
-            q_table_root[state_key] = np.zeros(4)
-        if next_state_key not in q_table_root:
-            q_table_root[next_state_key] = np.zeros(4)
-
-        q_update = reward
-        if not done:
-            q_update += self.gamma * np.max(q_table_root[next_state_key])
+from typing import TYPE_CHECKING, Any, Deque, Dict, List, Literal, Optional, Tuple, Type, Union # type: ignore
+from collections import deque
+from itertools import islice
+from src.env import DIRECTIONS, KEYSYM_DIRECTIONS, TURNS, OccupancyGrid, SnakeEnv, pixel_deltas
+from src.render import Renderer, RenderScheduler, get_renderer
+from src.utils.types import  QTable, State, StateKey, TrainerState
+from src.utils.config import GameConfig
+from  src.utils.constants import APP_NAME, BACKGROUND_COLOR, BACKGROUND_MUSIC_FILES, HUMAN_AGENT, RL_AGENT, checkpoint_every_episodes, checkpoint_every_seconds, episode_log_file_path, profile_stats_file_path, profile_file_path, icon_file_path, soundtrack_path, text_file_path
+from src.utils.utils import load_high_score, save_high_score, get_metrics_run_dir, get_network_file_path, get_q_table_file_path, get_trainer_state_file_path
+
+if TYPE_CHECKING:
+    # The RL side (NumPy, pickle, the agents) is imported where it is used, so the human game starts without it.
+    from src.env import EpisodeRecord, EpisodeRecorder
+    from src.agent import Agent, BatchedLearner
+    from src.training import Checkpointer, Instrumentation, MetricsWriter
+
+
+class StartupTimer:
+    """
+    Seconds from `started_at` to each startup milestone: 'imports', 'window_ready' and, when training, 'weights_ready'.
+
+    With `SNAKE_STARTUP_TIMING=1`, milestones are printed as they are reached
+    and the game closes once it is ready, so startup can be timed from a script.
+    """
+
+    def __init__(self, start: float, enabled: bool = False) -> None:
+        self.start: float = start
+        self.enabled: bool = enabled
+        self.marks: Dict[str, float] = {}
+
+    def mark(self, milestone: str) -> None:
+        if milestone in self.marks:
+            return
+        self.marks[milestone] = time.perf_counter() - self.start
+        if self.enabled:
+            print(f"Startup: {milestone} after {self.marks[milestone] * 1000:.0f} ms")
 
-        q_table_root[state_key][action] = (1 - self.alpha) * q_table_root[state_key][action] + self.alpha * q_update
 
-        if done:
-            self.epsilon = max(self.epsilon_min, self.epsilon * self.epsilon_decay)
-    
-    def save_q_table(self, file_path: str) -> None:
-        with open(file_path, 'wb') as f:
-            pickle.dump(self.q_table['__root__'], f)
+startup_timer = StartupTimer(started_at, os.environ.get('SNAKE_STARTUP_TIMING') == '1')
+startup_timer.mark('imports')
 
-    @staticmethod
-    def load_q_table(file_path: str) -> QTable:
-            with open(file_path, 'rb') as f:
-                q_table_data = pickle.load(f)
-                return QTable(__root__=q_table_data)
+WEIGHTS_POLL_MS = 50  # How often the Tk loop checks whether the weights have finished loading
 
 
 class Direction:
+    """The human snake's heading, as an index into `DIRECTIONS`."""
+
     def __init__(self, opening_direction: str = 'Down') -> None:
-        self.current_direction: str = opening_direction
-        self.opening_direction: str = opening_direction
-        self.directions: List[str] = ['Up', 'Down', 'Left', 'Right']
+        self.opening_direction: int = DIRECTIONS.index(opening_direction)
+        self.current_direction: int = self.opening_direction
+        self.directions: Tuple[str, ...] = DIRECTIONS
 
-    def change_direction(self, direction_event: Optional[Event] = None, new_direction: Optional[str] = None) -> None:
+    def change_direction(self, direction_event: Optional[Event] = None, new_direction: Optional[int] = None) -> None:
+        """Turn to `new_direction` (or the arrow key of `direction_event`), unless it reverses onto the body."""
         if direction_event:
-            new_direction = direction_event.keysym
-
-        if new_direction == 'Left' and self.current_direction != 'Right':
-            self.current_direction = new_direction
-        elif new_direction == 'Right' and self.current_direction != 'Left':
-            self.current_direction = new_direction
-        elif new_direction == 'Up' and self.current_direction != 'Down':
-            self.current_direction = new_direction
-        elif new_direction == 'Down' and self.current_direction != 'Up':
-            self.current_direction = new_direction
-
-    def get_direction(self) -> str:
+            new_direction = KEYSYM_DIRECTIONS.get(direction_event.keysym)
+
+        if new_direction is not None:
+            self.current_direction = TURNS[self.current_direction][new_direction]
+
+    def get_direction(self) -> int:
         return self.current_direction
     
     def reset(self) -> None:
@@ -108,32 +76,32 @@ class Direction:
 class Food:
     def __init__(
         self, 
-        canvas: Canvas, 
-        x_coord: int = random.randint(0, (GAME_WIDTH // SPACE_SIZE) - 1) * SPACE_SIZE,
-        y_coord: int = random.randint(0, (GAME_HEIGHT // SPACE_SIZE) - 1) * SPACE_SIZE
+        x_coord: Optional[int] = None,
+        y_coord: Optional[int] = None,
+        free_cells: Optional[OccupancyGrid] = None,
+        config: Optional[GameConfig] = None
     ) -> None:
+        if x_coord is None or y_coord is None:
+            # Draw from the free-cell index, an empty board if none is given.
+            if free_cells is None:
+                config = config or GameConfig()
+                free_cells = OccupancyGrid(config.width, config.height, config.space_size)
+            x_coord, y_coord = free_cells.random_free_position()
         self.coordinates: List[int] = [x_coord, y_coord]
-        canvas.create_oval(x_coord, y_coord, x_coord + SPACE_SIZE, y_coord + SPACE_SIZE, fill=FOOD_COLOR, tags="food")
 
 
 class Snake:
-    def __init__(self, canvas: Canvas) -> None:
-        self.body_size: int = BODY_PARTS
-        self.canvas: Canvas = canvas
-        self.coordinates: List[List[int]] = []
-        self.squares: List[int] = []
-
-        for i in range(0, BODY_PARTS):
+    def __init__(self, config: Optional[GameConfig] = None) -> None:
+        self.config: GameConfig = config or GameConfig()
+        self.body_size: int = self.config.body_parts
+        self.coordinates: Deque[List[int]] = deque()
+        self.occupancy: OccupancyGrid = OccupancyGrid(self.config.width, self.config.height, self.config.space_size)
+        self.pixel_deltas: Tuple[Tuple[int, int], ...] = pixel_deltas(self.config.space_size)
+        self.steps: int = 0  # Moves made so far, lets the renderer redraw only what moved
+
+        for i in range(0, self.body_size):
             self.coordinates.append([0, 0])
-                
-        for index, (x, y) in enumerate(self.coordinates):
-            if index == 0:
-                # Head color
-                square = self.canvas.create_rectangle(x, y, x + SPACE_SIZE, y + SPACE_SIZE, fill=SNAKE_HEAD_COLOR, tags="snake")
-            else:
-                # Body color
-                square = self.canvas.create_rectangle(x, y, x + SPACE_SIZE, y + SPACE_SIZE, fill=SNAKE_COLOR, tags="snake")
-            self.squares.append(square)
+            self.occupancy.add(0, 0)
 
     def is_food_eaten(self, food: Food) -> bool:
         snake_head_coord_x, snake_head_coord_y = self.coordinates[0]
@@ -144,38 +112,26 @@ class Snake:
     def is_border_collision(self) -> bool:
         x, y = self.coordinates[0]
 
-        return x < 0 or x >= GAME_WIDTH or y < 0 or y >= GAME_HEIGHT
+        return x < 0 or x >= self.config.width or y < 0 or y >= self.config.height
 
     def is_self_collision(self) -> bool:
+        # The head is counted in its own cell, so any other segment there makes two.
         head_x, head_y = self.coordinates[0]
-        for body_part in self.coordinates[1:]:
-            if head_x == body_part[0] and head_y == body_part[1]:
-                return True
-        return False
+        return self.occupancy.count(head_x, head_y) > 1
+
+    def remove_tail(self) -> None:
+        tail_x, tail_y = self.coordinates.pop()
+        self.occupancy.remove(tail_x, tail_y)
 
     def turn(self, direction: Direction) -> None:
         x, y = self.coordinates[0]
+        dx, dy = self.pixel_deltas[direction.get_direction()]
+        x += dx
+        y += dy
 
-        if direction.get_direction() == "Up":
-            y -= SPACE_SIZE
-        elif direction.get_direction() == "Down":
-            y += SPACE_SIZE
-        elif direction.get_direction() == "Left":
-            x -= SPACE_SIZE
-        elif direction.get_direction() == "Right":
-            x += SPACE_SIZE
-
-        self.coordinates.insert(0, [x, y])
-
-        # Create a new square for the head with the head color
-        head_square = self.canvas.create_rectangle(x, y, x + SPACE_SIZE, y + SPACE_SIZE, fill=SNAKE_HEAD_COLOR)
-
-        # Insert the head square at the start of the squares list
-        self.squares.insert(0, head_square)
-
-        # Change the previous head square to the body color
-        if len(self.squares) > 1:
-            self.canvas.itemconfig(self.squares[1], fill=SNAKE_COLOR)
+        self.coordinates.appendleft([x, y])
+        self.occupancy.add(x, y)
+        self.steps += 1
 
 
 class Score:
@@ -211,11 +167,13 @@ class Score:
 
 
 class Game:
-    def __init__(self, player_type: Union[Literal['RL_Agent'], Literal['Human_Agent']]) -> None: # type: ignore
+    def __init__(self, player_type: Union[Literal['RL_Agent'], Literal['Human_Agent']], renderer_name: str = 'canvas', config: Optional[GameConfig] = None) -> None: # type: ignore
+        self.config: GameConfig = config or GameConfig()
         self.score: Score = Score()
         self.direction: Direction = Direction()
         self.window: Tk = Tk()
-        self.canvas: Canvas = Canvas(self.window, bg=BACKGROUND_COLOR, height=GAME_HEIGHT, width=GAME_WIDTH)
+        self.canvas: Canvas = Canvas(self.window, bg=BACKGROUND_COLOR, height=self.config.height, width=self.config.width)
+        self.renderer: Renderer = get_renderer(renderer_name, self.canvas, self.config.width, self.config.height, self.config.space_size)  # 'canvas' or 'tiles' for large boards
         
         # Frame for scores
         self.score_frame: Frame = Frame(self.window)
@@ -235,11 +193,31 @@ class Game:
         self.paused: bool = False
         self.setup_done: bool = False
         self.player_type: Union[Literal['RL_Agent'], Literal['Human_Agent']] = player_type
-        self.rl_agent: Optional[QLearningAgent] = None
+        self.rl_agent: Optional[Agent] = None
+        self.checkpointer: Optional[Checkpointer] = None  # For RL_Agent training
+        self.instrumentation: Optional[Instrumentation] = None  # Set before run_game to time the training phases
+        self.metrics: Optional[MetricsWriter] = None  # Set before run_game to record per-episode metrics
+        self.recorder: Optional[EpisodeRecorder] = None  # Set before run_game to record episodes for replay
+        self.learner: Optional[BatchedLearner] = None  # Set before run_game to learn from replayed batches
+        self.loader: Optional[threading.Thread] = None  # Loads the checkpoint while the window is already up
+        self.loaded_state: Optional[TrainerState] = None
+        self.load_error: Optional[BaseException] = None
+        self.weights_ready: bool = False  # Training, and saving checkpoints, wait for the loaded weights
+        self.env: SnakeEnv = SnakeEnv.from_config(self.config)  # Simulation the RL_Agent trains on
+        self.rl_state: Optional[State] = None
+        self.shown_score: Optional[int] = None
+        self.scheduler: RenderScheduler = RenderScheduler(
+            after=self.window.after,
+            step=self.rl_step,
+            render=self.render_env,
+            is_active=lambda: self.running and not self.paused,
+            tick_ms=self.config.speed
+        )
         self.total_reward: int = 0  # For RL_Agent
+        self.episode_reward: int = 0  # For RL_Agent
         self.quit: bool = False  # For RL_Agent training
         self.reset_count: int = 0
-        self.max_resets: int = episodes
+        self.max_resets: int = self.config.episodes
 
     def display_paused_message(self) -> None:
         self.canvas.create_rectangle(
@@ -287,12 +265,11 @@ class Game:
         y: int = int((screen_height / 2) - (window_height / 2))
 
         self.window.geometry(f"{window_width}x{window_height}+{x}+{y}")
+        self.mark_startup('window_ready')
 
         if self.player_type == HUMAN_AGENT:
-            self.window.bind('<Left>', lambda event: self.direction.change_direction(event))
-            self.window.bind('<Right>', lambda event: self.direction.change_direction(event))
-            self.window.bind('<Up>', lambda event: self.direction.change_direction(event))
-            self.window.bind('<Down>', lambda event: self.direction.change_direction(event))
+            for keysym, direction in KEYSYM_DIRECTIONS.items():
+                self.window.bind(f'<{keysym}>', lambda event, direction=direction: self.direction.change_direction(new_direction=direction))  # type: ignore
             
         self.window.bind('<Escape>', lambda event: self.on_closing())
         self.window.bind("<q>", lambda event: self.on_closing())
@@ -301,49 +278,142 @@ class Game:
         self.window.bind("<m>", lambda event: self.score.reset_high_score())
         
         if self.player_type == RL_AGENT and self.rl_agent is not None:
-            self.window.bind('<s>', lambda event: (self.rl_agent.save_q_table(q_table_file_path), print("Weights saved"))) # type: ignore
-  
-            if os.path.exists(q_table_file_path):
-                q_table = QLearningAgent.load_q_table(q_table_file_path)
-                self.rl_agent.q_table = q_table
+            self.checkpointer = create_checkpointer(self.rl_agent, self.learner)
+            self.window.bind('<s>', lambda event: self.weights_ready and (self.save_checkpoint(background=True), print("Weights saved"))) # type: ignore
+
+            # Speed control: 1 = 1x, 2 = 10x, 3 = max, 0 = rendering off, f = cycle
+            for key, mode in (('1', '1x'), ('2', '10x'), ('3', 'max'), ('0', 'off')):
+                self.window.bind(f'<Key-{key}>', lambda event, mode=mode: self.set_speed(mode))  # type: ignore
+            self.window.bind('<f>', lambda event: self.set_speed(self.scheduler.cycle_mode()))
+            self.set_speed(self.scheduler.mode)
                 
         self.window.bind('<p>', lambda event: self.toggle_pause())
         self.window.bind('<space>', lambda event: self.toggle_pause())
 
         self.setup_done = True
 
+    def mark_startup(self, milestone: str) -> None:
+        """Record a startup milestone; in startup-timing mode, close the window once the game is ready."""
+        startup_timer.mark(milestone)
+        last_milestone = 'weights_ready' if self.player_type == RL_AGENT else 'window_ready'
+        if startup_timer.enabled and milestone == last_milestone:
+            self.running = False
+            self.quit = True
+            self.window.after_idle(self.window.destroy)
+
+    def load_weights(self) -> None:
+        """
+        Load the last checkpoint on a background thread, showing a loading indicator, and start training once it is in.
+
+        Tk may only be used from the thread running it, so the main thread polls
+        the loader every `WEIGHTS_POLL_MS` rather than being called back from it.
+        """
+        if self.checkpointer is None or self.rl_agent is None:
+            self.on_weights_loaded()
+            return
+
+        self.canvas.create_text(self.canvas.winfo_width() / 2, self.canvas.winfo_height() / 2, font=('consolas', 30), text="LOADING WEIGHTS...", fill="gray", tags="loading")
+        self.loader = threading.Thread(target=self.read_checkpoint, args=(self.checkpointer, self.rl_agent), daemon=True)
+        self.loader.start()
+        self.window.after(WEIGHTS_POLL_MS, self.poll_weights)
+
+    def read_checkpoint(self, checkpointer: Checkpointer, rl_agent: Agent) -> None:
+        """Loader thread: nothing else touches the agent or the environment's RNG until it has finished."""
+        try:
+            self.loaded_state = checkpointer.load(rl_agent, self.env)
+        except BaseException as e:
+            self.load_error = e
+
+    def poll_weights(self) -> None:
+        if self.loader is not None and self.loader.is_alive():
+            self.window.after(WEIGHTS_POLL_MS, self.poll_weights)
+            return
+        self.loader = None
+        self.canvas.delete("loading")
+        if self.load_error is not None:
+            raise self.load_error
+        self.on_weights_loaded()
+
+    def on_weights_loaded(self) -> None:
+        trainer_state = self.loaded_state
+        if trainer_state is not None and self.rl_agent is not None:
+            self.reset_count = trainer_state['reset_count']
+            self.total_reward = trainer_state['total_reward']
+            print(f"Resuming training from episode {self.reset_count}, epsilon {self.rl_agent.epsilon:.3f}")
+
+        if self.instrumentation is not None:
+            # After the checkpoint is loaded, which replaces the Q-table being counted.
+            self.instrument(self.instrumentation)
+
+        self.weights_ready = True
+        self.mark_startup('weights_ready')
+        if not self.running:
+            return
+        # The first episode starts from the restored RNG state, as when the checkpoint was written.
+        if self.recorder is not None:
+            self.recorder.begin(self.env, self.reset_count + 1, self.env.reseed())
+        self.rl_state = self.env.reset()
+        self.update_game()
+
+    def instrument(self, instrumentation: Instrumentation) -> None:
+        """Time the agent, the environment, whole training steps and rendering."""
+        from src.training import instrument_agent, instrument_env
+
+        if self.rl_agent is not None:
+            instrument_agent(instrumentation, self.rl_agent)
+        instrument_env(instrumentation, self.env)
+        if self.learner is not None:
+            instrumentation.wrap(self.learner, 'update', 'replay_update')
+        instrumentation.wrap(self.scheduler, 'step', 'rl_step')
+        instrumentation.wrap(self.scheduler, 'render')
+
+    def save_checkpoint(self, background: bool = False) -> None:
+        if self.checkpointer is None or self.rl_agent is None or not self.weights_ready:
+            return  # Saving before the checkpoint is loaded would overwrite it with an untrained agent
+        self.checkpointer.save(self.rl_agent, self.reset_count, self.total_reward, self.env, background=background)
+        if not background:
+            self.checkpointer.wait()
+
+    def set_speed(self, mode: str) -> None:
+        self.scheduler.set_mode(mode)
+        self.window.title(f"{APP_NAME} - Speed: {mode}")
+        if mode == 'off':
+            self.renderer.hide()
+            self.canvas.create_text(self.canvas.winfo_width() / 2, self.canvas.winfo_height() / 2, font=('consolas', 30), text="RENDERING OFF", fill="gray", tags="render_off")
+        else:
+            self.canvas.delete("render_off")
+
     def create_food(self) -> Optional[Food]:
         
         if self.snake is None:
             return None
         
-        snake_body_set: set = set(tuple(coord) for coord in self.snake.coordinates)
-        all_positions: set = set((x, y) for x in range(0, GAME_WIDTH, SPACE_SIZE) for y in range(0, GAME_HEIGHT, SPACE_SIZE))
-        available_positions: List[tuple] = list(all_positions - snake_body_set)
-        
-        if available_positions:
-            x, y = random.choice(available_positions)
-            return Food(self.canvas, x, y)
-        else:
-            raise Exception("No available position to place food")
+        return Food(free_cells=self.snake.occupancy)
 
     def create_snake(self) -> Snake:
-        return Snake(self.canvas)
+        return Snake(self.config)
 
     def run_game(self) -> None:
         self.run_setup()
-        snake: Snake = Snake(self.canvas)
-        food: Food = Food(self.canvas)
-        self.snake, self.food = snake, food
+        if self.player_type == RL_AGENT:
+            self.load_weights()  # Training starts once the weights are in
+        else:
+            snake: Snake = self.create_snake()
+            food: Food = Food(free_cells=snake.occupancy)
+            self.snake, self.food = snake, food
+            self.render_snake()
+            self.update_game()
         
-        self.update_game()
         self.window.mainloop()
         
     def on_closing(self) -> None:
         self.score.save_high_score()
-        if self.player_type == RL_AGENT and self.rl_agent is not None:
-            print("Training interrupted, saving Q-table...")
-            agent.save_q_table(q_table_file_path)
+        if self.player_type == RL_AGENT and self.rl_agent is not None and self.weights_ready:
+            print(f"Training interrupted, saving {get_weights_name(self.rl_agent)}...")
+            self.save_checkpoint()
+            self.close_metrics()
+            self.close_recorder()
+            self.dump_instrumentation()
             os._exit(0)
         self.running = False
         self.quit = True
@@ -372,7 +442,8 @@ class Game:
             return
         
         if self.player_type == RL_AGENT:
-            self.rl_agent_logic()
+            if self.weights_ready:
+                self.scheduler.start()
         else:
             self.human_agent_logic()
             
@@ -386,87 +457,128 @@ class Game:
         if self.snake.is_food_eaten(self.food):
             current_score: int = self.score.update_score()
             self.label.config(text=f"Score: {current_score}")
-            self.canvas.delete("food")
             self.food = self.create_food()
         else:
-            del self.snake.coordinates[-1]
-            self.canvas.delete(self.snake.squares[-1])
-            del self.snake.squares[-1]
+            self.snake.remove_tail()
 
             if self.is_game_over():
                 self.game_over()
                 return
         
-        self.window.after(SPEED, self.update_game)
+        self.render_snake()
+        self.window.after(self.config.speed, self.update_game)
     
-    def rl_agent_logic(self) -> None:
-        
+    def rl_step(self) -> bool:
+        """One training step on `env`. Returns False once training is over."""
+        if self.rl_agent is None or self.rl_state is None:
+            return False
+
+        state = self.rl_state
+        action = self.rl_agent.choose_action(state)
+        next_state, reward, done = self.env.step(action)
+        if self.learner is not None:
+            self.learner.observe(state, action, reward, next_state, done)
+        else:
+            self.rl_agent.learn(state, action, reward, next_state, done)
+        self.total_reward += reward
+        self.episode_reward += reward
+        self.rl_state = next_state
+
+        if done:
+            if self.metrics is not None:
+                self.metrics.record(self.reset_count + 1, self.env.steps, self.env.score, self.episode_reward, self.rl_agent.epsilon, self.rl_agent.state_count())
+            self.episode_reward = 0
+            if self.recorder is not None:
+                self.recorder.end(self.env)
+            self.score.current_score = self.env.score
+            if self.score.current_score > self.score.high_score:
+                self.score.high_score = self.score.current_score
+                self.high_score_label.config(text=f"High Score: {self.score.high_score}")
+            self.reset_game()
+
+        return self.running
+
+    def render_snake(self) -> None:
+        """Draw the human game's snake and food."""
         if self.snake is None or self.food is None:
             return
-        
-        state = self.get_state()
-        
-        if state is None:
-            return
+        self.renderer.draw(self.snake.coordinates, self.food.coordinates, self.reset_count, self.snake.steps)
 
-        action = agent.choose_action(state)
-        self.perform_action(action)
-        next_state = self.get_state()
-
-        if self.snake.is_food_eaten(self.food):
-            current_score = self.score.update_score()
-            self.label.config(text=f"Score: {current_score}")
-            self.canvas.delete("food")
-            self.food = self.create_food()
-            reward = 5
-        else:
-            del self.snake.coordinates[-1]
-            self.canvas.delete(self.snake.squares[-1])
-            del self.snake.squares[-1]
-            
-            if self.is_game_over():
-                if self.score.current_score > self.score.high_score:
-                    self.score.high_score = self.score.current_score
-                    self.high_score_label.config(text=f"High Score: {self.score.high_score}")
-                reward = -10
-                agent.learn(state, action, reward, next_state, not self.running) # type: ignore
-                self.total_reward += reward
-                self.reset_game()
-                return
-            else:
-                reward = 0
-            
-        agent.learn(state, action, reward, next_state, not self.running) # type: ignore
-        self.total_reward += reward
+    def render_env(self) -> None:
+        """Draw the RL game from `env`."""
+        self.renderer.draw(self.env.coordinates, self.env.food, self.reset_count, self.env.steps)
+        if self.env.score != self.shown_score:
+            self.label.config(text=f"Score: {self.env.score}")
+            self.shown_score = self.env.score
 
-        self.window.after(SPEED, self.update_game)
-            
     def reset_game(self) -> None:
         if self.reset_count >= self.max_resets:
             if self.player_type == RL_AGENT and self.rl_agent is not None:
-                print("Training completed, Q-table saved.")
-                agent.save_q_table(q_table_file_path)
+                self.save_checkpoint()
+                print(f"Training completed, {get_weights_name(self.rl_agent)} saved.")
+                self.close_metrics()
+                self.close_recorder()
+                self.dump_instrumentation()
             self.game_over()
             return
 
         if (self.reset_count + 1) % 100 == 0:
-            print(f"Episode {self.reset_count + 1}/{episodes}, Total Reward: {self.total_reward}")
+            if self.metrics is not None and self.rl_agent is not None:
+                print(
+                    f"Episode {self.reset_count + 1}/{self.max_resets}, Mean Score: {self.metrics.mean('score', 100):.2f}, "
+                    f"Mean Reward: {self.metrics.mean('reward', 100):.2f}, Epsilon: {self.rl_agent.epsilon:.3f}"
+                )
+            else:
+                print(f"Episode {self.reset_count + 1}/{self.max_resets}, Total Reward: {self.total_reward}")
             
         self.reset_count += 1
+
+        if self.instrumentation is not None:
+            self.instrumentation.on_episode_end(self.reset_count)
+
+        if self.checkpointer is not None and self.rl_agent is not None:
+            self.checkpointer.maybe_save(self.rl_agent, self.reset_count, self.total_reward, self.env)
+
+        self.score.reset()
+        self.direction.reset()
+
+        if self.player_type == RL_AGENT:
+            # The scheduler keeps stepping and redraws the new episode on its next frame.
+            self.canvas.delete("gameover", "restart_text")
+            if self.recorder is not None:
+                self.recorder.begin(self.env, self.reset_count + 1, self.env.reseed())
+            self.rl_state = self.env.reset()
+            self.scheduler.start()
+            return
         
         if self.canvas:
-            self.canvas.delete("all")
+            self.canvas.delete("gameover", "restart_text")
         else:
-            self.canvas = Canvas(self.window, bg=BACKGROUND_COLOR, height=GAME_HEIGHT, width=GAME_WIDTH)
+            self.canvas = Canvas(self.window, bg=BACKGROUND_COLOR, height=self.config.height, width=self.config.width)
             self.canvas.pack()
             
-        self.score.reset()
-        self.direction.reset()
         self.label.config(text=f"Score: {self.score.current_score}")
         self.snake = self.create_snake()
         self.food = self.create_food()
+        self.render_snake()
         self.update_game()
 
+    def close_metrics(self) -> None:
+        if self.metrics is not None:
+            self.metrics.close()
+            print(f"Episode metrics written to {self.metrics.run_dir}")
+
+    def close_recorder(self) -> None:
+        if self.recorder is not None:
+            self.recorder.close()
+            print(f"{self.recorder.recorded} episodes recorded to {self.recorder.file_path}")
+
+    def dump_instrumentation(self) -> None:
+        if self.instrumentation is not None:
+            self.instrumentation.stop_profile()
+            self.instrumentation.dump(profile_stats_file_path)
+            print(self.instrumentation.summary())
+
     def restart_game(self) -> None:
         
         self.check_window()
@@ -489,13 +601,15 @@ class Game:
             self.score.high_score = self.score.current_score
             self.high_score_label.config(text=f"High Score: {self.score.high_score}")
 
-        self.canvas.delete("all")
+        # Keep the snake and food items for the next game rather than deleting everything.
+        self.renderer.hide()
+        self.canvas.delete("paused_overlay", "paused_message", "render_off", "gameover", "restart_text")
         if self.player_type == RL_AGENT and self.rl_agent is not None:
             self.canvas.create_text(self.canvas.winfo_width() / 2, self.canvas.winfo_height() / 2, font=('consolas', 40), text="TRAINING COMPLETED", fill="green", tags="gameover")
         else:
             self.canvas.create_text(self.canvas.winfo_width() / 2, self.canvas.winfo_height() / 2, font=('consolas', 70), text="GAME OVER", fill="red", tags="gameover")
         self.canvas.create_text(self.canvas.winfo_width() / 2, self.canvas.winfo_height() / 2 + self.canvas.winfo_height() / 4, font=('Arial', 10), text="Press ENTER to restart or ESC to quit", fill="white", tags="restart_text")
-        # self.canvas.create_text(GAME_WIDTH / 2, GAME_HEIGHT / 2 + 30, text="Press R to restart or Q to quit", fill="white", font=("Arial", 18))
+        # self.canvas.create_text(self.config.width / 2, self.config.height / 2 + 30, text="Press R to restart or Q to quit", fill="white", font=("Arial", 18))
         self.window.bind('<Return>', lambda event: self.restart_game())
         self.window.bind("<r>", lambda event: self.restart_game())
 
@@ -506,42 +620,312 @@ class Game:
         
         head_x, head_y = self.snake.coordinates[0]
         food_x, food_y = self.food.coordinates
-        body = self.snake.coordinates[1:]
+        body = list(islice(self.snake.coordinates, 1, None))
 
         return State(
             head=(head_x, head_y),
             food=(food_x, food_y),
             body=body,
             near_border=(
-                head_x == 0 or head_x == GAME_WIDTH - SPACE_SIZE,
-                head_y == 0 or head_y == GAME_HEIGHT - SPACE_SIZE
-            )
+                head_x == 0 or head_x == self.config.width - self.config.space_size,
+                head_y == 0 or head_y == self.config.height - self.config.space_size
+            ),
+            occupancy=self.snake.occupancy,
+            occupancy_version=self.snake.occupancy.version
         )
 
-    def perform_action(self, action: int) -> None:
-        
-        if self.snake is None or self.food is None:
-            return
-        
-        self.direction.change_direction(new_direction=self.direction.directions[action])
-        self.snake.turn(self.direction)
 
+agent: Optional[Agent] = None  # Created by the first train_agent call, and kept while its settings are reused
+
+def get_weights_file_path(rl_agent: Agent) -> str:
+    from src.agent import DQNAgent
+
+    if isinstance(rl_agent, DQNAgent):
+        return get_network_file_path()
+    return get_q_table_file_path(rl_agent.encoder.name)
+
+def get_weights_name(rl_agent: Agent) -> str:
+    """What `rl_agent` saves, for messages: "network weights" for a `DQNAgent`, otherwise "Q-table"."""
+    from src.agent import DQNAgent
+
+    return "network weights" if isinstance(rl_agent, DQNAgent) else "Q-table"
+
+def create_checkpointer(rl_agent: Agent, learner: Optional[BatchedLearner] = None) -> Checkpointer:
+    from src.training import Checkpointer
+
+    return Checkpointer(
+        get_weights_file_path(rl_agent),
+        get_trainer_state_file_path(rl_agent.encoder.name),
+        every_episodes=checkpoint_every_episodes,
+        every_seconds=checkpoint_every_seconds,
+        learner=learner
+    )
+
+def train_headless(rl_agent: Agent, max_episodes: Optional[int] = None, report_every: int = 100, resume: bool = True, seed: Optional[int] = None, config: Optional[GameConfig] = None, instrumentation: Optional[Instrumentation] = None, metrics: Optional[MetricsWriter] = None, recorder: Optional[EpisodeRecorder] = None, learner: Optional[BatchedLearner] = None) -> None:
+    """
+    Train `rl_agent` against the headless `SnakeEnv` as fast as the CPU allows.
+
+    Checkpoints are written in the background every `checkpoint_every_episodes`
+    episodes or `checkpoint_every_seconds` seconds; with `resume`, training picks
+    up from the last one (Q-table, epsilon, episode count and RNG state).
+    `max_episodes` defaults to `config.episodes`. With `instrumentation`, the
+    agent and environment phases are timed and the stats dumped when training ends.
+    With `metrics`, every episode's length, score, reward, epsilon and Q-table size is recorded.
+    With `recorder`, episodes are appended to its episode log for `replay_episode`.
+    With `learner`, transitions go to its replay buffer instead of `rl_agent.learn`.
+    """
+    import numpy as np
+    from src.agent import DQNAgent
+    from src.training import instrument_agent, instrument_env, run_episode
+
+    config = config or GameConfig()
+    if max_episodes is None:
+        max_episodes = config.episodes
+    if seed is not None:
+        np.random.seed(seed)
+    env = SnakeEnv.from_config(config, seed=seed)
+    checkpointer = create_checkpointer(rl_agent, learner)
+    completed_episodes: int = 0
+    total_reward: int = 0
+
+    if resume:
+        trainer_state = checkpointer.load(rl_agent, env)
+        if trainer_state is not None:
+            completed_episodes = trainer_state['reset_count']
+            total_reward = trainer_state['total_reward']
+            print(f"Resuming training from episode {completed_episodes}, epsilon {rl_agent.epsilon:.3f}")
+
+    if instrumentation is not None:
+        instrument_agent(instrumentation, rl_agent)
+        instrument_env(instrumentation, env)
+        if learner is not None:
+            instrumentation.wrap(learner, 'update', 'replay_update')
+
+    total_steps: int = 0
+    start_time: float = time.perf_counter()
+    report_time, report_steps = start_time, 0
+
+    try:
+        for episode in range(completed_episodes + 1, max_episodes + 1):
+            if recorder is not None:
+                recorder.begin(env, episode, env.reseed())
+            episode_reward = run_episode(rl_agent, env, learner.observe if learner is not None else None)
+            total_reward += episode_reward
+            total_steps += env.steps
+            if recorder is not None:
+                recorder.end(env)
+            if metrics is not None:
+                metrics.record(episode, env.steps, env.score, episode_reward, rl_agent.epsilon, rl_agent.state_count())
+            completed_episodes = episode
+            if instrumentation is not None:
+                instrumentation.on_episode_end(episode)
+            checkpointer.maybe_save(rl_agent, completed_episodes, total_reward, env)
+
+            if episode % report_every == 0:
+                now = time.perf_counter()
+                steps_per_second = (total_steps - report_steps) / max(now - report_time, 1e-9)
+                if metrics is not None:
+                    print(
+                        f"Episode {episode}/{max_episodes}, Mean Score: {metrics.mean('score', report_every):.2f}, "
+                        f"Mean Reward: {metrics.mean('reward', report_every):.2f}, Epsilon: {rl_agent.epsilon:.3f}, Steps/s: {steps_per_second:,.0f}"
+                    )
+                else:
+                    print(f"Episode {episode}/{max_episodes}, Total Reward: {total_reward}, Epsilon: {rl_agent.epsilon:.3f}, Steps/s: {steps_per_second:,.0f}")
+                report_time, report_steps = now, total_steps
+    except KeyboardInterrupt:
+        print(f"Training interrupted, saving {get_weights_name(rl_agent)}...")
+
+    elapsed = time.perf_counter() - start_time
+    print(f"Trained for {total_steps} steps in {elapsed:.1f}s ({total_steps / max(elapsed, 1e-9):,.0f} steps/s)")
+    if isinstance(rl_agent, DQNAgent):
+        print(f"Network: {rl_agent.network.parameter_count():,} parameters, {rl_agent.memory_bytes() / 2**20:.1f} MiB with its replay buffer")
+    else:
+        stats = rl_agent.q_table_stats()
+        evicted = f", {stats['evicted']} evicted and {stats['compacted']} all-zero dropped in {stats['evictions']} evictions" if stats.get('evictions') else ""
+        print(f"Q-table: {rl_agent.state_count()} states, {rl_agent.memory_per_state():.0f} bytes/state{evicted}")
+    checkpointer.save(rl_agent, completed_episodes, total_reward, env)
+    print(f"{get_weights_name(rl_agent).capitalize()} saved after {completed_episodes} episodes.")
+
+    if metrics is not None:
+        metrics.close()
+        print(f"Episode metrics written to {metrics.run_dir}")
+
+    if recorder is not None:
+        recorder.close()
+        print(f"{recorder.recorded} episodes recorded to {recorder.file_path}")
+
+    if instrumentation is not None:
+        instrumentation.restore()
+        instrumentation.stop_profile()
+        instrumentation.dump(profile_stats_file_path)
+        print(instrumentation.summary())
+
+def create_instrumentation(profile_episodes: int = 0) -> Instrumentation:
+    """Instrumentation dumping its stats every 100 episodes or minute, profiling the first `profile_episodes` episodes with cProfile."""
+    from src.training import Instrumentation
+
+    instrumentation = Instrumentation(profile_stats_file_path, dump_every_episodes=100, dump_every_seconds=60.0)
+    if profile_episodes:
+        instrumentation.profile(profile_episodes, profile_file_path)
+    return instrumentation
+
+def train_agent(
+    headless: bool = False,
+    encoder_name: str = 'full',
+    renderer_name: str = 'canvas',
+    config: Optional[GameConfig] = None,
+    instrument: bool = False,
+    profile_episodes: int = 0,
+    record_metrics: bool = True,
+    evaluate_episodes: int = 0,
+    record_every: int = 0,
+    replay: bool = False,
+    agent_name: str = 'q_learning',
+    max_states: Optional[int] = None,
+    eviction: str = 'lru'
+) -> None:
+    """
+    Train the RL agent in the Tk window, or as fast as possible with `headless`.
+
+    `agent_name` picks the tabular `q_learning` agent, keyed by `encoder_name`, or
+    the `dqn` network, which brings its own features and replay buffer.
+
+    With `evaluate_episodes`, the saved Q-table is then played greedily for that
+    many seeded episodes on every CPU and the results printed. With `record_every`,
+    every `record_every`-th episode is appended to the episode log for `replay_episode`.
+    With `replay`, the agent learns from minibatches sampled from a replay buffer.
+    With `max_states`, the Q-table holds at most that many states, evicting by
+    `eviction` ('lru' or 'least_visited'), so memory stays flat however long training runs.
+    """
+    from src.agent import AGENTS, BatchedLearner, DQNAgent, FeatureEncoder, QLearningAgent, create_agent
+    from src.env import EpisodeRecorder
+    from src.training import MetricsWriter, evaluate
+
+    global agent
+    config = config or GameConfig()
+    if agent_name == DQNAgent.name:
+        if replay:
+            raise ValueError("The DQN agent always learns from its own replay buffer.")
+        encoder_name = FeatureEncoder.name
+    if (
+        agent is None
+        or not isinstance(agent, AGENTS[agent_name])
+        or (agent.encoder.name, agent.encoder.width, agent.encoder.height, agent.encoder.space_size) != (encoder_name, config.width, config.height, config.space_size)
+        or (isinstance(agent, QLearningAgent) and (agent.max_states, agent.eviction) != (max_states, eviction))
+    ):
+        agent = create_agent(agent_name, encoder_name, config, max_states, eviction)
+
+    instrumentation = create_instrumentation(profile_episodes) if instrument or profile_episodes else None
+    metrics = MetricsWriter(get_metrics_run_dir(encoder_name)) if record_metrics else None
+    recorder = EpisodeRecorder(episode_log_file_path, every=record_every) if record_every else None
+    learner = BatchedLearner(agent) if replay and isinstance(agent, QLearningAgent) else None
+
+    if headless:
+        train_headless(agent, config=config, instrumentation=instrumentation, metrics=metrics, recorder=recorder, learner=learner)
+    else:
+        game = Game(RL_AGENT, renderer_name, config)
+        game.rl_agent = agent
+        game.instrumentation = instrumentation
+        game.metrics = metrics
+        game.recorder = recorder
+        game.learner = learner
+        game.run_game()
+
+    if evaluate_episodes:
+        print(evaluate(get_weights_file_path(agent), evaluate_episodes, encoder_name=encoder_name, config=config).format())
+
+class ReplayViewer:
+    """
+    Plays a recorded episode in a Tk window at a chosen speed.
+
+    Space or P pauses, Left and Right step back and forward, Page Up and Page Down
+    jump 100 steps, Home and End go to the start and end, and 1, 2 and 3 set the
+    speed as in training.
+    """
+
+    def __init__(self, record: EpisodeRecord, renderer_name: str = 'canvas', mode: str = '1x', start_step: int = 0) -> None:
+        from src.env import EpisodeReplay
+
+        self.record: EpisodeRecord = record
+        self.config: GameConfig = record.config
+        self.replay: EpisodeReplay = EpisodeReplay(record)
+        self.replay.seek(start_step)
+        self.paused: bool = False
 
-agent = QLearningAgent()
+        self.window: Tk = Tk()
+        self.window.title(f"{APP_NAME} - Replay of episode {record.episode}")
+        self.window.resizable(False, False)
+        self.label: Label = Label(self.window, font=('consolas', 20))
+        self.label.pack(side=TOP, pady=1)
+        self.canvas: Canvas = Canvas(self.window, bg=BACKGROUND_COLOR, height=self.config.height, width=self.config.width)
+        self.canvas.pack()
+        self.renderer: Renderer = get_renderer(renderer_name, self.canvas, self.config.width, self.config.height, self.config.space_size)
+        self.scheduler: RenderScheduler = RenderScheduler(
+            after=self.window.after,
+            step=self.step,
+            render=self.render,
+            is_active=lambda: not self.paused,
+            mode=mode,
+            tick_ms=self.config.speed
+        )
 
-def train_agent() -> None:
-    game = Game(RL_AGENT)
-    game.rl_agent = agent
+        for key, speed in (('1', '1x'), ('2', '10x'), ('3', 'max')):
+            self.window.bind(f'<Key-{key}>', lambda event, speed=speed: self.scheduler.set_mode(speed))  # type: ignore
+        for key, offset in (('Left', -1), ('Right', 1), ('Prior', -100), ('Next', 100)):
+            self.window.bind(f'<{key}>', lambda event, offset=offset: self.seek(self.replay.step_index + offset))  # type: ignore
+        self.window.bind('<Home>', lambda event: self.seek(0))
+        self.window.bind('<End>', lambda event: self.seek(self.record.steps))
+        self.window.bind('<p>', lambda event: self.toggle_pause())
+        self.window.bind('<space>', lambda event: self.toggle_pause())
+        self.window.bind('<Escape>', lambda event: self.window.destroy())
+        self.window.bind('<q>', lambda event: self.window.destroy())
 
-    game.run_game() 
-    
-    # TODO: Test the agent after training
+    def step(self) -> bool:
+        keep_running = self.replay.step()
+        if not keep_running:
+            self.render()  # The scheduler does not draw the frame it stops on
+        return keep_running
+
+    def render(self) -> None:
+        env = self.replay.env
+        self.renderer.draw(env.coordinates, env.food, 0, env.steps)
+        self.label.config(text=f"Step {self.replay.step_index}/{self.record.steps}  Score: {env.score}")
+
+    def seek(self, step: int) -> None:
+        self.replay.seek(step)
+        self.render()
+
+    def toggle_pause(self) -> None:
+        self.paused = not self.paused
+        if not self.paused:
+            self.scheduler.start()
+
+    def run(self) -> None:
+        self.render()
+        self.scheduler.start()
+        self.window.mainloop()
+
+def replay_episode(file_path: str = episode_log_file_path, episode: Optional[int] = None, start_step: int = 0, mode: str = '1x', renderer_name: str = 'canvas') -> None:
+    """Replay episode number `episode` (the last one recorded by default) from the episode log at `file_path`."""
+    from src.env import EpisodeLog
+
+    log = EpisodeLog(file_path)
+    if not len(log):
+        raise ValueError(f"No episodes recorded in {file_path}.")
+    record = log.find(episode) if episode is not None else log[-1]
+    ReplayViewer(record, renderer_name, mode, start_step).run()
 
-def play_as_human() -> None:
-    game = Game(HUMAN_AGENT)
+def play_as_human(renderer_name: str = 'canvas', config: Optional[GameConfig] = None) -> None:
+    game = Game(HUMAN_AGENT, renderer_name, config)
     game.restart_game()
 
 
 if __name__ == "__main__":
-    play_as_human()
-    # train_agent()
+    # Board size, speed and episodes can be overridden with SNAKE_* variables or --width/--height/... arguments.
+    config = GameConfig.from_args()
+    play_as_human(config=config)
+    # train_agent(config=config)
+    # train_agent(headless=True, config=config)
+    # train_agent(headless=True, encoder_name='compact', config=config)
+    # train_agent(headless=True, agent_name='dqn', config=config)
+    # replay_episode()
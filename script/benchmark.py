@@ -0,0 +1,382 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from src.agent import ENCODERS, QLearningAgent, get_encoder
+from src.env import DELTAS, DIRECTIONS, BatchSnakeEnv, SnakeEnv
+from src.utils.config import GameConfig
+from src.utils.constants import BACKGROUND_COLOR, text_file_dir
+from src.utils.types import State
+
+
+DEFAULT_BASELINE = os.path.join(text_file_dir, "benchmark_baseline.json")
+
+
+def hamiltonian_cycle(cols: int, rows: int) -> List[Tuple[int, int]]:
+    """A cycle of (col, row) cells through the whole board, so a snake following it never dies. Needs an even row count."""
+    if rows % 2:
+        raise ValueError("The board needs an even number of rows.")
+
+    cycle: List[Tuple[int, int]] = []
+    for row in range(rows):
+        columns = range(1, cols) if row % 2 == 0 else range(cols - 1, 0, -1)
+        cycle.extend((col, row) for col in columns)
+    cycle.extend((0, row) for row in range(rows - 1, -1, -1))
+    return cycle
+
+
+def snake_on_cycle(env: SnakeEnv, length: int) -> List[int]:
+    """Lay a snake of `length` along the cycle and return the action sequence that keeps it on the cycle."""
+    size = env.space_size
+    cycle = hamiltonian_cycle(env.width // size, env.height // size)
+    env.reset()
+
+    actions: List[int] = []
+    for i in range(len(cycle)):
+        (x0, y0), (x1, y1) = cycle[(length - 1 + i) % len(cycle)], cycle[(length + i) % len(cycle)]
+        actions.append(DELTAS.index((x1 - x0, y1 - y0)))
+
+    # The head sits at cycle[length - 1] and the body trails behind it along the cycle.
+    cols = env.width // size
+    env.place_snake([cycle[i][1] * cols + cycle[i][0] for i in range(length - 1, -1, -1)], actions[-1])
+    env.food, env.food_cell = [-size, -size], env.occupancy.cell_count  # Parked on a cell no move reaches, so the length stays fixed
+    return actions
+
+
+def benchmark_move_by_length(config: GameConfig, calls: int, repeat: int) -> Dict[int, float]:
+    """Microseconds per `SnakeEnv.move` (move plus collision checks) for snakes from length 3 up to a full board."""
+    cells = config.cell_count
+    results: Dict[int, float] = {}
+    for length in sorted(set([3, cells // 8, cells // 4, cells // 2, cells - 1])):
+        env = SnakeEnv.from_config(config)
+        actions = snake_on_cycle(env, length)
+        results[length] = time_per_call(lambda i: env.move(actions[i % len(actions)]), calls, repeat)
+        if env.done:
+            raise RuntimeError(f"The snake of length {length} died during the benchmark.")
+    return results
+
+
+def time_renderer(root: Any, renderer_name: str, env: SnakeEnv, length: int, frames: int) -> Tuple[float, float]:
+    """Microseconds for the first (full) frame and per following frame, one move per frame, including Tk's idle redraw."""
+    from tkinter import Canvas
+    from src.render import get_renderer
+
+    canvas = Canvas(root, bg=BACKGROUND_COLOR, width=env.width, height=env.height)
+    try:
+        renderer = get_renderer(renderer_name, canvas, env.width, env.height, env.space_size)
+        actions = snake_on_cycle(env, length)
+
+        start = time.perf_counter()
+        renderer.draw(env.coordinates, env.food, 0, env.steps)
+        root.update_idletasks()
+        first_frame = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for i in range(frames):
+            env.move(actions[i % len(actions)])
+            renderer.draw(env.coordinates, env.food, 0, env.steps)
+            root.update_idletasks()
+        return first_frame * 1e6, (time.perf_counter() - start) / frames * 1e6
+    finally:
+        canvas.destroy()
+
+
+def benchmark_render_by_length(lengths: List[int], frames: int = 2000) -> Dict[int, float]:
+    """Microseconds per `CanvasRenderer` frame for each snake length. Needs a display."""
+    from tkinter import Tk
+
+    root = Tk()
+    root.withdraw()
+    try:
+        return {length: time_renderer(root, 'canvas', SnakeEnv(), length, frames)[1] for length in lengths}
+    finally:
+        root.destroy()
+
+
+def benchmark_renderers_by_board(board_sizes: List[int], frames: int = 200, pixels: int = 600) -> Dict[int, Dict[str, Tuple[float, float]]]:
+    """
+    First-frame and per-frame microseconds of every renderer on square boards of `board_sizes` cells a side. Needs a display.
+
+    Boards are scaled to about `pixels` wide and the snake covers a quarter of the cells.
+    """
+    from tkinter import Tk
+    from src.render import RENDERERS
+
+    root = Tk()
+    root.withdraw()
+    results: Dict[int, Dict[str, Tuple[float, float]]] = {}
+    try:
+        for cells in board_sizes:
+            space_size = max(1, pixels // cells)
+            results[cells] = {}
+            for renderer_name in RENDERERS:
+                env = SnakeEnv(cells * space_size, cells * space_size, space_size)
+                results[cells][renderer_name] = time_renderer(root, renderer_name, env, cells * cells // 4, frames)
+    finally:
+        root.destroy()
+    return results
+
+
+def time_per_call(func: Callable[[int], Any], calls: int, repeat: int = 3) -> float:
+    """
+    Best of `repeat` runs of microseconds per call of `func(i)`.
+
+    `i` keeps counting across runs (`run * calls` to `run * calls + calls - 1`), so a snake following a cycle stays on it.
+    """
+    best = float('inf')
+    for run in range(repeat):
+        start = time.perf_counter()
+        for i in range(run * calls, (run + 1) * calls):
+            func(i)
+        best = min(best, time.perf_counter() - start)
+    return best / calls * 1e6
+
+
+def states_on_cycle(env: SnakeEnv, actions: List[int], count: int) -> List[State]:
+    """The states a snake laid with `snake_on_cycle` passes through over its next `count` moves."""
+    states = [env.get_state()]
+    for i in range(count - 1):
+        states.append(env.step(actions[i % len(actions)])[0])
+    return states
+
+
+def benchmark_agent(config: GameConfig, length: int, calls: int, repeat: int) -> Dict[str, float]:
+    """`get_state_key`, `choose_action` (greedy) and `learn` for every encoder, on states of a snake of `length`."""
+    env = SnakeEnv.from_config(config)
+    states = states_on_cycle(env, snake_on_cycle(env, length), calls + 1)
+    results: Dict[str, float] = {}
+
+    for encoder_name in ENCODERS:
+        agent = QLearningAgent(epsilon=0.0, epsilon_min=0.0, encoder=get_encoder(encoder_name, config.width, config.height, config.space_size))
+        for state in states:
+            agent.choose_action(state)  # Insert every state so the timings measure lookups, not first visits
+
+        results[f"get_state_key/{encoder_name}"] = time_per_call(lambda i: agent.get_state_key(states[i % calls]), calls, repeat)
+        results[f"choose_action/{encoder_name}"] = time_per_call(lambda i: agent.choose_action(states[i % calls]), calls, repeat)
+        results[f"learn/{encoder_name}"] = time_per_call(lambda i: agent.learn(states[i % calls], i % 4, 0, states[i % calls + 1], False), calls, repeat)
+    return results
+
+
+def benchmark_game(config: GameConfig, length: int, calls: int, repeat: int) -> Dict[str, float]:
+    """The Tk game's `Snake.turn` with its tail and collision checks and its food placement, drawn headless."""
+    from main import Direction, Food, Snake
+
+    env = SnakeEnv.from_config(config)
+    actions = snake_on_cycle(env, length)
+    snake = Snake(config)
+    snake.coordinates, snake.occupancy = env.coordinates, env.occupancy
+    direction = Direction(DIRECTIONS[env.direction])
+
+    def turn(i: int) -> None:
+        direction.change_direction(new_direction=actions[i % len(actions)])
+        snake.turn(direction)
+        snake.remove_tail()
+        if snake.is_border_collision() or snake.is_self_collision():
+            raise RuntimeError(f"The snake of length {length} died during the benchmark.")
+
+    return {
+        "snake_turn": time_per_call(turn, calls, repeat),
+        "create_food": time_per_call(lambda i: Food(free_cells=snake.occupancy), calls, repeat),
+    }
+
+
+def benchmark_env(config: GameConfig, length: int, calls: int, repeat: int) -> Dict[str, float]:
+    """`SnakeEnv.move` and the full `SnakeEnv.step` (move plus the next `State`)."""
+    env = SnakeEnv.from_config(config)
+    actions = snake_on_cycle(env, length)
+    return {
+        "env_move": time_per_call(lambda i: env.move(actions[i % len(actions)]), calls, repeat),
+        "env_step": time_per_call(lambda i: env.step(actions[(calls * repeat + i) % len(actions)]), calls, repeat),  # Carries on where env_move stopped
+    }
+
+
+def benchmark_batch_env(config: GameConfig, num_envs: int, calls: int, repeat: int) -> Dict[str, float]:
+    """Microseconds per game-step of `BatchSnakeEnv` playing random actions."""
+    env = BatchSnakeEnv.from_config(num_envs, config, seed=0)
+    env.reset()
+    actions = np.random.default_rng(0).integers(0, 4, size=(calls, num_envs))
+    steps = max(1, calls // num_envs)
+    return {f"batch_env_step/{num_envs}": time_per_call(lambda i: env.step(actions[i % steps]), steps, repeat) / num_envs}
+
+
+def benchmark_weights(states: int, repeat: int) -> Dict[str, float]:
+    """
+    Microseconds to save and load a full-encoder Q-table of `states` states, and
+    to memory-map it and look up one state, as the first move of a mapped agent does.
+    """
+    agent = QLearningAgent()
+    q_table_root = agent.q_table['__root__']
+    for i in range(states):
+        q_table_root[(i % 101, i // 101, 3, ((0, -50), (0, -100)), (False, False))] = np.full(4, i, dtype=np.float32)
+    middle = states // 2
+    key = (middle % 101, middle // 101, 3, ((0, -50), (0, -100)), (False, False))
+
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, "q_table.qtab")
+
+        def open_and_look_up() -> None:
+            mapped = QLearningAgent()
+            mapped.load_weights(file_path, mmap=True)
+            mapped.q_row(key)
+
+        return {
+            f"save_q_table/{states}": time_per_call(lambda i: agent.save_q_table(file_path), 1, repeat),
+            f"load_q_table/{states}": time_per_call(lambda i: QLearningAgent().load_weights(file_path), 1, repeat),
+            f"load_q_table_mmap_first_lookup/{states}": time_per_call(lambda i: open_and_look_up(), 1, repeat),
+        }
+
+
+def board_lengths(config: GameConfig) -> List[int]:
+    return sorted(set([3, config.cell_count // 4, config.cell_count // 2]))
+
+
+def run_suite(board_sizes: List[int], calls: int = 2000, repeat: int = 3, space_size: int = 10) -> Dict[str, float]:
+    """
+    Time every hot path on square boards of `board_sizes` cells a side and a range of snake lengths.
+
+    :return: Microseconds per operation, keyed by `operation[board,length]`.
+    """
+    results: Dict[str, float] = {}
+    for cells in board_sizes:
+        config = GameConfig.for_board(cells, cells, space_size)
+        for length in board_lengths(config):
+            label = f"[{cells}x{cells},len={length}]"
+            for benchmark in (benchmark_agent, benchmark_game, benchmark_env):
+                for name, micros in benchmark(config, length, calls, repeat).items():
+                    results[name + label] = micros
+        for name, micros in benchmark_batch_env(config, 256, calls * 64, repeat).items():
+            results[f"{name}[{cells}x{cells}]"] = micros
+        for length, micros in benchmark_move_by_length(config, calls, repeat).items():
+            results[f"move_by_length[{cells}x{cells},len={length}]"] = micros
+
+    for states in (1000, 100000):
+        results.update(benchmark_weights(states, repeat))
+    return results
+
+
+def write_results(file_path: str, results: Dict[str, float]) -> None:
+    report = {
+        'meta': {
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'unit': 'microseconds per operation',
+        },
+        'results': results,
+    }
+    directory = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(file_path, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+
+def read_results(file_path: str) -> Dict[str, float]:
+    with open(file_path, 'r') as f:
+        results: Dict[str, float] = json.load(f)['results']
+    return results
+
+
+def find_regressions(results: Dict[str, float], baseline: Dict[str, float], tolerance: float = 0.25) -> List[str]:
+    """Benchmarks more than `tolerance` (a fraction) slower than the baseline. Benchmarks missing from either side are skipped."""
+    regressions: List[str] = []
+    for name in sorted(results.keys() & baseline.keys()):
+        ratio = results[name] / max(baseline[name], 1e-9)
+        if ratio > 1 + tolerance:
+            regressions.append(f"{name}: {baseline[name]:.2f} -> {results[name]:.2f} us ({ratio:.2f}x)")
+    return regressions
+
+
+def find_length_growth(results: Dict[str, float], tolerance: float = 0.5) -> List[str]:
+    """
+    Boards where `SnakeEnv.move` with the longest snake is more than `tolerance` slower than with a length-3 snake.
+
+    Moves and collision checks are O(1) in the snake's length, so their time should stay flat as it fills the board.
+    """
+    by_board: Dict[str, Dict[int, float]] = {}
+    for name, micros in results.items():
+        if name.startswith("move_by_length["):
+            board, length = name[len("move_by_length["):-1].split(",len=")
+            by_board.setdefault(board, {})[int(length)] = micros
+
+    growth: List[str] = []
+    for board, timings in sorted(by_board.items()):
+        shortest, longest = timings[min(timings)], timings[max(timings)]
+        if longest > shortest * (1 + tolerance):
+            growth.append(f"{board}: {shortest:.2f} us at length {min(timings)} -> {longest:.2f} us at length {max(timings)}")
+    return growth
+
+
+def run_render_benchmarks(lengths: List[int]) -> None:
+    from tkinter import TclError
+    print("Snake length vs. canvas frame time (one move per frame)")
+    try:
+        for length, micros in benchmark_render_by_length(lengths).items():
+            print(f"  length {length:>4}: {micros:8.2f} us/frame")
+
+        print("Board size vs. frame time per renderer (first frame / following frames)")
+        for cells, timings in benchmark_renderers_by_board([10, 50, 100, 200]).items():
+            columns = ", ".join(f"{name} {first:10.0f} / {micros:8.1f} us" for name, (first, micros) in timings.items())
+            print(f"  {cells:>3}x{cells:<3}: {columns}")
+    except TclError as e:
+        print(f"  skipped, no display: {e}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time the training and simulation hot paths and compare them with a baseline.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 20, 50], metavar='CELLS', help="Side lengths of the square boards, in cells.")
+    parser.add_argument('--calls', type=int, default=2000, help="Calls per timing run.")
+    parser.add_argument('--repeat', type=int, default=3, help="Timing runs per benchmark; the fastest is kept.")
+    parser.add_argument('--output', help="Write the results to this JSON file.")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="JSON results to compare against.")
+    parser.add_argument('--save-baseline', action='store_true', help="Store the results as the new baseline instead of comparing.")
+    parser.add_argument('--require-baseline', action='store_true', help="Fail when there is no baseline to compare against, instead of only printing the timings.")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed slowdown against the baseline, as a fraction.")
+    parser.add_argument('--length-tolerance', type=float, default=0.5, help="Allowed slowdown of a move with a full-board snake against a length-3 one, as a fraction.")
+    parser.add_argument('--render', action='store_true', help="Also time the Tk renderers (needs a display).")
+    args = parser.parse_args()
+
+    results = run_suite(args.sizes, args.calls, args.repeat)
+    for name, micros in results.items():
+        print(f"  {name:<55} {micros:12.2f} us")
+    if args.output:
+        write_results(args.output, results)
+
+    if args.render:
+        run_render_benchmarks(board_lengths(GameConfig()))
+
+    growth = find_length_growth(results, args.length_tolerance)
+    if growth:
+        print(f"Move time grew by more than {args.length_tolerance:.0%} with the snake's length:")
+        for line in growth:
+            print(f"  {line}")
+        sys.exit(1)
+
+    if args.save_baseline:
+        write_results(args.baseline, results)
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}. Baselines are machine-specific and not committed: run with --save-baseline on the commit to compare against, then again without it.")
+        if args.require_baseline:
+            sys.exit(1)
+        return
+
+    regressions = find_regressions(results, read_results(args.baseline), args.tolerance)
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed by more than {args.tolerance:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"No regressions against {args.baseline}.")
+
+
+if __name__ == "__main__":
+    main()
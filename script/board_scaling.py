@@ -0,0 +1,19 @@
+import argparse
+from src.agent import ENCODERS
+from src.training import measure_board_scaling
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Chart headless training throughput and Q-table size against board size.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 20, 50, 100], metavar='CELLS', help="Side lengths of the square boards, in cells.")
+    parser.add_argument('--episodes', type=int, default=200, help="Episodes to train on each board.")
+    parser.add_argument('--encoder', choices=sorted(ENCODERS), default='full', help="State encoder the Q-table is keyed by.")
+    parser.add_argument('--space-size', type=int, default=10, help="Cell size in pixels.")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the food placement and exploration.")
+    args = parser.parse_args()
+
+    measure_board_scaling(args.sizes, args.episodes, args.encoder, args.space_size, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -44,6 +44,7 @@ def build() -> None:
         f'--add-data={icon_file_path};{get_relative_path(icon_file_path)}',
         f'--icon={icon_file_path}',
         f'--name={APP_NAME}',
+        '--collect-submodules=src',  # Renderers and the RL modules are imported lazily, out of PyInstaller's sight
         'main.py'
     ]
     
@@ -0,0 +1,20 @@
+import argparse
+from src.agent import ENCODERS, convert_pickle
+from src.utils.constants import legacy_q_table_file_path
+from src.utils.utils import get_q_table_file_path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Convert a pickled Q-table into the memory-mappable Q-table format.")
+    parser.add_argument('source', nargs='?', default=legacy_q_table_file_path, help="Pickled Q-table to convert.")
+    parser.add_argument('destination', nargs='?', help="Q-table file to write. Defaults to the encoder's weights file.")
+    parser.add_argument('--encoder', choices=sorted(ENCODERS), default='full', help="State encoder the Q-table was trained with.")
+    args = parser.parse_args()
+
+    destination = args.destination or get_q_table_file_path(args.encoder)
+    n_states = convert_pickle(args.source, destination, args.encoder)
+    print(f"Converted {n_states} states from {args.source} to {destination}")
+
+
+if __name__ == "__main__":
+    main()
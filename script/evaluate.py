@@ -0,0 +1,34 @@
+import os
+import json
+import argparse
+from src.agent import ENCODERS
+from src.training import evaluate
+from src.utils.config import GameConfig
+from src.utils.utils import get_q_table_file_path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Play a saved Q-table greedily on many seeded episodes and report how it does.")
+    parser.add_argument('--encoder', choices=sorted(ENCODERS), default='full', help="State encoder the Q-table is keyed by.")
+    parser.add_argument('--weights', help="Q-table file to evaluate; the encoder's saved Q-table by default.")
+    parser.add_argument('--episodes', type=int, default=1000, help="Number of episodes to play.")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Number of worker processes.")
+    parser.add_argument('--seed', type=int, default=0, help="Food seed of the first episode; the others use consecutive seeds.")
+    parser.add_argument('--step-limit', type=int, help="Steps allowed without eating before an episode is cut short; the number of cells by default.")
+    parser.add_argument('--output', help="Also write the summary to this JSON file.")
+    args = parser.parse_args()
+
+    config = GameConfig.from_env()
+    weights_file_path = args.weights or get_q_table_file_path(args.encoder)
+    if not os.path.exists(weights_file_path):
+        parser.error(f"No Q-table at {weights_file_path}, train one first.")
+
+    result = evaluate(weights_file_path, args.episodes, args.workers, args.seed, args.encoder, config, args.step_limit)
+    print(result.format())
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result.summary(), f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
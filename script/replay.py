@@ -0,0 +1,51 @@
+import argparse
+from src.env import EpisodeLog, EpisodeReplay
+from src.render import SPEED_MODES
+from src.utils.constants import episode_log_file_path
+
+
+def draw_board(replay: EpisodeReplay) -> str:
+    """The board at the replay's current step as text: H head, o body, * food."""
+    env, size = replay.env, replay.env.space_size
+    rows = [['.'] * (env.width // size) for _ in range(env.height // size)]
+    rows[env.food[1] // size][env.food[0] // size] = '*'
+    for index, (x, y) in enumerate(env.coordinates):
+        if env.occupancy.is_inside(x, y):
+            rows[y // size][x // size] = 'H' if index == 0 else 'o'
+    return "\n".join("".join(row) for row in rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="List, inspect and replay episodes recorded during training.")
+    parser.add_argument('--log', default=episode_log_file_path, help="Episode log file.")
+    parser.add_argument('--list', action='store_true', help="List the recorded episodes.")
+    parser.add_argument('--episode', type=int, help="Episode number to replay; the last one recorded by default.")
+    parser.add_argument('--step', type=int, default=0, help="Step to seek to before showing the board or starting playback.")
+    parser.add_argument('--tk', action='store_true', help="Play the episode in a Tk window instead of printing the board.")
+    parser.add_argument('--speed', choices=[mode for mode in SPEED_MODES if mode != 'off'], default='1x', help="Playback speed with --tk.")
+    parser.add_argument('--renderer', default='canvas', help="Renderer to draw with in --tk mode.")
+    args = parser.parse_args()
+
+    log = EpisodeLog(args.log)
+    if args.list:
+        for index in range(len(log)):
+            record = log[index]
+            print(f"Episode {record.episode:>8}: {record.steps:>6} steps, score {record.score}, seed {record.seed}")
+        return
+
+    if args.tk:
+        from main import replay_episode
+        replay_episode(args.log, args.episode, args.step, args.speed, args.renderer)
+        return
+
+    if not len(log):
+        parser.error(f"No episodes recorded in {args.log}.")
+    record = log.find(args.episode) if args.episode is not None else log[-1]
+    replay = EpisodeReplay(record)
+    replay.seek(args.step)
+    print(f"Episode {record.episode}, step {replay.step_index}/{record.steps}, score {replay.env.score}, heading {replay.env.directions[replay.env.direction]}")
+    print(draw_board(replay))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import os
+import argparse
+from typing import Dict, List, Tuple, Union
+from src.agent import ENCODERS
+from src.training import DEFAULT_SPACE, PARAMETERS, EarlyStopping, grid_search, random_search, sweep
+from src.utils.config import GameConfig
+from src.utils.utils import get_sweep_dir
+
+
+def parse_parameter(text: str) -> Tuple[str, Union[List[float], Tuple[float, float]]]:
+    """`alpha=0.05,0.1,0.2` for a list of values, `alpha=0.01:0.5` for a range."""
+    name, _, values = text.partition('=')
+    if name not in PARAMETERS or not values:
+        raise argparse.ArgumentTypeError(f"expected NAME=V1,V2,... or NAME=LOW:HIGH with NAME one of {', '.join(PARAMETERS)}, got '{text}'")
+    try:
+        if ':' in values:
+            low, high = values.split(':')
+            return name, (float(low), float(high))
+        return name, [float(value) for value in values.split(',')]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid values in '{text}'")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Train the Q-Learning agent headless with many hyperparameter configurations and keep the best Q-table.")
+    parser.add_argument('--param', type=parse_parameter, action='append', default=[], metavar='NAME=VALUES',
+                        help="Values to try for a hyperparameter, as V1,V2,... or, with --random, a LOW:HIGH range. Repeat for each one swept.")
+    parser.add_argument('--random', type=int, metavar='RUNS', help="Draw this many random configurations instead of trying every combination.")
+    parser.add_argument('--episodes', type=int, default=2000, help="Episode budget of each run.")
+    parser.add_argument('--max-steps', type=int, help="Step budget of each run.")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Number of worker processes.")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the first run; the others use consecutive seeds.")
+    parser.add_argument('--encoder', choices=sorted(ENCODERS), default='full', help="State encoder the Q-tables are keyed by.")
+    parser.add_argument('--window', type=int, default=100, help="Episodes per point of the learning curve early stopping looks at.")
+    parser.add_argument('--grace', type=int, default=500, help="Episodes every run plays before it can be stopped early.")
+    parser.add_argument('--min-score', type=float, default=0.5, help="Stop a run whose mean score over a window drops below this.")
+    parser.add_argument('--max-epsilon', type=float, default=0.1, help="Only stop runs early once epsilon has decayed to this.")
+    parser.add_argument('--patience', type=int, default=10, help="Stop a run whose best window has not improved for this many windows; 0 never does.")
+    parser.add_argument('--name', help="Name of the sweep's directory under weights/sweeps; its start time by default.")
+    args = parser.parse_args()
+
+    space: Dict[str, Union[List[float], Tuple[float, float]]] = dict(args.param) if args.param else dict(DEFAULT_SPACE)
+    try:
+        configurations = random_search(space, args.random, args.seed) if args.random else grid_search(space)
+    except ValueError as e:
+        parser.error(str(e))
+
+    stopping = EarlyStopping(args.window, args.grace, args.min_score, args.max_epsilon, args.patience or None)
+    output_dir = get_sweep_dir(args.name)
+    print(f"Sweeping {len(configurations)} configuration(s) into {output_dir}")
+    result = sweep(configurations, output_dir, args.episodes, args.max_steps, args.workers, args.seed, args.encoder, GameConfig.from_env(), stopping)
+    print(result.format())
+
+
+if __name__ == "__main__":
+    main()
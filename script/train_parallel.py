@@ -0,0 +1,52 @@
+import os
+import argparse
+from src.agent import ENCODERS, EVICTION_POLICIES, QLearningAgent, get_encoder
+from src.training import Checkpointer, ParallelTrainer, measure_scaling
+from src.utils.config import GameConfig
+from src.utils.constants import episodes
+from src.utils.utils import get_q_table_file_path, get_trainer_state_file_path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Train the Q-Learning agent headless on several processes.")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Number of worker processes.")
+    parser.add_argument('--episodes', type=int, default=episodes, help="Total number of episodes to train.")
+    parser.add_argument('--sync-every', type=int, default=50, help="Episodes each worker plays between Q-table merges.")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the first worker; the others use consecutive seeds.")
+    parser.add_argument('--encoder', choices=sorted(ENCODERS), default='full', help="State encoder the Q-table is keyed by.")
+    parser.add_argument('--max-states', type=int, help="Most states the Q-table holds, evicting beyond that (default: unbounded).")
+    parser.add_argument('--eviction', choices=EVICTION_POLICIES, default='lru', help="Which states go when the Q-table is full.")
+    parser.add_argument('--scaling', type=int, nargs='+', metavar='WORKERS', help="Only measure episodes/s for these worker counts.")
+    parser.add_argument('--no-resume', action='store_true', help="Start over instead of resuming from the last saved Q-table and trainer state.")
+    args = parser.parse_args()
+
+    config = GameConfig.from_env()
+    if args.scaling:
+        measure_scaling(args.scaling, sync_every=args.sync_every, encoder_name=args.encoder, config=config)
+        return
+
+    encoder = get_encoder(args.encoder, config.width, config.height, config.space_size)
+    agent = QLearningAgent(encoder=encoder, config=config, max_states=args.max_states, eviction=args.eviction)
+    checkpointer = Checkpointer(get_q_table_file_path(args.encoder), get_trainer_state_file_path(args.encoder))
+    trainer = ParallelTrainer(agent, workers=args.workers, sync_every=args.sync_every, seed=args.seed, config=config)
+
+    if not args.no_resume:
+        # Like `train_headless`: the Q-table, epsilon, episode count, total reward and RNG state.
+        trainer_state = checkpointer.load(agent)
+        if trainer_state is not None:
+            trainer.episodes_done = trainer_state['reset_count']
+            trainer.total_reward = trainer_state['total_reward']
+            print(f"Resuming training from episode {trainer.episodes_done}, epsilon {agent.epsilon:.3f}")
+
+    try:
+        if args.episodes > trainer.episodes_done:
+            trainer.train(args.episodes - trainer.episodes_done)
+    except KeyboardInterrupt:
+        print("Training interrupted, saving Q-table...")
+
+    checkpointer.save(agent, trainer.episodes_done, trainer.total_reward)
+    print(f"Q-table saved after {trainer.episodes_done} episodes.")
+
+
+if __name__ == "__main__":
+    main()
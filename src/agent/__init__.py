@@ -0,0 +1,7 @@
+from .encoders import StateEncoder, FullStateEncoder, CompactStateEncoder, SymmetricEncoder, SymmetricFullStateEncoder, SymmetricCompactStateEncoder, ENCODERS, get_encoder
+from .q_table import EVICTION_POLICIES, QTableStore, dict_memory_bytes, memory_per_state
+from .weights import MappedQTable, convert_pickle, is_q_table_file, load_q_table_file, save_q_table_file
+from .q_learning import QLearningAgent
+from .replay import ReplayBuffer, BatchedLearner
+from .dqn import DQNAgent, FeatureEncoder, MLP, is_network_file
+from .agents import AGENTS, Agent, create_agent
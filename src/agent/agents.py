@@ -0,0 +1,28 @@
+from typing import Dict, Optional, Type, Union
+from src.agent.dqn import DQNAgent
+from src.agent.encoders import get_encoder
+from src.agent.q_learning import QLearningAgent
+from src.utils.config import GameConfig
+
+
+Agent = Union[QLearningAgent, DQNAgent]
+
+AGENTS: Dict[str, Type[Agent]] = {
+    'q_learning': QLearningAgent,
+    DQNAgent.name: DQNAgent,
+}
+
+
+def create_agent(name: str = 'q_learning', encoder_name: str = 'full', config: Optional[GameConfig] = None, max_states: Optional[int] = None, eviction: str = 'lru') -> Agent:
+    """
+    A new agent for `config`'s board.
+
+    :param encoder_name: State encoder of the tabular agent; `DQNAgent` always uses its `FeatureEncoder`.
+    :param max_states: Cap on the tabular agent's Q-table, evicting by `eviction`; see `QLearningAgent`.
+    """
+    if name not in AGENTS:
+        raise ValueError(f"Unknown agent '{name}', expected one of {sorted(AGENTS)}.")
+    config = config or GameConfig()
+    if name == DQNAgent.name:
+        return DQNAgent(config=config)
+    return QLearningAgent(encoder=get_encoder(encoder_name, config.width, config.height, config.space_size), max_states=max_states, eviction=eviction)
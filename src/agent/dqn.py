@@ -0,0 +1,307 @@
+import os
+import zipfile
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from src.agent.encoders import body_blocks
+from src.agent.replay import ReplayBuffer
+from src.utils.config import GameConfig
+from src.utils.types import State
+from src.utils.constants import GAME_WIDTH, GAME_HEIGHT, SPACE_SIZE
+
+
+# (dx, dy) of a move, indexed like `DIRECTIONS` (src/env/directions.py): Up, Down, Left, Right.
+_MOVES = ((0, -1), (0, 1), (-1, 0), (1, 0))
+
+
+class FeatureEncoder:
+    """
+    Turns a `State` into a fixed-size float32 feature vector for `DQNAgent`.
+
+    The features are whether each cell within `radius` of the head is a wall or
+    body segment, the heading (one-hot), the sign and board-relative size of the
+    food offset, and the snake's length as a share of the board. Their number does
+    not depend on the board size.
+    """
+
+    name: str = 'features'
+
+    def __init__(self, width: int = GAME_WIDTH, height: int = GAME_HEIGHT, space_size: int = SPACE_SIZE, radius: int = 2) -> None:
+        self.width: int = width
+        self.height: int = height
+        self.space_size: int = space_size
+        self.radius: int = radius
+        self.window: List[Tuple[int, int]] = [
+            (dx * space_size, dy * space_size)
+            for dy in range(-radius, radius + 1) for dx in range(-radius, radius + 1) if dx or dy
+        ]
+        self.n_features: int = len(self.window) + 4 + 4 + 1
+
+    @classmethod
+    def from_config(cls, config: GameConfig, radius: int = 2) -> 'FeatureEncoder':
+        return cls(config.width, config.height, config.space_size, radius)
+
+    def encode(self, state: State) -> np.ndarray:
+        head_x, head_y = state['head']
+        food_x, food_y = state['food']
+        body = state['body']
+        size = self.space_size
+        features = np.zeros(self.n_features, dtype=np.float32)
+
+        blocks = body_blocks(state)
+        for i, (dx, dy) in enumerate(self.window):
+            x, y = head_x + dx, head_y + dy
+            if x < 0 or x >= self.width or y < 0 or y >= self.height or blocks(x, y):
+                features[i] = 1.0
+
+        offset = len(self.window)
+        heading = 1  # Down, the opening direction
+        if body:
+            neck_x, neck_y = body[0]
+            step = ((head_x > neck_x) - (head_x < neck_x), (head_y > neck_y) - (head_y < neck_y))
+            heading = _MOVES.index(step) if step in _MOVES else heading
+        features[offset + heading] = 1.0
+
+        food_dx, food_dy = food_x - head_x, food_y - head_y
+        features[offset + 4:offset + 8] = ((food_dx > 0) - (food_dx < 0), (food_dy > 0) - (food_dy < 0), food_dx / self.width, food_dy / self.height)
+        features[offset + 8] = (len(body) + 1) / ((self.width // size) * (self.height // size))
+        return features
+
+
+class MLP:
+    """Fully connected ReLU network with a linear output layer, trained with Adam on batches."""
+
+    def __init__(self, sizes: Sequence[int], rng: np.random.Generator, learning_rate: float = 1e-3) -> None:
+        self.sizes: List[int] = list(sizes)
+        self.learning_rate: float = learning_rate
+        # He initialization, suited to ReLU layers.
+        self.weights: List[np.ndarray] = [
+            (rng.standard_normal((fan_in, fan_out)) * np.sqrt(2.0 / fan_in)).astype(np.float32)
+            for fan_in, fan_out in zip(self.sizes[:-1], self.sizes[1:])
+        ]
+        self.biases: List[np.ndarray] = [np.zeros(fan_out, dtype=np.float32) for fan_out in self.sizes[1:]]
+        self.moments: List[np.ndarray] = [np.zeros_like(p) for p in self.parameters()]
+        self.velocities: List[np.ndarray] = [np.zeros_like(p) for p in self.parameters()]
+        self.steps: int = 0
+
+    def parameters(self) -> List[np.ndarray]:
+        return [p for pair in zip(self.weights, self.biases) for p in pair]
+
+    def parameter_count(self) -> int:
+        return sum(p.size for p in self.parameters())
+
+    def forward(self, x: np.ndarray) -> np.ndarray:
+        for weights, biases in zip(self.weights[:-1], self.biases[:-1]):
+            x = np.maximum(x @ weights + biases, 0.0)
+        return x @ self.weights[-1] + self.biases[-1]
+
+    def forward_with_activations(self, x: np.ndarray) -> Tuple[np.ndarray, List[np.ndarray]]:
+        """The outputs for the batch `x`, plus each layer's input for `backward`."""
+        activations = [x]
+        for weights, biases in zip(self.weights[:-1], self.biases[:-1]):
+            x = np.maximum(x @ weights + biases, 0.0)
+            activations.append(x)
+        return x @ self.weights[-1] + self.biases[-1], activations
+
+    def backward(self, activations: List[np.ndarray], output_gradient: np.ndarray) -> List[np.ndarray]:
+        """Gradients of every parameter, in `parameters()` order, given the loss gradient of the outputs."""
+        gradients: List[np.ndarray] = []
+        gradient = output_gradient
+        for layer in range(len(self.weights) - 1, -1, -1):
+            inputs = activations[layer]
+            gradients.append(gradient.sum(axis=0))
+            gradients.append(inputs.T @ gradient)
+            if layer:
+                gradient = (gradient @ self.weights[layer].T) * (inputs > 0)
+        return gradients[::-1]
+
+    def apply(self, gradients: List[np.ndarray], beta1: float = 0.9, beta2: float = 0.999, eps: float = 1e-8) -> None:
+        """One Adam step, in place."""
+        self.steps += 1
+        step_size = self.learning_rate * np.sqrt(1 - beta2 ** self.steps) / (1 - beta1 ** self.steps)
+        for parameter, gradient, moment, velocity in zip(self.parameters(), gradients, self.moments, self.velocities):
+            moment *= beta1
+            moment += (1 - beta1) * gradient
+            velocity *= beta2
+            velocity += (1 - beta2) * gradient * gradient
+            parameter -= step_size * moment / (np.sqrt(velocity) + eps)
+
+    def copy_from(self, other: 'MLP') -> None:
+        for parameter, source in zip(self.parameters(), other.parameters()):
+            parameter[...] = source
+
+
+def is_network_file(file_path: str) -> bool:
+    """Whether `file_path` holds network weights saved by `DQNAgent.save_q_table`."""
+    return zipfile.is_zipfile(file_path)
+
+
+def save_network_file(file_path: str, arrays: Dict[str, Any]) -> None:
+    """Write `arrays` as `.npz` to a temporary file and rename it over `file_path`."""
+    directory = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{file_path}.tmp"
+    with open(temp_path, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(temp_path, file_path)
+
+
+class DQNAgent:
+    """
+    Deep Q-network agent with the same `choose_action`/`learn`/`save_q_table`/`load_weights` surface as `QLearningAgent`.
+
+    Q-values come from a small NumPy MLP over `FeatureEncoder` features, so memory
+    stays constant however many states are visited and what is learnt carries over
+    to states never seen. `learn` stores the transition in a replay buffer and
+    every `train_every` steps fits the network to a minibatch against a target
+    network that is refreshed every `target_every` updates.
+    """
+
+    name: str = 'dqn'
+
+    def __init__(
+        self,
+        alpha: float = 1e-3,
+        gamma: float = 0.95,
+        epsilon: float = 1.0,
+        epsilon_decay: float = 0.995,
+        epsilon_min: float = 0.01,
+        hidden: Sequence[int] = (64, 64),
+        batch_size: int = 64,
+        train_every: int = 4,
+        target_every: int = 250,
+        buffer_capacity: int = 50_000,
+        min_buffer: int = 1000,
+        encoder: Optional[FeatureEncoder] = None,
+        config: Optional[GameConfig] = None,
+        seed: Optional[int] = None
+    ) -> None:
+        self.alpha = alpha  # Learning rate of Adam
+        self.gamma = gamma  # Discount factor
+        self.epsilon = epsilon  # Exploration rate
+        self.epsilon_decay = epsilon_decay
+        self.epsilon_min = epsilon_min
+        if encoder is None:
+            encoder = FeatureEncoder.from_config(config) if config is not None else FeatureEncoder()
+        self.encoder: FeatureEncoder = encoder
+        self.batch_size: int = batch_size
+        self.train_every: int = train_every
+        self.target_every: int = target_every
+        self.min_buffer: int = min_buffer
+
+        self.rng: np.random.Generator = np.random.default_rng(seed)
+        sizes = [self.encoder.n_features, *hidden, 4]
+        self.network: MLP = MLP(sizes, self.rng, alpha)
+        self.target_network: MLP = MLP(sizes, self.rng, alpha)
+        self.target_network.copy_from(self.network)
+        self.buffer: ReplayBuffer = ReplayBuffer(buffer_capacity, (self.encoder.n_features,), np.float32)
+        self.observed: int = 0
+        self.updates: int = 0
+        self.losses: List[float] = []  # Mean Huber loss of recent updates
+
+        # Features of the last state encoded; `learn` and `choose_action` usually see the same state in turn.
+        self.last_state: Optional[State] = None
+        self.last_features: np.ndarray = np.zeros(self.encoder.n_features, dtype=np.float32)
+
+    @classmethod
+    def from_config(cls, config: GameConfig, **kwargs: float) -> 'DQNAgent':
+        return cls(config=config, **kwargs)  # type: ignore
+
+    def features(self, state: State) -> np.ndarray:
+        if state is not self.last_state:
+            self.last_state, self.last_features = state, self.encoder.encode(state)
+        return self.last_features
+
+    def q_row(self, state: State) -> np.ndarray:
+        """The network's Q-values for `state`."""
+        return self.network.forward(self.features(state))
+
+    def choose_action(self, state: State) -> int:
+        if np.random.rand() < self.epsilon:
+            return np.random.choice(4)  # Explore: choose random action
+        return int(self.q_row(state).argmax())
+
+    def learn(self, state: State, action: int, reward: int, next_state: State, done: bool) -> None:
+        self.buffer.add(self.features(state), action, reward, self.features(next_state), done)
+        self.observed += 1
+        if self.observed % self.train_every == 0 and len(self.buffer) >= min(self.min_buffer, self.buffer.capacity):
+            self.train_step()
+        if done:
+            self.decay_epsilon()
+
+    def decay_epsilon(self) -> None:
+        self.epsilon = max(self.epsilon_min, self.epsilon * self.epsilon_decay)
+
+    def train_step(self) -> None:
+        """Fit the network to one minibatch of replayed transitions with a Huber loss."""
+        states, actions, rewards, next_states, dones = self.buffer.sample(self.batch_size, self.rng)
+        targets = rewards + self.gamma * self.target_network.forward(next_states).max(axis=1) * ~dones
+
+        q_values, activations = self.network.forward_with_activations(states)
+        batch = np.arange(len(actions))
+        errors = q_values[batch, actions] - targets
+        output_gradient = np.zeros_like(q_values)
+        output_gradient[batch, actions] = np.clip(errors, -1.0, 1.0) / len(actions)
+        self.network.apply(self.network.backward(activations, output_gradient))
+
+        self.updates += 1
+        if self.updates % self.target_every == 0:
+            self.target_network.copy_from(self.network)
+        if self.updates % 100 == 0:
+            abs_errors = np.abs(errors)
+            self.losses = self.losses[-99:] + [float(np.where(abs_errors < 1, 0.5 * errors ** 2, abs_errors - 0.5).mean())]
+
+    def state_count(self) -> int:
+        """Always 0: a network keeps no per-state values."""
+        return 0
+
+    def memory_bytes(self) -> int:
+        """Bytes held by both networks, their Adam state and the replay buffer, which do not grow with the states visited."""
+        networks = sum(p.nbytes for network in (self.network, self.target_network) for p in network.parameters())
+        adam = sum(m.nbytes + v.nbytes for m, v in zip(self.network.moments, self.network.velocities))
+        buffer = self.buffer.states.nbytes + self.buffer.next_states.nbytes + self.buffer.actions.nbytes + self.buffer.rewards.nbytes + self.buffer.dones.nbytes
+        return networks + adam + buffer
+
+    def weights_snapshot(self) -> Dict[str, np.ndarray]:
+        """Copies of the network's parameters, keyed as in the weights file."""
+        arrays = {f"param_{i}": p.copy() for i, p in enumerate(self.network.parameters())}
+        arrays['sizes'] = np.array(self.network.sizes)
+        arrays['radius'] = np.array(self.encoder.radius)
+        return arrays
+
+    def training_state(self) -> Dict[str, Any]:
+        """Copies of what training depends on besides the weights: the target network, Adam's state, the replay buffer, the RNG and the counters."""
+        return {
+            'target': [p.copy() for p in self.target_network.parameters()],
+            'moments': [m.copy() for m in self.network.moments],
+            'velocities': [v.copy() for v in self.network.velocities],
+            'adam_steps': self.network.steps,
+            'buffer': self.buffer.snapshot(),
+            'rng': self.rng.bit_generator.state,
+            'observed': self.observed,
+            'updates': self.updates,
+            'losses': list(self.losses),
+        }
+
+    def restore_training_state(self, state: Dict[str, Any]) -> None:
+        """Put back a `training_state`, after `load_weights`."""
+        for parameter, source in zip(self.target_network.parameters(), state['target']):
+            parameter[...] = source
+        for moment, velocity, saved_moment, saved_velocity in zip(self.network.moments, self.network.velocities, state['moments'], state['velocities']):
+            moment[...], velocity[...] = saved_moment, saved_velocity
+        self.network.steps = state['adam_steps']
+        self.buffer.restore(state['buffer'])
+        self.rng.bit_generator.state = state['rng']
+        self.observed, self.updates, self.losses = state['observed'], state['updates'], list(state['losses'])
+        self.last_state = None
+
+    def save_q_table(self, file_path: str) -> None:
+        save_network_file(file_path, self.weights_snapshot())
+
+    def load_weights(self, file_path: str) -> None:
+        with np.load(file_path) as arrays:
+            if list(arrays['sizes']) != self.network.sizes or int(arrays['radius']) != self.encoder.radius:
+                raise ValueError(f"{file_path} holds a network of sizes {list(arrays['sizes'])}, not {self.network.sizes}.")
+            for i, parameter in enumerate(self.network.parameters()):
+                parameter[...] = arrays[f"param_{i}"]
+        self.target_network.copy_from(self.network)
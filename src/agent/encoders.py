@@ -0,0 +1,272 @@
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence, Tuple, Type
+from src.utils.config import GameConfig
+from src.utils.types import EncodedState, State, StateKey
+from src.utils.constants import GAME_WIDTH, GAME_HEIGHT, SPACE_SIZE
+
+if TYPE_CHECKING:
+    from src.env.occupancy import OccupancyGrid
+
+
+class StateEncoder(ABC):
+    """
+    Turns a `State` into the key the agent stores Q-values under.
+
+    Encoders with a finite `n_states` produce integers in `range(n_states)` and let
+    the agent keep its Q-values in one dense array; `None` means keys are unbounded.
+    """
+
+    name: str = ''
+    n_states: Optional[int] = None
+
+    def __init__(self, width: int = GAME_WIDTH, height: int = GAME_HEIGHT, space_size: int = SPACE_SIZE) -> None:
+        self.width: int = width
+        self.height: int = height
+        self.space_size: int = space_size
+
+    @classmethod
+    def from_config(cls, config: GameConfig) -> 'StateEncoder':
+        return cls(config.width, config.height, config.space_size)
+
+    @abstractmethod
+    def encode(self, state: State) -> EncodedState:
+        """The key `state` is stored under."""
+
+
+class FullStateEncoder(StateEncoder):
+    """Relative food position, length, every body segment relative to the head and the border flags."""
+
+    name = 'full'
+
+    def encode(self, state: State) -> StateKey:
+        head_x, head_y = state['head']
+        food_x, food_y = state['food']
+        body = tuple(tuple(part) for part in state['body'])
+        near_border = state['near_border']
+
+        # Calculate relative position of the food to the snake's head
+        rel_food_x = food_x - head_x
+        rel_food_y = food_y - head_y
+
+        # Calculate relative positions of the snake's body parts to the snake's head
+        rel_body = tuple((part_x - head_x, part_y - head_y) for part_x, part_y in body)
+
+        return (rel_food_x, rel_food_y, len(state['body']), rel_body, near_border)
+
+
+def _sign(value: int) -> int:
+    return (value > 0) - (value < 0)
+
+
+def body_blocks(state: State) -> Callable[[int, int], bool]:
+    """
+    A test of whether a body segment other than the tail, which moves out of the
+    way on the next tick, is at a position on the board.
+
+    It reads the occupancy grid `state` came with while the grid still matches it,
+    so it costs nothing per segment; otherwise it builds a set of the body.
+    """
+    body = state['body']
+    occupancy: Optional['OccupancyGrid'] = state.get('occupancy')
+    if occupancy is None or occupancy.version != state.get('occupancy_version'):
+        blocked = set((x, y) for x, y in body[:-1])
+        return lambda x, y: (x, y) in blocked
+
+    counts, cell = occupancy.counts, occupancy.cell
+    tail = cell(*body[-1]) if body else -1
+
+    def blocks(x: int, y: int) -> bool:
+        # The head is counted too, but it is never one of the positions asked about.
+        position = cell(x, y)
+        return counts[position] > (position == tail)
+
+    return blocks
+
+
+# (sign dx, sign dy) of a move, indexed like `DIRECTIONS` (src/env/directions.py): Up, Down, Left, Right.
+_HEADINGS: Dict[Tuple[int, int], int] = {(0, -1): 0, (0, 1): 1, (-1, 0): 2, (1, 0): 3}
+_OPENING_HEADING = 1  # Down
+
+
+class CompactStateEncoder(StateEncoder):
+    """
+    Packs four danger bits (wall or body one cell Up/Down/Left/Right), the food
+    direction (sign of dx and dy) and the heading into one integer below 576.
+    The keys of the last two states encoded are cached by identity, as an agent
+    encodes each state once as `next_state`, while the game's occupancy grid
+    still matches it, and once more as `state` after the next move.
+    """
+
+    name = 'compact'
+    n_states = 16 * 9 * 4
+
+    def __init__(self, width: int = GAME_WIDTH, height: int = GAME_HEIGHT, space_size: int = SPACE_SIZE) -> None:
+        super().__init__(width, height, space_size)
+        self.cache: List[Tuple[Optional[State], int]] = [(None, 0), (None, 0)]
+
+    def encode(self, state: State) -> int:
+        for cached_state, key in self.cache:
+            if cached_state is state:
+                return key
+
+        head_x, head_y = state['head']
+        food_x, food_y = state['food']
+        body = state['body']
+        size = self.space_size
+
+        heading = _OPENING_HEADING
+        if body:
+            neck_x, neck_y = body[0]
+            heading = _HEADINGS.get((_sign(head_x - neck_x), _sign(head_y - neck_y)), _OPENING_HEADING)
+
+        blocks = body_blocks(state)
+        danger = 0
+        for bit, (dx, dy) in enumerate(((0, -size), (0, size), (-size, 0), (size, 0))):
+            x, y = head_x + dx, head_y + dy
+            if x < 0 or x >= self.width or y < 0 or y >= self.height or blocks(x, y):
+                danger |= 1 << bit
+
+        food_direction = (_sign(food_x - head_x) + 1) * 3 + _sign(food_y - head_y) + 1
+
+        key = (danger * 9 + food_direction) * 4 + heading
+        self.cache = [self.cache[1], (state, key)]
+        return key
+
+
+# (dx, dy) of a move in cells, indexed like `DIRECTIONS`.
+_DELTAS: Tuple[Tuple[int, int], ...] = ((0, -1), (0, 1), (-1, 0), (1, 0))
+
+# Board symmetries, numbered by bits: 4 swaps x and y (square boards only), then 1 mirrors x and 2 mirrors y.
+SWAP, FLIP_X, FLIP_Y = 4, 1, 2
+
+
+def _transform_vector(symmetry: int, dx: int, dy: int) -> Tuple[int, int]:
+    if symmetry & SWAP:
+        dx, dy = dy, dx
+    if symmetry & FLIP_X:
+        dx = -dx
+    if symmetry & FLIP_Y:
+        dy = -dy
+    return dx, dy
+
+
+# ACTION_TRANSFORMS[symmetry][action] is `action` as seen in the transformed board; ACTION_INVERSES maps back.
+ACTION_TRANSFORMS: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple(_DELTAS.index(_transform_vector(symmetry, dx, dy)) for dx, dy in _DELTAS) for symmetry in range(8)
+)
+ACTION_INVERSES: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple(actions.index(action) for action in range(4)) for actions in ACTION_TRANSFORMS
+)
+
+
+class SymmetricEncoder(StateEncoder):
+    """
+    Keys every state by its canonical orientation under the board's symmetries.
+
+    The board looks the same mirrored left-right or top-bottom, and, if it is
+    square, transposed, so a state and its mirror images share one key. The
+    canonical orientation is the one whose relative food position, then neck
+    position, then `base_class` key is smallest; only ties on the first two are
+    encoded more than once. Q-values are stored for actions in that
+    orientation: `to_canonical` and `from_canonical` map actions in and out.
+    The orientation of the last two states encoded is cached by identity, as
+    an agent encodes each state once as `next_state` and once as `state`.
+    """
+
+    base_class: Type[StateEncoder] = FullStateEncoder
+
+    def __init__(self, width: int = GAME_WIDTH, height: int = GAME_HEIGHT, space_size: int = SPACE_SIZE) -> None:
+        super().__init__(width, height, space_size)
+        self.base: StateEncoder = self.base_class(width, height, space_size)
+        self.n_states = self.base.n_states
+        self.max_x: int = width - space_size
+        self.max_y: int = height - space_size
+        self.symmetries: Sequence[int] = range(8) if width == height else range(4)
+        self.cache: List[Tuple[Optional[State], EncodedState, int]] = [(None, 0, 0), (None, 0, 0)]
+
+    def transform_state(self, state: State, symmetry: int) -> State:
+        """`state` with every position moved to where `symmetry` takes it."""
+        max_x, max_y = self.max_x, self.max_y
+        swap, flip_x, flip_y = symmetry & SWAP, symmetry & FLIP_X, symmetry & FLIP_Y
+
+        def transform(x: int, y: int) -> Tuple[int, int]:
+            if swap:
+                x, y = y, x
+            return (max_x - x if flip_x else x), (max_y - y if flip_y else y)
+
+        near_x, near_y = state['near_border']
+        return State(
+            head=transform(*state['head']),
+            food=transform(*state['food']),
+            body=[list(transform(x, y)) for x, y in state['body']],
+            near_border=(near_y, near_x) if swap else (near_x, near_y)
+        )
+
+    def canonicalize(self, state: State) -> Tuple[EncodedState, int]:
+        """The canonical key of `state` and the symmetry that takes `state` to it."""
+        for cached_state, key, symmetry in self.cache:
+            if cached_state is state:
+                return key, symmetry
+
+        head_x, head_y = state['head']
+        food_x, food_y = state['food']
+        body = state['body']
+        neck_x, neck_y = body[0] if body else (head_x, head_y)
+
+        # Rank the orientations by the cheap features first, and only encode the ones that tie on both.
+        best: Optional[Tuple[Tuple[int, int], Tuple[int, int]]] = None
+        tied: List[int] = []
+        for symmetry in self.symmetries:
+            rank = (_transform_vector(symmetry, food_x - head_x, food_y - head_y), _transform_vector(symmetry, neck_x - head_x, neck_y - head_y))
+            if best is None or rank < best:
+                best, tied = rank, [symmetry]
+            elif rank == best:
+                tied.append(symmetry)
+
+        if len(tied) == 1:
+            symmetry = tied[0]
+            key = self.base.encode(self.transform_state(state, symmetry) if symmetry else state)
+        else:
+            key, symmetry = min((self.base.encode(self.transform_state(state, symmetry)), symmetry) for symmetry in tied)
+
+        self.cache = [self.cache[1], (state, key, symmetry)]
+        return key, symmetry
+
+    def encode(self, state: State) -> EncodedState:
+        return self.canonicalize(state)[0]
+
+    def to_canonical(self, state: State, action: int) -> int:
+        """`action` taken in `state`, as the action of its canonical orientation."""
+        return ACTION_TRANSFORMS[self.canonicalize(state)[1]][action]
+
+    def from_canonical(self, state: State, action: int) -> int:
+        """An action of the canonical orientation of `state`, as the action to take in `state`."""
+        return ACTION_INVERSES[self.canonicalize(state)[1]][action]
+
+
+class SymmetricFullStateEncoder(SymmetricEncoder):
+    """`FullStateEncoder` keyed by canonical orientation."""
+
+    name = 'full_sym'
+    base_class = FullStateEncoder
+
+
+class SymmetricCompactStateEncoder(SymmetricEncoder):
+    """`CompactStateEncoder` keyed by canonical orientation."""
+
+    name = 'compact_sym'
+    base_class = CompactStateEncoder
+
+
+ENCODERS: Dict[str, Type[StateEncoder]] = {
+    FullStateEncoder.name: FullStateEncoder,
+    CompactStateEncoder.name: CompactStateEncoder,
+    SymmetricFullStateEncoder.name: SymmetricFullStateEncoder,
+    SymmetricCompactStateEncoder.name: SymmetricCompactStateEncoder,
+}
+
+
+def get_encoder(name: str, width: int = GAME_WIDTH, height: int = GAME_HEIGHT, space_size: int = SPACE_SIZE) -> StateEncoder:
+    if name not in ENCODERS:
+        raise ValueError(f"Unknown state encoder '{name}', expected one of {sorted(ENCODERS)}.")
+    return ENCODERS[name](width, height, space_size)
@@ -0,0 +1,246 @@
+from typing import Dict, Optional
+import numpy as np
+import pickle
+from src.agent.encoders import StateEncoder, FullStateEncoder, SymmetricEncoder
+from src.agent.q_table import QTableStore, memory_per_state
+from src.agent.weights import is_q_table_file, read_header, save_q_table_file, save_dense_file, load_q_table_file, load_dense_file
+from src.utils.config import GameConfig
+from src.utils.types import EncodedState, QTable, State
+
+
+class QLearningAgent:
+    """
+    Tabular Q-learning over the keys of `encoder`.
+
+    With `max_states`, a Q-table keyed by an unbounded encoder holds at most
+    that many states (plus a few between updates), evicting by `eviction`
+    ('lru' or 'least_visited') as `QTableStore` describes. Dense tables are
+    already fixed in size and ignore it.
+    """
+
+    def __init__(self, alpha: float = 0.1, gamma: float = 0.99, epsilon: float = 1.0, epsilon_decay: float = 0.995, epsilon_min: float = 0.01, encoder: Optional[StateEncoder] = None, config: Optional[GameConfig] = None, max_states: Optional[int] = None, eviction: str = 'lru') -> None:
+        self.alpha = alpha  # Learning rate
+        self.gamma = gamma  # Discount factor
+        self.epsilon = epsilon  # Exploration rate
+        self.epsilon_decay = epsilon_decay
+        self.epsilon_min = epsilon_min
+        if encoder is None:
+            # Without an explicit encoder, key states by the full encoder for `config`'s board.
+            encoder = FullStateEncoder.from_config(config) if config is not None else FullStateEncoder()
+        self.encoder: StateEncoder = encoder
+        self.symmetry: Optional[SymmetricEncoder] = encoder if isinstance(encoder, SymmetricEncoder) else None  # Q-values are stored for canonical actions
+        self.max_states: Optional[int] = max_states
+        self.eviction: str = eviction
+        self.q_table: QTable = QTable(__root__=QTableStore(max_states=max_states, eviction=eviction))  # Q-table, used by encoders with unbounded keys
+        self.q_values: Optional[np.ndarray] = None  # Dense Q-table, used by encoders with integer keys
+        if self.encoder.n_states is not None:
+            self.q_values = np.zeros((self.encoder.n_states, 4), dtype=np.float32)
+
+    def get_state_key(self, state: Optional[State]) -> EncodedState:
+        if state is None:
+            raise ValueError("State cannot be None.")
+
+        return self.encoder.encode(state)
+
+    def q_row(self, state_key: EncodedState) -> np.ndarray:
+        """The Q-values of `state_key`, initialized to zeros if the state is new."""
+        if self.q_values is not None:
+            return self.q_values[state_key]
+
+        q_table_root = self.q_table['__root__']
+        if state_key not in q_table_root:
+            q_table_root[state_key] = np.zeros(4)
+        return q_table_root[state_key]
+
+    def state_row(self, state: State) -> int:
+        """Row of `state` in `q_matrix()`, inserting a zeroed row if the state is new."""
+        return self.key_row(self.get_state_key(state))
+
+    def key_row(self, state_key: EncodedState) -> int:
+        """`state_row` by state key."""
+        if self.q_values is not None:
+            return int(state_key)  # type: ignore
+        store = self.q_table['__root__']
+        if not isinstance(store, QTableStore):
+            raise TypeError(f"Q-table rows need a QTableStore, not {type(store).__name__}.")
+        return store.row(state_key)
+
+    def row_key(self, row: int) -> EncodedState:
+        """State key of a row of `q_matrix()`."""
+        if self.q_values is not None:
+            return row
+        store = self.q_table['__root__']
+        if not isinstance(store, QTableStore):
+            raise TypeError(f"Q-table rows need a QTableStore, not {type(store).__name__}.")
+        return store.row_keys[row]
+
+    def q_matrix(self) -> np.ndarray:
+        """Every Q-value as one `(states, 4)` float32 matrix, indexed by `state_row`. Fetch it again after inserts."""
+        if self.q_values is not None:
+            return self.q_values
+        store = self.q_table['__root__']
+        if not isinstance(store, QTableStore):
+            raise TypeError(f"Q-table rows need a QTableStore, not {type(store).__name__}.")
+        return store.matrix
+
+    def canonical_action(self, state: State, action: int) -> int:
+        """The column `action` taken in `state` is stored under: itself, unless the encoder is symmetric."""
+        if self.symmetry is not None:
+            return self.symmetry.to_canonical(state, action)
+        return action
+
+    def decay_epsilon(self) -> None:
+        self.epsilon = max(self.epsilon_min, self.epsilon * self.epsilon_decay)
+
+    def set_q_row(self, state_key: EncodedState, values: np.ndarray) -> None:
+        if self.q_values is not None:
+            self.q_values[state_key] = values
+        else:
+            self.q_table['__root__'][state_key] = values
+
+    def choose_action(self, state: State) -> int:
+        if np.random.rand() < self.epsilon:
+            return np.random.choice(4)  # Explore: choose random action
+
+        state_key = self.get_state_key(state)
+
+        if self.q_values is not None:
+            action = int(self.q_values[state_key].argmax())
+        else:
+            q_table_root = self.q_table['__root__']
+
+            if isinstance(q_table_root, QTableStore):
+                row = q_table_root.row(state_key)  # May grow the matrix, so look it up first
+                action = int(q_table_root.matrix[row].argmax())
+            else:
+                if state_key not in q_table_root:
+                    q_table_root[state_key] = np.zeros(4)  # Initialize Q-values for new state
+                action = int(np.argmax(q_table_root[state_key]))  # Exploit: choose best action
+
+        if self.symmetry is not None:
+            return self.symmetry.from_canonical(state, action)
+        return action
+
+    def learn(self, state: State, action: int, reward: int, next_state: State, done: bool) -> None:
+        if self.symmetry is not None:
+            action = self.symmetry.to_canonical(state, action)
+        state_key = self.get_state_key(state)
+        next_state_key = self.get_state_key(next_state)
+
+        if self.q_values is not None:
+            q_values = self.q_values
+            q_update = reward
+            if not done:
+                q_update += self.gamma * q_values[next_state_key].max()
+            q_values[state_key, action] += self.alpha * (q_update - q_values[state_key, action])
+        elif isinstance(self.q_table['__root__'], QTableStore):
+            store = self.q_table['__root__']
+            row, next_row = store.row(state_key), store.row(next_state_key)
+            matrix = store.matrix  # Fetched after both inserts, which may have resized it
+            q_update = reward
+            if not done:
+                q_update += self.gamma * matrix[next_row].max()
+            matrix[row, action] += self.alpha * (q_update - matrix[row, action])
+            if store.max_states is not None and len(store.row_keys) > store.max_states:
+                store.evict()  # Once the update is in, as evicting moves rows
+        else:
+            q_table_root = self.q_table['__root__']
+
+            if state_key not in q_table_root:
+                q_table_root[state_key] = np.zeros(4)
+            if next_state_key not in q_table_root:
+                q_table_root[next_state_key] = np.zeros(4)
+
+            q_update = reward
+            if not done:
+                q_update += self.gamma * np.max(q_table_root[next_state_key])
+
+            q_table_root[state_key][action] = (1 - self.alpha) * q_table_root[state_key][action] + self.alpha * q_update
+
+        if done:
+            self.decay_epsilon()
+
+    def evict_if_full(self) -> int:
+        """Evict from a bounded Q-table that has gone over `max_states`. Returns the number of states dropped; see `QTableStore.row_map`."""
+        store = self.q_table['__root__']
+        if self.q_values is None and isinstance(store, QTableStore) and store.over_limit():
+            return store.evict()
+        return 0
+
+    def q_table_stats(self) -> Dict[str, int]:
+        """`QTableStore.stats` of the Q-table; only the state count for other tables."""
+        store = self.q_table['__root__']
+        if self.q_values is None and isinstance(store, QTableStore):
+            return store.stats()
+        return {'states': self.state_count()}
+
+    def state_count(self) -> int:
+        if self.q_values is not None:
+            return int(np.count_nonzero(self.q_values.any(axis=1)))
+        return len(self.q_table['__root__'])
+
+    def memory_per_state(self) -> float:
+        """Average bytes of Q-table storage per state, excluding the key objects."""
+        if self.q_values is not None:
+            return self.q_values.nbytes / len(self.q_values)
+        return memory_per_state(self.q_table['__root__'])
+
+    def save_q_table(self, file_path: str) -> None:
+        if self.q_values is not None:
+            save_dense_file(file_path, self.q_values, self.encoder.name)
+        else:
+            save_q_table_file(file_path, self.q_table['__root__'], self.encoder.name)
+
+    def load_weights(self, file_path: str, mmap: bool = False) -> None:
+        """
+        Load weights saved by `save_q_table` into whichever Q-table this agent's encoder uses.
+
+        :param mmap: Map the file instead of reading it; values are paged in as states are visited.
+        """
+        if not is_q_table_file(file_path):
+            self.load_pickled_weights(file_path)
+            self.limit_q_table()
+            return
+
+        encoder_name = read_header(file_path).encoder_name
+        if encoder_name != self.encoder.name:
+            raise ValueError(f"{file_path} holds Q-values for the '{encoder_name}' encoder, not '{self.encoder.name}'.")
+
+        if self.q_values is not None:
+            q_values, _ = load_dense_file(file_path, mmap=mmap)
+            if q_values.shape != self.q_values.shape:
+                raise ValueError(f"{file_path} does not hold Q-values for the '{self.encoder.name}' encoder.")
+            self.q_values = q_values
+        else:
+            self.q_table = QTable(__root__=load_q_table_file(file_path, mmap=mmap))
+            self.limit_q_table()
+
+    def limit_q_table(self) -> None:
+        """Give a loaded Q-table this agent's `max_states` and `eviction`, evicting at once if it is over the cap."""
+        store = self.q_table['__root__']
+        if self.q_values is None and isinstance(store, QTableStore) and self.max_states is not None:
+            store.set_limit(self.max_states, self.eviction)
+            self.evict_if_full()
+
+    def load_pickled_weights(self, file_path: str) -> None:
+        """Load weights pickled by earlier versions of `save_q_table`."""
+        if self.q_values is not None:
+            with open(file_path, 'rb') as f:
+                q_values = pickle.load(f)
+            if not isinstance(q_values, np.ndarray) or q_values.shape != self.q_values.shape:
+                raise ValueError(f"{file_path} does not hold Q-values for the '{self.encoder.name}' encoder.")
+            self.q_values = q_values.astype(np.float32, copy=False)
+        else:
+            self.q_table = QLearningAgent.load_q_table(file_path)
+
+    @staticmethod
+    def load_q_table(file_path: str) -> QTable:
+            if is_q_table_file(file_path):
+                return QTable(__root__=load_q_table_file(file_path))
+
+            with open(file_path, 'rb') as f:
+                q_table_data = pickle.load(f)
+                if not isinstance(q_table_data, QTableStore):
+                    # Q-tables saved before the store was introduced are plain dicts of arrays.
+                    q_table_data = QTableStore.from_mapping(q_table_data)
+                return QTable(__root__=q_table_data)
@@ -0,0 +1,240 @@
+import sys
+from array import array
+from typing import Any, Dict, Iterator, List, Mapping, MutableMapping, Optional, Tuple
+import numpy as np
+from src.utils.types import EncodedState
+
+
+# How a bounded `QTableStore` picks the states to evict.
+EVICTION_POLICIES: Tuple[str, ...] = ('lru', 'least_visited')
+
+HEADROOM = 8  # Rows allocated beyond `max_states`, for the inserts between two eviction checks
+
+
+class QTableStore(MutableMapping[EncodedState, np.ndarray]):
+    """
+    Q-table that interns each state key to a row of one contiguous float32 matrix.
+
+    It behaves like the `Dict[StateKey, np.ndarray]` it replaces: `store[key]` is a
+    writable view of the key's four Q-values. Rows are appended as states are
+    inserted and the matrix doubles when full, so there is no per-state array object.
+    Views are only valid until the next insert, as a resize moves the matrix.
+
+    Every `row` lookup counts a visit to the state and stamps it with `clock`.
+    With `max_states`, the matrix stops growing at the cap and `evict`, called
+    by the agent between updates once the store is `over_limit`, frees
+    `evict_fraction` of it: all-zero rows untouched since the previous pass go
+    first, then the least recently used ('lru') or least visited
+    ('least_visited', oldest first on ties) states.
+    Evicting and compacting move rows; `row_map` says where each one went.
+    """
+
+    def __init__(self, capacity: int = 1024, n_actions: int = 4, max_states: Optional[int] = None, eviction: str = 'lru', evict_fraction: float = 0.1) -> None:
+        self.n_actions: int = n_actions
+        self.index: Dict[EncodedState, int] = {}
+        self.row_keys: List[EncodedState] = []
+        self.max_states: Optional[int] = None
+        self.eviction: str = 'lru'
+        self.evict_fraction: float = evict_fraction
+        self.set_limit(max_states, eviction)
+        if max_states is not None:
+            capacity = min(capacity, max_states + HEADROOM)
+        self.matrix: np.ndarray = np.zeros((max(capacity, 1), n_actions), dtype=np.float32)
+        # Per row, like the matrix: lookups of its state and the `clock` of the last one.
+        self.visits: 'array[int]' = array('Q', bytes(8 * len(self.matrix)))
+        self.last_access: 'array[int]' = array('q', bytes(8 * len(self.matrix)))
+        self.clock: int = 0
+        self.evicted_at: int = 0  # `clock` at the end of the last eviction pass
+        self.row_map: Optional[np.ndarray] = None  # Row of every old row after the last eviction or compaction, -1 if removed
+        self.evicted: int = 0  # States evicted for space
+        self.evictions: int = 0  # Eviction passes
+        self.compacted: int = 0  # All-zero rows dropped
+
+    def set_limit(self, max_states: Optional[int], eviction: str = 'lru') -> None:
+        if eviction not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy '{eviction}', expected one of {', '.join(EVICTION_POLICIES)}.")
+        if max_states is not None and max_states < 1:
+            raise ValueError(f"max_states must be at least 1, got {max_states}.")
+        self.max_states = max_states
+        self.eviction = eviction
+
+    @classmethod
+    def from_mapping(cls, table: Mapping[EncodedState, Any]) -> 'QTableStore':
+        store = cls(capacity=len(table))
+        for key, values in table.items():
+            store[key] = values
+        return store
+
+    def __len__(self) -> int:
+        return len(self.row_keys)
+
+    def __iter__(self) -> Iterator[EncodedState]:
+        return iter(self.row_keys)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.index
+
+    def __getitem__(self, key: EncodedState) -> np.ndarray:
+        return self.matrix[self.index[key]]
+
+    def __setitem__(self, key: EncodedState, values: Any) -> None:
+        row = self.row(key)
+        self.matrix[row] = values
+
+    def __delitem__(self, key: EncodedState) -> None:
+        # Swap-remove: move the last row into the freed slot so rows stay contiguous.
+        row = self.index.pop(key)
+        last = len(self.row_keys) - 1
+        last_key = self.row_keys.pop()
+        if row != last:
+            self.matrix[row] = self.matrix[last]
+            self.visits[row], self.last_access[row] = self.visits[last], self.last_access[last]
+            self.row_keys[row] = last_key
+            self.index[last_key] = row
+        self.matrix[last] = 0
+        self.visits[last] = self.last_access[last] = 0
+
+    def row(self, key: EncodedState) -> int:
+        """The row of `key`, inserting a zeroed row if the state is new, counted as a visit."""
+        row = self.index.get(key)
+        if row is None:
+            row = len(self.row_keys)
+            if row == len(self.matrix):
+                self.resize(self.next_capacity())
+            self.index[key] = row
+            self.row_keys.append(key)
+        self.clock += 1
+        self.visits[row] += 1
+        self.last_access[row] = self.clock
+        return row
+
+    def next_capacity(self) -> int:
+        """Double, but only up to the cap plus `HEADROOM` while the store is within it."""
+        capacity = 2 * len(self.matrix)
+        if self.max_states is not None and len(self.matrix) < self.max_states + HEADROOM:
+            capacity = min(capacity, self.max_states + HEADROOM)
+        return capacity
+
+    def resize(self, capacity: int) -> None:
+        """Reallocate the matrix and visit counts with room for `capacity` rows, at least the used ones."""
+        matrix = np.zeros((capacity, self.n_actions), dtype=np.float32)
+        matrix[:len(self.row_keys)] = self.matrix[:len(self.row_keys)]
+        if capacity > len(self.matrix):
+            extra = bytes(8 * (capacity - len(self.matrix)))
+            self.visits.frombytes(extra)
+            self.last_access.frombytes(extra)
+        else:
+            del self.visits[capacity:], self.last_access[capacity:]
+        self.matrix = matrix
+
+    def used_values(self) -> np.ndarray:
+        return self.matrix[:len(self.row_keys)]
+
+    def saved_rows(self) -> Tuple[List[EncodedState], np.ndarray]:
+        """
+        Copies of the keys and Q-values worth saving: every row but the all-zero ones.
+
+        A state missing from a table gets the same zeroed row when it is next
+        looked up, so leaving them out changes no Q-value and shrinks the file.
+        """
+        values = self.used_values()
+        rows = np.flatnonzero(values.any(axis=1))
+        if len(rows) == len(values):
+            return list(self.row_keys), values.copy()
+        row_keys = self.row_keys
+        return [row_keys[row] for row in rows.tolist()], values[rows]
+
+    def over_limit(self) -> bool:
+        return self.max_states is not None and len(self.row_keys) > self.max_states
+
+    def evict(self) -> int:
+        """Drop stale all-zero rows, then states by the eviction policy, until `evict_fraction` of `max_states` is free. Returns the number of states dropped."""
+        size = len(self.row_keys)
+        # A zero row looked up since the last pass is a state just reached, whose update may not have landed yet.
+        keep = np.any(self.matrix[:size], axis=1) | (np.frombuffer(self.last_access, dtype=np.int64, count=size) > self.evicted_at)
+        zero_rows = size - int(np.count_nonzero(keep))
+        excess = 0
+        if self.max_states is not None:
+            excess = size - zero_rows - int(self.max_states * (1 - self.evict_fraction))
+        if excess > 0:
+            live = np.flatnonzero(keep)
+            last_access = np.frombuffer(self.last_access, dtype=np.int64, count=size)[live]
+            if self.eviction == 'lru':
+                victims = np.argpartition(last_access, excess - 1)[:excess]
+            else:
+                visits = np.frombuffer(self.visits, dtype=np.uint64, count=size)[live]
+                victims = np.lexsort((last_access, visits))[:excess]
+            keep[live[victims]] = False
+            self.evicted += excess
+        self.compacted += zero_rows
+        self.evictions += 1
+        self.evicted_at = self.clock
+        dropped = self.keep_rows(keep)
+        if self.max_states is not None and len(self.matrix) > self.max_states + HEADROOM:
+            self.resize(max(len(self.row_keys), self.max_states + HEADROOM))  # A table loaded above the cap
+        return dropped
+
+    def compact(self) -> int:
+        """Drop every all-zero row, as `saved_rows` leaves them out. Returns the number dropped."""
+        dropped = self.keep_rows(np.any(self.used_values(), axis=1))
+        self.compacted += dropped
+        return dropped
+
+    def keep_rows(self, keep: np.ndarray) -> int:
+        """Drop the rows where `keep` is False, moving the others up in order, and set `row_map`. Returns the number dropped."""
+        size = len(self.row_keys)
+        rows = np.flatnonzero(keep)
+        n = len(rows)
+        self.row_map = np.full(size, -1, dtype=np.int64)
+        self.row_map[rows] = np.arange(n)
+        if n == size:
+            return 0
+
+        self.row_keys = [self.row_keys[row] for row in rows.tolist()]
+        self.index = {key: row for row, key in enumerate(self.row_keys)}
+        self.matrix[:n] = self.matrix[rows]
+        self.matrix[n:size] = 0
+        for counts in (np.frombuffer(self.visits, dtype=np.uint64), np.frombuffer(self.last_access, dtype=np.int64)):
+            counts[:n] = counts[rows]
+            counts[n:size] = 0
+        return size - n
+
+    def stats(self) -> Dict[str, int]:
+        """Live size, cap and eviction counts, for progress reports."""
+        return {
+            'states': len(self),
+            'max_states': self.max_states or 0,
+            'evicted': self.evicted,
+            'evictions': self.evictions,
+            'compacted': self.compacted,
+            'memory_bytes': self.memory_bytes(),
+        }
+
+    def memory_bytes(self) -> int:
+        """Bytes held by the index, the value matrix and the visit counts, not counting the key objects themselves."""
+        return sys.getsizeof(self.index) + sys.getsizeof(self.row_keys) + self.matrix.nbytes + sys.getsizeof(self.visits) + sys.getsizeof(self.last_access)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {'n_actions': self.n_actions, 'row_keys': self.row_keys, 'matrix': self.used_values().copy(), 'max_states': self.max_states, 'eviction': self.eviction}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        # Visit counts are not pickled, so they start over. Stores pickled before the cap existed have none.
+        QTableStore.__init__(self, capacity=len(state['matrix']), n_actions=state['n_actions'])
+        self.set_limit(state.get('max_states'), state.get('eviction', 'lru'))
+        self.row_keys = state['row_keys']
+        self.index = {key: row for row, key in enumerate(self.row_keys)}
+        self.matrix[:len(self.row_keys)] = state['matrix']
+
+
+def dict_memory_bytes(table: Mapping[EncodedState, np.ndarray]) -> int:
+    """Bytes held by a dict-of-ndarray Q-table and its arrays, not counting the key objects themselves."""
+    return sys.getsizeof(table) + sum(sys.getsizeof(values) for values in table.values())
+
+
+def memory_per_state(table: Mapping[EncodedState, np.ndarray]) -> float:
+    """Average bytes of Q-table overhead per stored state, for either backend."""
+    if len(table) == 0:
+        return 0.0
+    if isinstance(table, QTableStore):
+        return table.memory_bytes() / len(table)
+    return dict_memory_bytes(table) / len(table)
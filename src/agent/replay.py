@@ -0,0 +1,172 @@
+from typing import Any, Dict, List, Optional, Tuple, Union
+import numpy as np
+from src.agent.q_learning import QLearningAgent
+from src.agent.q_table import QTableStore
+from src.utils.types import State
+
+
+class ReplayBuffer:
+    """
+    Fixed-capacity ring of transitions in preallocated NumPy arrays.
+
+    By default states are stored as rows of the agent's Q-matrix
+    (`QLearningAgent.state_row`), so a transition is 22 bytes; with `state_shape`
+    each state is an array, such as the feature vectors `DQNAgent` learns from.
+    Once full, each new transition overwrites the oldest. Deleting or evicting
+    states from a `QTableStore` moves rows, so `remap` the buffer after one, or clear it.
+    """
+
+    def __init__(self, capacity: int = 100_000, state_shape: Tuple[int, ...] = (), state_dtype: type = np.int64) -> None:
+        self.capacity: int = capacity
+        self.states: np.ndarray = np.zeros((capacity, *state_shape), dtype=state_dtype)
+        self.actions: np.ndarray = np.zeros(capacity, dtype=np.int8)
+        self.rewards: np.ndarray = np.zeros(capacity, dtype=np.float32)
+        self.next_states: np.ndarray = np.zeros((capacity, *state_shape), dtype=state_dtype)
+        self.dones: np.ndarray = np.zeros(capacity, dtype=np.bool_)
+        self.position: int = 0  # Slot the next transition goes into
+        self.size: int = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def add(self, state: Union[int, np.ndarray], action: int, reward: float, next_state: Union[int, np.ndarray], done: bool) -> None:
+        i = self.position
+        self.states[i], self.actions[i], self.rewards[i], self.next_states[i], self.dones[i] = state, action, reward, next_state, done
+        self.position = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def sample(self, batch_size: int, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """`batch_size` transitions drawn uniformly with replacement, as `(states, actions, rewards, next_states, dones)`."""
+        indices = rng.integers(0, self.size, size=batch_size)
+        return self.states[indices], self.actions[indices], self.rewards[indices], self.next_states[indices], self.dones[indices]
+
+    def clear(self) -> None:
+        self.position = self.size = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Copies of the stored transitions and the ring position, for `restore`."""
+        # Slots are filled from 0 until the ring is full, and `remap` packs them back to the front.
+        return {
+            'states': self.states[:self.size].copy(),
+            'actions': self.actions[:self.size].copy(),
+            'rewards': self.rewards[:self.size].copy(),
+            'next_states': self.next_states[:self.size].copy(),
+            'dones': self.dones[:self.size].copy(),
+            'position': self.position,
+        }
+
+    def restore(self, snapshot: Dict[str, Any]) -> None:
+        size = len(snapshot['actions'])
+        if size > self.capacity or snapshot['states'].shape[1:] != self.states.shape[1:]:
+            raise ValueError(f"Cannot restore {size} transitions of shape {snapshot['states'].shape[1:]} into a buffer of {self.capacity} of shape {self.states.shape[1:]}.")
+        self.states[:size], self.actions[:size], self.rewards[:size] = snapshot['states'], snapshot['actions'], snapshot['rewards']
+        self.next_states[:size], self.dones[:size] = snapshot['next_states'], snapshot['dones']
+        self.size = size
+        self.position = snapshot['position'] % self.capacity
+
+    def remap(self, row_map: np.ndarray) -> None:
+        """
+        Point row-index states at their rows after a `QTableStore` moved them.
+
+        `row_map[old_row]` is the new row, or -1 for a dropped state, whose
+        transitions are dropped too. The rest are kept oldest first.
+        """
+        order = (np.arange(self.size) + self.position - self.size) % self.capacity
+        states, next_states = row_map[self.states[order]], row_map[self.next_states[order]]
+        kept = (states >= 0) & (next_states >= 0)
+        n = int(np.count_nonzero(kept))
+        source = order[kept]
+        self.states[:n], self.next_states[:n] = states[kept], next_states[kept]
+        self.actions[:n], self.rewards[:n], self.dones[:n] = self.actions[source], self.rewards[source], self.dones[source]
+        self.size = n
+        self.position = n % self.capacity
+
+
+class BatchedLearner:
+    """
+    Learns from replayed minibatches instead of one online update per transition.
+
+    `observe` only stores the transition; every `learn_every` transitions a batch
+    of `batch_size` is sampled and applied as one vectorized tabular update. The
+    TD errors of a state-action pair drawn several times in a batch are averaged,
+    so it is not updated twice. Replayed transitions are used many times, which
+    speeds up learning per transition and per wall-clock second, and most ticks
+    only pay for a buffer write.
+    """
+
+    def __init__(
+        self,
+        agent: QLearningAgent,
+        buffer: Optional[ReplayBuffer] = None,
+        batch_size: int = 64,
+        learn_every: int = 4,
+        min_size: int = 1000,
+        seed: Optional[int] = None
+    ) -> None:
+        self.agent: QLearningAgent = agent
+        self.buffer: ReplayBuffer = buffer or ReplayBuffer()
+        self.batch_size: int = batch_size
+        self.learn_every: int = learn_every
+        self.min_size: int = min_size  # Transitions stored before the first update
+        self.rng: np.random.Generator = np.random.default_rng(seed)
+        self.observed: int = 0
+        self.updates: int = 0
+        # `next_state` of the last transition is usually the next `state`, so its row is reused.
+        self.last_state: Optional[State] = None
+        self.last_row: int = 0
+
+    def observe(self, state: State, action: int, reward: float, next_state: State, done: bool) -> None:
+        """Store a transition in place of `agent.learn`, updating from a batch when one is due."""
+        row = self.last_row if state is self.last_state else self.agent.state_row(state)
+        next_row = self.agent.state_row(next_state)
+        self.last_state, self.last_row = next_state, next_row
+        self.buffer.add(row, self.agent.canonical_action(state, action), reward, next_row, done)
+        self.observed += 1
+        if self.agent.max_states is not None and self.agent.evict_if_full():
+            store = self.agent.q_table['__root__']
+            if isinstance(store, QTableStore) and store.row_map is not None:
+                self.buffer.remap(store.row_map)
+            self.last_state = None
+
+        if done:
+            self.agent.decay_epsilon()
+        if self.observed % self.learn_every == 0 and len(self.buffer) >= min(self.min_size, self.buffer.capacity):
+            self.update()
+
+    def update(self) -> None:
+        """Apply one minibatch of Q-learning updates."""
+        states, actions, rewards, next_states, dones = self.buffer.sample(self.batch_size, self.rng)
+        q_values = self.agent.q_matrix()
+        targets = rewards + self.agent.gamma * q_values[next_states].max(axis=1) * ~dones
+        errors = targets - q_values[states, actions]
+
+        # How often each transition's state-action pair is in the batch: dividing by it makes `np.add.at` apply the mean error per pair.
+        pairs = states * q_values.shape[1] + actions
+        counts = (pairs[:, None] == pairs).sum(axis=1)
+        np.add.at(q_values, (states, actions), self.agent.alpha * errors / counts)
+        self.updates += 1
+
+    def training_state(self) -> Dict[str, Any]:
+        """
+        The replay buffer, RNG and counters, for `restore_training_state`.
+
+        The buffer holds rows of the Q-matrix, which a saved and reloaded Q-table
+        numbers differently, so its states are stored as indices into the list of
+        state keys they refer to.
+        """
+        buffer = self.buffer.snapshot()
+        rows = np.unique(np.concatenate([buffer['states'], buffer['next_states']]))
+        buffer['states'] = np.searchsorted(rows, buffer['states'])
+        buffer['next_states'] = np.searchsorted(rows, buffer['next_states'])
+        keys: List[Any] = [self.agent.row_key(row) for row in rows.tolist()]
+        return {'buffer': buffer, 'keys': keys, 'rng': self.rng.bit_generator.state, 'observed': self.observed, 'updates': self.updates}
+
+    def restore_training_state(self, state: Dict[str, Any]) -> None:
+        """Put back a `training_state`; the agent's Q-table must be loaded first."""
+        rows = np.array([self.agent.key_row(key) for key in state['keys']], dtype=np.int64)
+        buffer = dict(state['buffer'])
+        buffer['states'], buffer['next_states'] = rows[buffer['states']], rows[buffer['next_states']]
+        self.buffer.restore(buffer)
+        self.rng.bit_generator.state = state['rng']
+        self.observed, self.updates = state['observed'], state['updates']
+        self.last_state = None
@@ -0,0 +1,331 @@
+import os
+import struct
+import pickle
+import hashlib
+from typing import Any, Dict, Iterator, List, Literal, Mapping, MutableMapping, Sequence, Tuple
+import numpy as np
+from src.agent.q_table import QTableStore
+from src.utils.types import EncodedState
+
+
+# Q-table file layout (version 2), all little-endian:
+#   header       (128 bytes)     magic, version, flags, n_actions, n_states, section offsets, encoder name
+#   values       float32[n, a]   Q-values, row i belongs to the i-th key written
+#   digests      int64[n]        `key_digest` of every state key, sorted ascending
+#   index        int64[n]        row of each digest
+#   key offsets  int64[n + 1]    where each row's packed key starts in the keys section
+#   keys         bytes           `pack_key` of every state key, in row order
+# Digests are computed from the packed keys, never `hash()`, so a file reads the
+# same on every platform and interpreter. Version 1 files (Python `hash()` order,
+# pickled keys) can still be loaded in full.
+MAGIC = b'SNKQ'
+VERSION = 2
+PREFIX = struct.Struct('<4sH')
+HEADER = struct.Struct('<4sHHIQQQQQQQ16s')
+HEADER_V1 = struct.Struct('<4sHHQQQQQ16s')
+ALIGNMENT = 64
+DENSE = 1  # Header flag: the keys are `range(n_states)`, in order
+_INT = struct.Struct('<q')
+_LENGTH = struct.Struct('<I')
+
+
+class QTableHeader:
+    def __init__(
+        self,
+        version: int,
+        flags: int,
+        n_actions: int,
+        n_states: int,
+        values_offset: int,
+        digests_offset: int,
+        index_offset: int,
+        key_offsets_offset: int,
+        keys_offset: int,
+        keys_size: int,
+        encoder_name: str
+    ) -> None:
+        self.version: int = version
+        self.flags: int = flags
+        self.n_actions: int = n_actions
+        self.n_states: int = n_states
+        self.values_offset: int = values_offset
+        self.digests_offset: int = digests_offset
+        self.index_offset: int = index_offset
+        self.key_offsets_offset: int = key_offsets_offset
+        self.keys_offset: int = keys_offset
+        self.keys_size: int = keys_size
+        self.encoder_name: str = encoder_name
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def pack_key(key: Any) -> bytes:
+    """Canonical bytes of a state key, or a part of one: tagged, fixed-width and independent of the platform."""
+    kind = type(key)
+    if kind is int:
+        return b'i' + _INT.pack(key)
+    if kind is tuple:
+        return b'(' + _LENGTH.pack(len(key)) + b''.join([pack_key(item) for item in key])
+    if kind is bool or isinstance(key, np.bool_):
+        return b'T' if key else b'F'
+    if isinstance(key, (int, np.integer)):
+        return b'i' + _INT.pack(int(key))
+    raise TypeError(f"Cannot store a state key part of type {kind.__name__}.")
+
+
+def unpack_keys(data: bytes) -> List[EncodedState]:
+    """Every key in a run of `pack_key` outputs, in order."""
+    unpack_int, unpack_length = _INT.unpack_from, _LENGTH.unpack_from
+
+    def unpack(position: int) -> Tuple[Any, int]:
+        tag = data[position]
+        if tag == 105:  # b'i'
+            return unpack_int(data, position + 1)[0], position + 9
+        if tag == 40:  # b'('
+            length, = unpack_length(data, position + 1)
+            position += 5
+            items = []
+            for _ in range(length):
+                item, position = unpack(position)
+                items.append(item)
+            return tuple(items), position
+        if tag == 84 or tag == 70:  # b'T', b'F'
+            return tag == 84, position + 1
+        raise ValueError(f"Corrupt state key at byte {position}.")
+
+    keys: List[EncodedState] = []
+    position = 0
+    while position < len(data):
+        key, position = unpack(position)
+        keys.append(key)
+    return keys
+
+
+def key_digest(packed_key: bytes) -> int:
+    """Signed 64-bit BLAKE2b digest of a packed key."""
+    return int.from_bytes(hashlib.blake2b(packed_key, digest_size=8).digest(), 'little', signed=True)
+
+
+def is_q_table_file(file_path: str) -> bool:
+    with open(file_path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def read_header(file_path: str) -> QTableHeader:
+    with open(file_path, 'rb') as f:
+        data = f.read(HEADER.size)
+
+    magic, version = PREFIX.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{file_path} is not a Q-table file.")
+    if version == 1:
+        _, _, n_actions, n_states, hashes_offset, values_offset, keys_offset, keys_size, encoder_name = HEADER_V1.unpack_from(data)
+        return QTableHeader(1, 0, n_actions, n_states, values_offset, hashes_offset, 0, 0, keys_offset, keys_size, encoder_name.rstrip(b'\0').decode())
+    if version != VERSION:
+        raise ValueError(f"{file_path} has Q-table format version {version}, expected {VERSION}.")
+
+    _, _, n_actions, flags, n_states, values_offset, digests_offset, index_offset, key_offsets_offset, keys_offset, keys_size, encoder_name = HEADER.unpack_from(data)
+    return QTableHeader(version, flags, n_actions, n_states, values_offset, digests_offset, index_offset, key_offsets_offset, keys_offset, keys_size, encoder_name.rstrip(b'\0').decode())
+
+
+def write_q_table_file(file_path: str, keys: Sequence[EncodedState], values: np.ndarray, encoder_name: str) -> None:
+    """
+    Write `values[i]` under `keys[i]`. The file is written next to `file_path`
+    and renamed over it, so readers never see a partial file.
+    """
+    packed = [pack_key(key) for key in keys]
+    digests = np.fromiter((key_digest(key) for key in packed), dtype=np.int64, count=len(packed))
+    index = np.argsort(digests, kind='stable').astype(np.int64)
+    key_offsets = np.zeros(len(packed) + 1, dtype=np.int64)
+    np.cumsum([len(key) for key in packed], out=key_offsets[1:])
+    values = np.ascontiguousarray(values, dtype=np.float32)
+    flags = DENSE if isinstance(keys, range) and keys.start == 0 and keys.step == 1 else 0
+
+    n_states, n_actions = values.shape
+    values_offset = _align(HEADER.size)
+    digests_offset = _align(values_offset + values.nbytes)
+    index_offset = digests_offset + digests.nbytes
+    key_offsets_offset = index_offset + index.nbytes
+    keys_offset = key_offsets_offset + key_offsets.nbytes
+    keys_size = int(key_offsets[-1])
+    header = HEADER.pack(
+        MAGIC, VERSION, n_actions, flags, n_states,
+        values_offset, digests_offset, index_offset, key_offsets_offset, keys_offset, keys_size,
+        encoder_name.encode()[:16]
+    )
+
+    directory = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{file_path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(header)
+        f.seek(values_offset)
+        values.tofile(f)
+        f.seek(digests_offset)
+        digests[index].tofile(f)
+        index.tofile(f)
+        key_offsets.tofile(f)
+        for key in packed:
+            f.write(key)
+    os.replace(temp_path, file_path)
+
+
+def read_version_1(file_path: str, header: QTableHeader) -> Tuple[List[EncodedState], np.ndarray]:
+    """Keys and Q-values of a version 1 file, whose rows are in `hash()` order with the keys pickled after them."""
+    with open(file_path, 'rb') as f:
+        f.seek(header.values_offset)
+        values = np.fromfile(f, dtype=np.float32, count=header.n_states * header.n_actions).reshape(header.n_states, header.n_actions)
+        f.seek(header.keys_offset)
+        keys: List[EncodedState] = pickle.loads(f.read(header.keys_size))
+    return keys, values
+
+
+class MappedQTable(MutableMapping[EncodedState, np.ndarray]):
+    """
+    Q-table read straight from a Q-table file with `np.memmap`.
+
+    Opening it only reads the header. A lookup binary-searches the key digests,
+    then reads and compares only the candidate rows' packed keys, so neither the
+    Q-values nor the keys are read until their states are looked up. Writes stay
+    in memory: existing rows are copy-on-write and unseen states go to an
+    in-memory overlay.
+    """
+
+    def __init__(self, file_path: str) -> None:
+        self.file_path: str = file_path
+        self.header: QTableHeader = read_header(file_path)
+        if self.header.version != VERSION:
+            raise ValueError(f"{file_path} has Q-table format version {self.header.version}; load it in full and save it again to map it.")
+        n_states, n_actions = self.header.n_states, self.header.n_actions
+
+        def section(dtype: Any, offset: int, shape: Any, mode: Literal['r', 'c'] = 'r') -> np.ndarray:
+            if not n_states:
+                return np.zeros(shape, dtype=dtype)
+            return np.memmap(file_path, dtype=dtype, mode=mode, offset=offset, shape=shape)
+
+        self.matrix: np.ndarray = section(np.float32, self.header.values_offset, (n_states, n_actions), 'c')
+        self.digests: np.ndarray = section(np.int64, self.header.digests_offset, (n_states,))
+        self.index: np.ndarray = section(np.int64, self.header.index_offset, (n_states,))
+        self.key_offsets: np.ndarray = section(np.int64, self.header.key_offsets_offset, (n_states + 1,))
+        self.packed_keys: np.ndarray = section(np.uint8, self.header.keys_offset, (self.header.keys_size,))
+        self.overlay: Dict[EncodedState, np.ndarray] = {}
+
+    def packed_key(self, row: int) -> bytes:
+        return self.packed_keys[self.key_offsets[row]:self.key_offsets[row + 1]].tobytes()
+
+    def find(self, key: EncodedState) -> int:
+        """Row of `key` in the file, or -1."""
+        packed = pack_key(key)
+        digest = np.int64(key_digest(packed))
+        position = int(np.searchsorted(self.digests, digest))
+        # Keys can share a digest, so walk the run of equal digests comparing the stored keys.
+        while position < len(self.digests) and self.digests[position] == digest:
+            row = int(self.index[position])
+            if self.packed_key(row) == packed:
+                return row
+            position += 1
+        return -1
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.overlay or self.find(key) >= 0  # type: ignore
+
+    def __getitem__(self, key: EncodedState) -> np.ndarray:
+        if key in self.overlay:
+            return self.overlay[key]
+        row = self.find(key)
+        if row < 0:
+            raise KeyError(key)
+        return self.matrix[row]
+
+    def __setitem__(self, key: EncodedState, values: Any) -> None:
+        row = self.find(key)
+        if row >= 0:
+            self.matrix[row] = values
+        else:
+            self.overlay[key] = np.array(values, dtype=np.float32)
+
+    def __delitem__(self, key: EncodedState) -> None:
+        if key not in self.overlay:
+            raise KeyError(f"States stored in {self.file_path} cannot be deleted.")
+        del self.overlay[key]
+
+    def __len__(self) -> int:
+        return self.header.n_states + len(self.overlay)
+
+    def keys_in_file(self) -> List[EncodedState]:
+        """Every key stored in the file, in row order; reads the whole keys section."""
+        return unpack_keys(self.packed_keys.tobytes())
+
+    def __iter__(self) -> Iterator[EncodedState]:
+        yield from self.keys_in_file()
+        yield from self.overlay
+
+    def to_store(self) -> QTableStore:
+        store = QTableStore(capacity=len(self))
+        for key, values in zip(self.keys_in_file(), self.matrix):
+            store[key] = values
+        for key, values in self.overlay.items():
+            store[key] = values
+        return store
+
+
+def save_q_table_file(file_path: str, table: Mapping[EncodedState, np.ndarray], encoder_name: str) -> None:
+    """Write `table` without its all-zero rows, which loading gives back as new states."""
+    if isinstance(table, QTableStore):
+        keys, values = table.saved_rows()
+    else:
+        keys = list(table)
+        values = np.array([table[key] for key in keys], dtype=np.float32).reshape(len(keys), -1)
+        rows = np.flatnonzero(values.any(axis=1))
+        keys, values = [keys[row] for row in rows.tolist()], values[rows]
+    write_q_table_file(file_path, keys, values, encoder_name)
+
+
+def save_dense_file(file_path: str, q_values: np.ndarray, encoder_name: str) -> None:
+    write_q_table_file(file_path, range(len(q_values)), q_values, encoder_name)
+
+
+def load_dense_file(file_path: str, mmap: bool = False) -> Tuple[np.ndarray, str]:
+    """Q-values of a dense (integer-keyed) table in state order, and the encoder name."""
+    header = read_header(file_path)
+    if header.version == 1:
+        # Integers hash to themselves, so version 1 rows of a dense table are already in state order.
+        keys, q_values = read_version_1(file_path, header)
+        if keys != list(range(header.n_states)):
+            raise ValueError(f"{file_path} does not hold a dense Q-table.")
+        return q_values, header.encoder_name
+
+    if not header.flags & DENSE:
+        raise ValueError(f"{file_path} does not hold a dense Q-table.")
+    table = MappedQTable(file_path)
+    q_values = table.matrix if mmap else np.array(table.matrix)
+    return q_values, header.encoder_name
+
+
+def load_q_table_file(file_path: str, mmap: bool = False) -> MutableMapping[EncodedState, np.ndarray]:
+    """Load a Q-table file, fully into a `QTableStore` or lazily as a `MappedQTable`; version 1 files are always loaded in full."""
+    header = read_header(file_path)
+    if header.version == 1:
+        keys, values = read_version_1(file_path, header)
+        store = QTableStore(capacity=len(keys))
+        for key, row in zip(keys, values):
+            store[key] = row
+        return store
+
+    table = MappedQTable(file_path)
+    return table if mmap else table.to_store()
+
+
+def convert_pickle(pickle_path: str, file_path: str, encoder_name: str) -> int:
+    """Convert a pickled Q-table (dict of arrays or dense array) into a Q-table file. Returns the number of states."""
+    with open(pickle_path, 'rb') as f:
+        data = pickle.load(f)
+
+    if isinstance(data, np.ndarray):
+        save_dense_file(file_path, data, encoder_name)
+    else:
+        save_q_table_file(file_path, data, encoder_name)
+    return len(data)
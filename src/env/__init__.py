@@ -0,0 +1,24 @@
+from typing import TYPE_CHECKING, Any
+from .directions import DELTAS, DIRECTIONS, KEYSYM_DIRECTIONS, OFF_BOARD, OPPOSITE, TURNS, next_cell_table, pixel_deltas
+from .occupancy import OccupancyGrid
+from .snake_env import SnakeEnv
+
+if TYPE_CHECKING:
+    from .batch_env import BatchSnakeEnv
+    from .recording import EpisodeLog, EpisodeRecord, EpisodeRecorder, EpisodeReplay
+
+# Modules that need NumPy are imported on first use, so the human game starts without it.
+_LAZY_MODULES = {
+    'BatchSnakeEnv': '.batch_env',
+    'EpisodeLog': '.recording',
+    'EpisodeRecord': '.recording',
+    'EpisodeRecorder': '.recording',
+    'EpisodeReplay': '.recording',
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _LAZY_MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    return getattr(importlib.import_module(_LAZY_MODULES[name], __name__), name)
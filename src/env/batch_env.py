@@ -0,0 +1,171 @@
+from typing import Optional, Tuple
+import numpy as np
+from src.env import directions
+from src.utils.config import GameConfig
+from src.utils.types import State
+from src.utils.constants import GAME_WIDTH, GAME_HEIGHT, SPACE_SIZE, BODY_PARTS, FOOD_REWARD, DEATH_REWARD, STEP_REWARD
+
+
+# The tables of src/env/directions.py as arrays, indexed by direction: Up, Down, Left, Right.
+DELTA_X = np.array([dx for dx, _ in directions.DELTAS], dtype=np.int32)
+DELTA_Y = np.array([dy for _, dy in directions.DELTAS], dtype=np.int32)
+OPPOSITE = np.array(directions.OPPOSITE, dtype=np.int8)
+DOWN = directions.DOWN
+
+
+class BatchSnakeEnv:
+    """
+    Steps `num_envs` Snake games at once with NumPy.
+
+    Every game keeps its body as a ring buffer of cell indices (`y * cols + x`),
+    a per-cell occupancy counter and its food cell. The rules and rewards are the
+    same as `SnakeEnv` / `Game.rl_agent_logic`; finished games are reset in place.
+    """
+
+    def __init__(
+        self,
+        num_envs: int,
+        width: int = GAME_WIDTH,
+        height: int = GAME_HEIGHT,
+        space_size: int = SPACE_SIZE,
+        body_parts: int = BODY_PARTS,
+        seed: Optional[int] = None
+    ) -> None:
+        self.num_envs: int = num_envs
+        self.space_size: int = space_size
+        self.cols: int = width // space_size
+        self.rows: int = height // space_size
+        self.cells: int = self.cols * self.rows
+        self.body_parts: int = body_parts
+        self.rng: np.random.Generator = np.random.default_rng(seed)
+
+        # The ring buffer holds one more slot than the board so a full snake never overwrites its tail.
+        self.capacity: int = self.cells + 1
+        self.body: np.ndarray = np.zeros((num_envs, self.capacity), dtype=np.int32)
+        self.head_ptr: np.ndarray = np.zeros(num_envs, dtype=np.int32)
+        self.length: np.ndarray = np.zeros(num_envs, dtype=np.int32)
+        self.occupancy: np.ndarray = np.zeros((num_envs, self.cells), dtype=np.int16)
+        self.head_x: np.ndarray = np.zeros(num_envs, dtype=np.int32)
+        self.head_y: np.ndarray = np.zeros(num_envs, dtype=np.int32)
+        self.direction: np.ndarray = np.zeros(num_envs, dtype=np.int8)
+        self.food: np.ndarray = np.zeros(num_envs, dtype=np.int32)
+        self.score: np.ndarray = np.zeros(num_envs, dtype=np.int32)
+        self.steps: np.ndarray = np.zeros(num_envs, dtype=np.int32)
+
+        # Score and length of the episodes that ended on the last `step`, valid where `step` reported done.
+        self.final_scores: np.ndarray = np.zeros(num_envs, dtype=np.int32)
+        self.final_steps: np.ndarray = np.zeros(num_envs, dtype=np.int32)
+
+        self._all: np.ndarray = np.arange(num_envs)
+
+    @classmethod
+    def from_config(cls, num_envs: int, config: GameConfig, seed: Optional[int] = None) -> 'BatchSnakeEnv':
+        return cls(num_envs, config.width, config.height, config.space_size, config.body_parts, seed)
+
+    def reset(self, env_ids: Optional[np.ndarray] = None) -> None:
+        """Reset the given games, or all of them when `env_ids` is None."""
+        if env_ids is None:
+            env_ids = self._all
+        if len(env_ids) == 0:
+            return
+
+        self.body[env_ids] = 0
+        self.head_ptr[env_ids] = self.body_parts - 1
+        self.length[env_ids] = self.body_parts
+        self.occupancy[env_ids] = 0
+        self.occupancy[env_ids, 0] = self.body_parts
+        self.head_x[env_ids] = 0
+        self.head_y[env_ids] = 0
+        self.direction[env_ids] = DOWN
+        self.score[env_ids] = 0
+        self.steps[env_ids] = 0
+        self.food[env_ids] = self.place_food(env_ids)
+
+    def place_food(self, env_ids: np.ndarray) -> np.ndarray:
+        """Pick a uniformly random free cell for each of the given games."""
+        free = self.occupancy[env_ids] == 0
+        free_counts = free.sum(axis=1)
+        if np.any(free_counts == 0):
+            raise Exception("No available position to place food")
+
+        picks = (self.rng.random(len(env_ids)) * free_counts).astype(np.int64)
+        return np.argmax(np.cumsum(free, axis=1) > picks[:, None], axis=1).astype(np.int32)
+
+    def step(self, actions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Advance every game by one tick.
+
+        :param actions: One direction index per game; reversing onto the body is ignored.
+        :return: Per-game rewards and done flags. Finished games are already reset on return.
+        """
+        actions = np.asarray(actions, dtype=np.int8)
+        direction = np.where(OPPOSITE[actions] != self.direction, actions, self.direction)
+        self.direction = direction
+
+        new_x = self.head_x + DELTA_X[direction]
+        new_y = self.head_y + DELTA_Y[direction]
+        out_of_bounds = (new_x < 0) | (new_x >= self.cols) | (new_y < 0) | (new_y >= self.rows)
+        new_cell = np.where(out_of_bounds, 0, new_y * self.cols + new_x)
+
+        ate = ~out_of_bounds & (new_cell == self.food)
+        self.steps += 1
+
+        # Snakes that did not eat drop their tail before the collision check, as in the Tk loop.
+        movers = np.flatnonzero(~ate)
+        tail_ptr = (self.head_ptr[movers] - self.length[movers] + 1) % self.capacity
+        self.occupancy[movers, self.body[movers, tail_ptr]] -= 1
+        self.length[movers] -= 1
+
+        self_collision = ~out_of_bounds & (self.occupancy[self._all, new_cell] > 0)
+        dead = out_of_bounds | self_collision
+
+        alive = np.flatnonzero(~dead)
+        self.head_ptr[alive] = (self.head_ptr[alive] + 1) % self.capacity
+        self.body[alive, self.head_ptr[alive]] = new_cell[alive]
+        self.occupancy[alive, new_cell[alive]] += 1
+        self.length[alive] += 1
+        self.head_x[alive] = new_x[alive]
+        self.head_y[alive] = new_y[alive]
+        self.score += ate
+
+        rewards = np.full(self.num_envs, STEP_REWARD, dtype=np.int32)
+        rewards[ate] = FOOD_REWARD
+        rewards[dead] = DEATH_REWARD
+
+        # A snake that fills the board ends its episode, there is nowhere left to place food.
+        won = ate & (self.length >= self.cells)
+        done = dead | won
+
+        respawn = np.flatnonzero(ate & ~won)
+        if len(respawn):
+            self.food[respawn] = self.place_food(respawn)
+
+        finished = np.flatnonzero(done)
+        self.final_scores[finished] = self.score[finished]
+        self.final_steps[finished] = self.steps[finished]
+        self.reset(finished)
+
+        return rewards, done
+
+    def body_cells(self, env_id: int) -> np.ndarray:
+        """Cells of one game's snake, head first."""
+        offsets = np.arange(self.length[env_id])
+        return self.body[env_id, (self.head_ptr[env_id] - offsets) % self.capacity]
+
+    def get_state(self, env_id: int) -> State:
+        """The `State` of one game, in the same pixel coordinates as `Game.get_state`."""
+        cells = self.body_cells(env_id)
+        xs = (cells % self.cols) * self.space_size
+        ys = (cells // self.cols) * self.space_size
+        head_x, head_y = int(xs[0]), int(ys[0])
+        food = int(self.food[env_id])
+
+        return State(
+            head=(head_x, head_y),
+            food=((food % self.cols) * self.space_size, (food // self.cols) * self.space_size),
+            body=[[int(x), int(y)] for x, y in zip(xs[1:], ys[1:])],
+            near_border=(
+                head_x == 0 or head_x == (self.cols - 1) * self.space_size,
+                head_y == 0 or head_y == (self.rows - 1) * self.space_size
+            )
+        )
@@ -0,0 +1,43 @@
+from typing import Dict, List, Tuple
+
+
+# Directions are small integers, indices into `DIRECTIONS`; the names are only needed for display and Tk keysyms.
+DIRECTIONS: Tuple[str, ...] = ('Up', 'Down', 'Left', 'Right')
+UP, DOWN, LEFT, RIGHT = range(len(DIRECTIONS))
+
+# Arrow-key keysym to direction, so the Tk bindings resolve a key once rather than comparing names every tick.
+KEYSYM_DIRECTIONS: Dict[str, int] = {name: direction for direction, name in enumerate(DIRECTIONS)}
+
+# (dx, dy) of one move in each direction, in cells.
+DELTAS: Tuple[Tuple[int, int], ...] = ((0, -1), (0, 1), (-1, 0), (1, 0))
+
+OPPOSITE: Tuple[int, ...] = (DOWN, UP, RIGHT, LEFT)
+
+# TURNS[heading][action] is the heading after `action`: the action's direction, unless it reverses onto the body.
+TURNS: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple(heading if action == OPPOSITE[heading] else action for action in range(len(DIRECTIONS)))
+    for heading in range(len(DIRECTIONS))
+)
+
+OFF_BOARD = -1  # Cell of a move that leaves the board
+
+
+def pixel_deltas(space_size: int) -> Tuple[Tuple[int, int], ...]:
+    """`DELTAS` in pixels, for boards of `space_size` pixel cells."""
+    return tuple((dx * space_size, dy * space_size) for dx, dy in DELTAS)
+
+
+def next_cell_table(cols: int, rows: int) -> List[int]:
+    """
+    The cell one move away from every cell in every direction, at `cell * 4 + direction`.
+
+    Cells are numbered `row * cols + col`; moves that leave the board give
+    `OFF_BOARD`, so the border test of a move is part of the same lookup.
+    """
+    table: List[int] = []
+    for row in range(rows):
+        for col in range(cols):
+            for dx, dy in DELTAS:
+                next_col, next_row = col + dx, row + dy
+                table.append(next_row * cols + next_col if 0 <= next_col < cols and 0 <= next_row < rows else OFF_BOARD)
+    return table
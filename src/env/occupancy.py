@@ -0,0 +1,110 @@
+import random
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+
+class OccupancyGrid:
+    """
+    Per-cell count of snake segments, in pixel coordinates, plus an index of free cells.
+
+    It is a counter rather than a flag because a new snake starts with all its
+    segments stacked on one cell. Positions off the board are ignored. Free cells
+    are kept in an array with a cell-to-slot map (swap-remove on occupy, append on
+    vacate), so a random free cell is picked in constant time. `version` changes
+    with every update, so a `State` can tell whether the grid still matches it.
+    """
+
+    def __init__(self, width: int, height: int, space_size: int) -> None:
+        self.width: int = width
+        self.height: int = height
+        self.space_size: int = space_size
+        self.cols: int = width // space_size
+        self.cell_count: int = self.cols * (height // space_size)
+        self.counts: List[int] = []
+        self.free: List[int] = []
+        self.slots: List[int] = []
+        self.version: int = 0
+        self.clear()
+
+    def is_inside(self, x: int, y: int) -> bool:
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def cell(self, x: int, y: int) -> int:
+        return (y // self.space_size) * self.cols + x // self.space_size
+
+    def position(self, cell: int) -> Tuple[int, int]:
+        return (cell % self.cols) * self.space_size, (cell // self.cols) * self.space_size
+
+    def add(self, x: int, y: int) -> None:
+        if 0 <= x < self.width and 0 <= y < self.height:
+            self.occupy((y // self.space_size) * self.cols + x // self.space_size)
+
+    def remove(self, x: int, y: int) -> None:
+        if 0 <= x < self.width and 0 <= y < self.height:
+            self.vacate((y // self.space_size) * self.cols + x // self.space_size)
+
+    def occupy(self, cell: int) -> None:
+        """`add` by cell index, which must be on the board."""
+        self.version += 1
+        self.counts[cell] += 1
+        if self.counts[cell] == 1:
+            # Swap-remove the cell from the free array.
+            slot = self.slots[cell]
+            last = self.free.pop()
+            if last != cell:
+                self.free[slot] = last
+                self.slots[last] = slot
+            self.slots[cell] = -1
+
+    def vacate(self, cell: int) -> None:
+        """`remove` by cell index, which must be on the board."""
+        self.version += 1
+        self.counts[cell] -= 1
+        if self.counts[cell] == 0:
+            self.slots[cell] = len(self.free)
+            self.free.append(cell)
+
+    def count(self, x: int, y: int) -> int:
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.counts[(y // self.space_size) * self.cols + x // self.space_size]
+        return 0
+
+    def free_count(self) -> int:
+        return len(self.free)
+
+    def random_free_position(self, rng: Optional[random.Random] = None) -> Tuple[int, int]:
+        """
+        A uniformly random unoccupied position.
+
+        :param rng: Generator to draw from; the global `random` module when None.
+        """
+        return self.position(self.random_free_cell(rng))
+
+    def random_free_cell(self, rng: Optional[random.Random] = None) -> int:
+        """`random_free_position` as a cell index."""
+        if not self.free:
+            raise Exception("No available position to place food")
+
+        index = rng.randrange(len(self.free)) if rng is not None else random.randrange(len(self.free))
+        return self.free[index]
+
+    def restore(self, cells: Iterable[int], free: Sequence[int]) -> None:
+        """Occupy `cells` (off-board ones ignored) and make `free` the free cells, in that order; they must be the complement."""
+        self.version += 1
+        self.counts = [0] * self.cell_count
+        for cell in cells:
+            if 0 <= cell < self.cell_count:
+                self.counts[cell] += 1
+        self.free = list(free)
+        self.slots = [-1] * self.cell_count
+        for slot, cell in enumerate(self.free):
+            if self.counts[cell]:
+                raise ValueError(f"Cell {cell} is both occupied and free.")
+            self.slots[cell] = slot
+        if len(self.free) != self.counts.count(0):
+            raise ValueError("Free cells do not match the occupied cells.")
+
+    def clear(self) -> None:
+        self.version += 1
+        self.counts = [0] * self.cell_count
+        self.free = list(range(self.cell_count))
+        self.slots = list(range(self.cell_count))
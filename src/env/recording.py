@@ -0,0 +1,236 @@
+import os
+import struct
+from collections import deque
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+import numpy as np
+from src.env.snake_env import SnakeEnv
+from src.utils.config import GameConfig
+from src.utils.types import State
+
+
+FILE_MAGIC = b'SNAKELOG'
+FILE_VERSION = 1
+FILE_HEADER = struct.Struct('<8sH6x')
+
+RECORD_MAGIC = b'EPIS'
+# magic, episode, seed (-1 if none), steps, score, food spawns, cols, rows, space size, body parts, opening direction
+RECORD_HEADER = struct.Struct('<4sQqIIIHHHHB3x')
+
+
+class EpisodeRecord:
+    """
+    One recorded episode: the action taken at every step and the cell of every food spawn.
+
+    Actions are indices into `SnakeEnv.directions`, one byte per step. Food cells
+    are `row * cols + col`, in spawn order, the first being the episode's opening food.
+    """
+
+    def __init__(
+        self,
+        episode: int,
+        seed: Optional[int],
+        actions: bytes,
+        foods: np.ndarray,
+        score: int,
+        config: GameConfig,
+        opening_direction: str = 'Down'
+    ) -> None:
+        self.episode: int = episode
+        self.seed: Optional[int] = seed  # Seed of the run the episode came from, for reference
+        self.actions: bytes = actions
+        self.foods: np.ndarray = foods
+        self.score: int = score
+        self.config: GameConfig = config
+        self.opening_direction: str = opening_direction
+
+    @property
+    def steps(self) -> int:
+        return len(self.actions)
+
+    def to_bytes(self) -> bytes:
+        config = self.config
+        header = RECORD_HEADER.pack(
+            RECORD_MAGIC, self.episode, -1 if self.seed is None else self.seed, len(self.actions), self.score, len(self.foods),
+            config.cols, config.rows, config.space_size, config.body_parts, SnakeEnv.directions.index(self.opening_direction)
+        )
+        return b''.join([header, self.actions, self.foods.astype('<u4', copy=False).tobytes()])
+
+    @classmethod
+    def from_bytes(cls, header: Tuple[int, ...], payload: bytes) -> 'EpisodeRecord':
+        _, episode, seed, steps, score, food_count, cols, rows, space_size, body_parts, direction = header
+        config = GameConfig.for_board(cols, rows, space_size, body_parts=body_parts)
+        foods = np.frombuffer(payload, dtype='<u4', count=food_count, offset=steps).astype(np.int64)
+        return cls(episode, None if seed < 0 else seed, payload[:steps], foods, score, config, SnakeEnv.directions[direction])
+
+    def __repr__(self) -> str:
+        return f"EpisodeRecord(episode={self.episode}, steps={self.steps}, score={self.score})"
+
+
+class EpisodeRecorder:
+    """
+    Appends episodes played on a `SnakeEnv` to an episode log file.
+
+    `begin` switches on the environment's action and food logs before its
+    `reset`, and `end` writes the episode out; while recording, a step costs one
+    `bytearray.append`. Every `every`-th episode is recorded, with the seed passed
+    to `begin` (or the recorder's `seed` if none was).
+    """
+
+    def __init__(self, file_path: str, every: int = 1, seed: Optional[int] = None) -> None:
+        self.file_path: str = file_path
+        self.every: int = every
+        self.seed: Optional[int] = seed
+        self.file: Optional[BinaryIO] = None
+        self.episode: int = 0
+        self.episode_seed: Optional[int] = seed
+        self.recorded: int = 0
+
+    def begin(self, env: SnakeEnv, episode: int, seed: Optional[int] = None) -> None:
+        """Call before `env.reset()` for episode number `episode`, reset with `seed` (see `SnakeEnv.reseed`)."""
+        self.episode = episode
+        self.episode_seed = self.seed if seed is None else seed
+        if episode % self.every == 0:
+            env.action_log, env.food_log = bytearray(), []
+        else:
+            env.action_log, env.food_log = None, None
+
+    def end(self, env: SnakeEnv) -> None:
+        """Call once the episode begun on `env` is over."""
+        if env.action_log is None or env.food_log is None:
+            return
+        config = GameConfig(env.width, env.height, env.space_size, env.body_parts)
+        record = EpisodeRecord(self.episode, self.episode_seed, bytes(env.action_log), np.array(env.food_log, dtype=np.int64), env.score, config, env.opening_direction)
+        env.action_log, env.food_log = None, None
+        self.write(record)
+
+    def write(self, record: EpisodeRecord) -> None:
+        if self.file is None:
+            directory = os.path.dirname(self.file_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.file = open(self.file_path, 'ab')
+            if self.file.tell() == 0:
+                self.file.write(FILE_HEADER.pack(FILE_MAGIC, FILE_VERSION))
+        self.file.write(record.to_bytes())
+        self.recorded += 1
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class EpisodeLog:
+    """
+    Reads an episode log file written by `EpisodeRecorder`.
+
+    Opening it reads only the record headers, so any episode can be loaded by
+    position without parsing the others. A record cut short by a crash at the end
+    of the file is ignored; `refresh` picks up episodes appended since.
+    """
+
+    def __init__(self, file_path: str) -> None:
+        self.file_path: str = file_path
+        self.offsets: List[int] = []  # File offset of each record's header
+        self.headers: List[Tuple[int, ...]] = []
+        self.end: int = FILE_HEADER.size
+        with open(file_path, 'rb') as f:
+            magic, version = FILE_HEADER.unpack(f.read(FILE_HEADER.size))
+        if magic != FILE_MAGIC:
+            raise ValueError(f"{file_path} is not an episode log.")
+        if version != FILE_VERSION:
+            raise ValueError(f"{file_path} has episode log version {version}, expected {FILE_VERSION}.")
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Index the records appended since the file was last read."""
+        size = os.path.getsize(self.file_path)
+        with open(self.file_path, 'rb') as f:
+            f.seek(self.end)
+            while self.end + RECORD_HEADER.size <= size:
+                header = RECORD_HEADER.unpack(f.read(RECORD_HEADER.size))
+                if header[0] != RECORD_MAGIC:
+                    raise ValueError(f"{self.file_path} is corrupt at offset {self.end}.")
+                record_end = self.end + RECORD_HEADER.size + header[3] + 4 * header[5]
+                if record_end > size:
+                    break
+                self.offsets.append(self.end)
+                self.headers.append(header)
+                f.seek(record_end)
+                self.end = record_end
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __getitem__(self, index: int) -> EpisodeRecord:
+        header = self.headers[index]
+        with open(self.file_path, 'rb') as f:
+            f.seek(self.offsets[index] + RECORD_HEADER.size)
+            payload = f.read(header[3] + 4 * header[5])
+        return EpisodeRecord.from_bytes(header, payload)
+
+    def episodes(self) -> List[int]:
+        return [header[1] for header in self.headers]
+
+    def find(self, episode: int) -> EpisodeRecord:
+        """The last record of episode number `episode`."""
+        for index in range(len(self.headers) - 1, -1, -1):
+            if self.headers[index][1] == episode:
+                return self[index]
+        raise KeyError(f"Episode {episode} is not in {self.file_path}.")
+
+
+class EpisodeReplay:
+    """
+    Re-simulates a recorded episode on a `SnakeEnv`, step by step.
+
+    Food spawns are taken from the record rather than drawn, so the replay does
+    not depend on RNG state. `seek` moves to any step, re-simulating from the
+    start when going backwards.
+    """
+
+    def __init__(self, record: EpisodeRecord) -> None:
+        self.record: EpisodeRecord = record
+        self.env: SnakeEnv = SnakeEnv.from_config(record.config, record.opening_direction)
+        self.step_index: int = 0
+        self.reset()
+
+    def reset(self) -> State:
+        self.env.scripted_food = deque(int(cell) for cell in self.record.foods)
+        self.step_index = 0
+        return self.env.reset()
+
+    @property
+    def done(self) -> bool:
+        return self.step_index >= self.record.steps or self.env.done
+
+    def step(self) -> bool:
+        """Play the next recorded action. Returns False once the episode is over."""
+        if self.done:
+            return False
+        self.env.move(self.record.actions[self.step_index])
+        self.step_index += 1
+        if self.done:
+            self.check()
+        return not self.done
+
+    def seek(self, step: int) -> None:
+        step = max(0, min(step, self.record.steps))
+        if step < self.step_index:
+            self.reset()
+        while self.step_index < step:
+            self.step()
+
+    def check(self) -> None:
+        """Raise if the episode ended differently from the recording."""
+        if self.step_index != self.record.steps or self.env.score != self.record.score:
+            raise RuntimeError(
+                f"Replay of episode {self.record.episode} diverged: step {self.step_index}/{self.record.steps}, "
+                f"score {self.env.score} (recorded {self.record.score})."
+            )
+
+    def states(self) -> Iterator[State]:
+        """The `State` after every remaining step."""
+        while not self.done:
+            self.step()
+            yield self.env.get_state()
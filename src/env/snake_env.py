@@ -0,0 +1,199 @@
+import random
+from collections import deque
+from itertools import islice
+from typing import Deque, List, Optional, Sequence, Tuple
+from src.env.directions import DIRECTIONS, OFF_BOARD, TURNS, next_cell_table, pixel_deltas
+from src.env.occupancy import OccupancyGrid
+from src.utils.config import GameConfig
+from src.utils.types import State, StepResult
+from src.utils.constants import GAME_WIDTH, GAME_HEIGHT, SPACE_SIZE, BODY_PARTS, FOOD_REWARD, DEATH_REWARD, STEP_REWARD
+
+
+class SnakeEnv:
+    """
+    Headless Snake simulation with the same rules as the Tk `Game`.
+
+    Coordinates are kept in pixels (multiples of `space_size`) so the states it
+    produces are interchangeable with `Game.get_state` and existing Q-tables.
+    Alongside them the body is kept as cell indices and the heading as an index
+    into `directions`, so a move, its reversal filtering and its border test are
+    table lookups (`TURNS`, `next_cell_table`).
+    """
+
+    directions: List[str] = list(DIRECTIONS)
+
+    def __init__(
+        self,
+        width: int = GAME_WIDTH,
+        height: int = GAME_HEIGHT,
+        space_size: int = SPACE_SIZE,
+        body_parts: int = BODY_PARTS,
+        opening_direction: str = 'Down',
+        seed: Optional[int] = None
+    ) -> None:
+        self.width: int = width
+        self.height: int = height
+        self.space_size: int = space_size
+        self.body_parts: int = body_parts
+        self.opening_direction: str = opening_direction
+        self.rng: random.Random = random.Random(seed)
+
+        self.coordinates: Deque[List[int]] = deque()
+        self.cells: Deque[int] = deque()  # Cell of each segment, head first; `OFF_BOARD` for a head past the border
+        self.occupancy: OccupancyGrid = OccupancyGrid(width, height, space_size)
+        self.next_cell: List[int] = next_cell_table(width // space_size, height // space_size)
+        self.pixel_deltas: Tuple[Tuple[int, int], ...] = pixel_deltas(space_size)
+        self.food: List[int] = [0, 0]
+        self.food_cell: int = 0
+        self.direction: int = self.directions.index(opening_direction)
+        self.score: int = 0
+        self.steps: int = 0
+        self.done: bool = True
+
+        # Set by `EpisodeRecorder` and `EpisodeReplay`; see src/env/recording.py.
+        self.action_log: Optional[bytearray] = None  # Every action passed to `move`
+        self.food_log: Optional[List[int]] = None  # Cell of every food spawn
+        self.scripted_food: Deque[int] = deque()  # Cells to spawn food on instead of drawing them
+
+    @classmethod
+    def from_config(cls, config: GameConfig, opening_direction: str = 'Down', seed: Optional[int] = None) -> 'SnakeEnv':
+        return cls(config.width, config.height, config.space_size, config.body_parts, opening_direction, seed)
+
+    def seed(self, seed: Optional[int] = None) -> None:
+        self.rng.seed(seed)
+
+    def reseed(self) -> int:
+        """Reseed with a seed drawn from the current RNG and return it, for logging the seed an episode was reset with."""
+        seed = self.rng.getrandbits(63)
+        self.rng.seed(seed)
+        return seed
+
+    def reset(self) -> State:
+        """Start a new episode and return its initial state."""
+        # Vacate the previous body instead of clearing the grid, so a reset costs O(length) rather than O(cells).
+        for cell in self.cells:
+            if cell != OFF_BOARD:
+                self.occupancy.vacate(cell)
+        self.coordinates = deque([0, 0] for _ in range(self.body_parts))
+        self.cells = deque(0 for _ in range(self.body_parts))
+        for cell in self.cells:
+            self.occupancy.occupy(cell)
+        self.direction = self.directions.index(self.opening_direction)
+        self.score = 0
+        self.steps = 0
+        self.done = False
+        self.food = self.place_food()
+        return self.get_state()
+
+    def step(self, action: int) -> StepResult:
+        """
+        Advance the game by one tick.
+
+        :param action: Index into `directions`. Reversing onto the body is ignored, as in `Direction.change_direction`.
+        :return: The state after the move, the reward and whether the episode ended.
+        """
+        reward, done = self.move(action)
+        return self.get_state(), reward, done
+
+    def move(self, action: int) -> Tuple[int, bool]:
+        """Apply `action` without building the next `State`. Runs in constant time regardless of length."""
+        if self.done:
+            raise RuntimeError("Episode is over, call reset() before step().")
+        if self.action_log is not None:
+            self.action_log.append(action)
+
+        direction = self.direction = TURNS[self.direction][action]
+        cell = self.next_cell[self.cells[0] * 4 + direction]
+        dx, dy = self.pixel_deltas[direction]
+        x, y = self.coordinates[0]
+
+        self.coordinates.appendleft([x + dx, y + dy])
+        self.cells.appendleft(cell)
+        if cell != OFF_BOARD:
+            self.occupancy.occupy(cell)
+        self.steps += 1
+
+        if cell == self.food_cell:
+            self.score += 1
+            reward = FOOD_REWARD
+            if len(self.coordinates) >= self.cell_count():
+                # The snake fills the board, there is nowhere left to place food.
+                self.done = True
+            else:
+                self.food = self.place_food()
+        else:
+            self.coordinates.pop()
+            self.occupancy.vacate(self.cells.pop())  # Only the head can be off the board
+            if cell == OFF_BOARD or self.occupancy.counts[cell] > 1:
+                reward = DEATH_REWARD
+                self.done = True
+            else:
+                reward = STEP_REWARD
+
+        return reward, self.done
+
+    def cell_count(self) -> int:
+        return (self.width // self.space_size) * (self.height // self.space_size)
+
+    def is_border_collision(self) -> bool:
+        return self.cells[0] == OFF_BOARD
+
+    def is_self_collision(self) -> bool:
+        # The head is counted in its own cell, so any other segment there makes two.
+        head = self.cells[0]
+        return head != OFF_BOARD and self.occupancy.counts[head] > 1
+
+    def place_food(self) -> List[int]:
+        """Draw the next food cell, setting `food_cell`, and return its position."""
+        if self.scripted_food:
+            self.food_cell = self.scripted_food.popleft()
+        else:
+            self.food_cell = self.occupancy.random_free_cell(self.rng)
+        if self.food_log is not None:
+            self.food_log.append(self.food_cell)
+        x, y = self.occupancy.position(self.food_cell)
+        return [x, y]
+
+    def place_snake(self, cells: Sequence[int], direction: int) -> None:
+        """Lay the snake on `cells`, head first, heading `direction`, in place of the current body."""
+        self.coordinates = deque(list(self.occupancy.position(cell)) for cell in cells)
+        self.cells = deque(cells)
+        self.occupancy.clear()
+        for cell in self.cells:
+            self.occupancy.occupy(cell)
+        self.direction = direction
+
+    def board_state(self) -> Tuple[List[int], List[int]]:
+        """
+        The body's cells and the free cells in the order food is drawn from them.
+
+        Together with `rng` they decide where every later food goes: `reset` only
+        vacates the old body, so the free-cell order depends on earlier episodes.
+        """
+        return list(self.cells), list(self.occupancy.free)
+
+    def restore_board_state(self, cells: Sequence[int], free: Sequence[int]) -> None:
+        """Put back a `board_state`, so the following episodes are the ones the saved game would have played."""
+        for cell in self.cells:
+            if cell != OFF_BOARD:
+                self.occupancy.vacate(cell)
+        self.cells = deque(cells)
+        self.coordinates = deque(list(self.occupancy.position(cell)) if cell != OFF_BOARD else [-self.space_size, -self.space_size] for cell in cells)
+        self.occupancy.restore(self.cells, free)
+        self.done = True
+
+    def get_state(self) -> State:
+        head_x, head_y = self.coordinates[0]
+        food_x, food_y = self.food
+
+        return State(
+            head=(head_x, head_y),
+            food=(food_x, food_y),
+            body=list(islice(self.coordinates, 1, None)),
+            near_border=(
+                head_x == 0 or head_x == self.width - self.space_size,
+                head_y == 0 or head_y == self.height - self.space_size
+            ),
+            occupancy=self.occupancy,
+            occupancy_version=self.occupancy.version
+        )
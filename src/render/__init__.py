@@ -0,0 +1,14 @@
+from typing import TYPE_CHECKING, Any
+from .scheduler import RenderScheduler, SPEED_MODES
+from .renderer import Renderer
+from .canvas_renderer import CanvasRenderer
+from .renderers import RENDERERS, get_renderer, get_renderer_class
+
+if TYPE_CHECKING:
+    from .tile_renderer import TileRenderer
+
+
+def __getattr__(name: str) -> Any:
+    if name != 'TileRenderer':
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return get_renderer_class('tiles')  # Needs NumPy, so only imported on first use
@@ -0,0 +1,104 @@
+import time
+from collections import deque
+from tkinter import Canvas
+from typing import Any, Deque, List, Optional, Sequence, Tuple
+from src.render.renderer import Renderer
+
+
+class CanvasRenderer(Renderer):
+    """
+    Draws the snake and food from a pool of reused canvas items.
+
+    Each body segment owns one rectangle, head first. When the snake has moved
+    `k` steps since the last frame, the `k` rectangles freed at the tail are moved
+    to the new head positions with `coords` and only the old and new head are
+    recolored, so a frame costs O(k) canvas calls whatever the snake's length.
+    Frames in which nothing moved make no canvas calls at all. Rectangles that are
+    not needed are parked off the board instead of being deleted.
+    """
+
+    name = 'canvas'
+
+    def __init__(self, canvas: Canvas, *args: Any, **kwargs: Any) -> None:
+        super().__init__(canvas, *args, **kwargs)
+        self.items: Deque[int] = deque()  # One rectangle per segment, head first
+        self.spare: List[int] = []  # Rectangles parked off the board
+        self.head_item: Optional[int] = None
+        self.food_item: Optional[int] = None
+        self.food_position: Optional[Tuple[int, int]] = None
+        self.items_created: int = 0
+
+    def draw(self, coordinates: Sequence[Sequence[int]], food: Sequence[int], episode: int, steps: int) -> bool:
+        moved = self.moved_since_last_frame(episode, steps)
+        if moved == 0 and self.food_position == (food[0], food[1]):
+            return False
+
+        start = time.perf_counter()
+        self.show()
+        if 0 < moved < len(coordinates):
+            self.advance(coordinates, moved)
+        elif moved != 0:
+            self.sync(coordinates)
+        self.recolor_head()
+        self.place_food(food[0], food[1])
+        self.episode, self.steps = episode, steps
+        self.record_frame(start)
+        return True
+
+    def advance(self, coordinates: Sequence[Sequence[int]], moved: int) -> None:
+        """Move tail rectangles to the `moved` newest head positions; the rest of the body is already in place."""
+        kept = min(len(self.items), len(coordinates) - moved)
+        freed = [self.items.pop() for _ in range(len(self.items) - kept)]
+
+        for index in range(moved - 1, -1, -1):
+            item = freed.pop() if freed else self.take_item()
+            x, y = coordinates[index]
+            self.canvas.coords(item, x, y, x + self.space_size, y + self.space_size)
+            self.items.appendleft(item)
+
+        for item in freed:
+            self.park_item(item)
+
+    def sync(self, coordinates: Sequence[Sequence[int]]) -> None:
+        """Place every rectangle, used when the previous frame is unrelated to this one."""
+        while len(self.items) < len(coordinates):
+            self.items.append(self.take_item())
+        while len(self.items) > len(coordinates):
+            self.park_item(self.items.pop())
+
+        for item, (x, y) in zip(self.items, coordinates):
+            self.canvas.coords(item, x, y, x + self.space_size, y + self.space_size)
+
+    def recolor_head(self) -> None:
+        head_item = self.items[0] if self.items else None
+        if head_item == self.head_item:
+            return
+        if self.head_item is not None:
+            self.canvas.itemconfigure(self.head_item, fill=self.snake_color)
+        if head_item is not None:
+            self.canvas.itemconfigure(head_item, fill=self.head_color)
+        self.head_item = head_item
+
+    def place_food(self, x: int, y: int) -> None:
+        if self.food_position == (x, y):
+            return
+        if self.food_item is None:
+            self.food_item = self.canvas.create_oval(x, y, x + self.space_size, y + self.space_size, fill=self.food_color, tags=(self.tag, "food"))
+            self.items_created += 1
+        else:
+            self.canvas.coords(self.food_item, x, y, x + self.space_size, y + self.space_size)
+        self.food_position = (x, y)
+
+    def take_item(self) -> int:
+        if self.spare:
+            return self.spare.pop()
+        self.items_created += 1
+        return self.canvas.create_rectangle(0, 0, 0, 0, fill=self.snake_color, tags=(self.tag, "snake"))
+
+    def park_item(self, item: int) -> None:
+        offset = -2 * self.space_size
+        self.canvas.coords(item, offset, offset, offset + self.space_size, offset + self.space_size)
+        self.spare.append(item)
+
+    def item_count(self) -> int:
+        return len(self.items) + len(self.spare) + (self.food_item is not None)
@@ -0,0 +1,79 @@
+import time
+from abc import ABC, abstractmethod
+from tkinter import Canvas
+from typing import Optional, Sequence
+from src.utils.constants import GAME_WIDTH, GAME_HEIGHT, SPACE_SIZE, SNAKE_COLOR, SNAKE_HEAD_COLOR, FOOD_COLOR
+
+
+class Renderer(ABC):
+    """
+    Draws the snake and food on a Tk canvas.
+
+    Renderers are given the whole game every frame along with its episode and
+    step counters, and work out from those what has changed since the last frame.
+    Every item they create carries `tag`, so they can be hidden and shown as a whole.
+    """
+
+    name: str = ''
+    tag: str = "board"
+
+    def __init__(
+        self,
+        canvas: Canvas,
+        width: int = GAME_WIDTH,
+        height: int = GAME_HEIGHT,
+        space_size: int = SPACE_SIZE,
+        snake_color: str = SNAKE_COLOR,
+        head_color: str = SNAKE_HEAD_COLOR,
+        food_color: str = FOOD_COLOR
+    ) -> None:
+        self.canvas: Canvas = canvas
+        self.width: int = width
+        self.height: int = height
+        self.space_size: int = space_size
+        self.snake_color: str = snake_color
+        self.head_color: str = head_color
+        self.food_color: str = food_color
+
+        self.episode: Optional[int] = None
+        self.steps: int = 0
+        self.hidden: bool = False
+
+        self.frames: int = 0
+        self.render_time: float = 0.0
+        self.last_frame_time: float = 0.0
+
+    @abstractmethod
+    def draw(self, coordinates: Sequence[Sequence[int]], food: Sequence[int], episode: int, steps: int) -> bool:
+        """
+        Bring the canvas in line with the game.
+
+        :param coordinates: Segment positions in pixels, head first.
+        :param episode: Identifies the game being shown; a new value redraws every segment.
+        :param steps: Moves made in this episode so far. Segments that moved since the last frame are derived from it.
+        :return: Whether anything on the canvas changed.
+        """
+
+    def moved_since_last_frame(self, episode: int, steps: int) -> int:
+        """Moves made since the last frame, or -1 when the last frame cannot be built on."""
+        return steps - self.steps if episode == self.episode and not self.hidden else -1
+
+    def show(self) -> None:
+        if self.hidden:
+            self.canvas.itemconfigure(self.tag, state='normal')
+            self.hidden = False
+
+    def hide(self) -> None:
+        """Hide the snake and food, keeping the items for the next `draw`."""
+        if not self.hidden:
+            self.canvas.itemconfigure(self.tag, state='hidden')
+            self.hidden = True
+
+    def record_frame(self, start: float) -> None:
+        self.last_frame_time = time.perf_counter() - start
+        self.render_time += self.last_frame_time
+        self.frames += 1
+
+    def mean_frame_time(self) -> float:
+        """Average seconds spent in frames that changed the canvas."""
+        return self.render_time / self.frames if self.frames else 0.0
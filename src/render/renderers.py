@@ -0,0 +1,24 @@
+import importlib
+from tkinter import Canvas
+from typing import Any, Dict, Tuple, Type
+from src.render.renderer import Renderer
+
+
+# Renderer name to (module, class). Modules are imported when a renderer is first asked for,
+# so the tile renderer's NumPy import is only paid by games that use it.
+RENDERERS: Dict[str, Tuple[str, str]] = {
+    'canvas': ('src.render.canvas_renderer', 'CanvasRenderer'),
+    'tiles': ('src.render.tile_renderer', 'TileRenderer'),
+}
+
+
+def get_renderer_class(name: str) -> Type[Renderer]:
+    if name not in RENDERERS:
+        raise ValueError(f"Unknown renderer '{name}', expected one of {sorted(RENDERERS)}.")
+    module_name, class_name = RENDERERS[name]
+    renderer_class: Type[Renderer] = getattr(importlib.import_module(module_name), class_name)
+    return renderer_class
+
+
+def get_renderer(name: str, canvas: Canvas, *args: Any, **kwargs: Any) -> Renderer:
+    return get_renderer_class(name)(canvas, *args, **kwargs)
@@ -0,0 +1,131 @@
+import time
+from typing import Any, Callable, Dict, Optional
+from src.utils.constants import SPEED
+
+
+# Simulation steps per `SPEED` ms tick for the fixed-rate modes; None runs as fast as possible.
+SPEED_MODES: Dict[str, Optional[int]] = {
+    '1x': 1,
+    '10x': 10,
+    'max': None,
+    'off': None,  # As fast as possible, without rendering
+}
+
+
+class RenderScheduler:
+    """
+    Runs simulation steps in slices of the Tk event loop and redraws at a bounded rate.
+
+    In the fixed-rate modes it runs `SPEED_MODES[mode]` steps every `tick_ms`. In
+    `max` and `off` it steps until `slice_ms` have passed, then yields to the event
+    loop for a millisecond so key bindings stay responsive. Frames are drawn at most
+    `target_fps` times a second (or every `render_every` steps, if set); `off` never draws.
+    """
+
+    def __init__(
+        self,
+        after: Callable[[int, Callable[[], None]], Any],
+        step: Callable[[], bool],
+        render: Callable[[], None],
+        is_active: Callable[[], bool],
+        mode: str = '1x',
+        tick_ms: int = SPEED,
+        target_fps: float = 30.0,
+        render_every: Optional[int] = None,
+        slice_ms: float = 15.0
+    ) -> None:
+        self.after = after
+        self.step = step
+        self.render = render
+        self.is_active = is_active
+        self.mode: str = '1x'
+        self.tick_ms: int = tick_ms
+        self.target_fps: float = target_fps
+        self.render_every: Optional[int] = render_every
+        self.slice_ms: float = slice_ms
+        self.pending: bool = False
+        self.in_tick: bool = False
+        self.last_render: float = 0.0
+        self.steps_since_render: int = 0
+        self.total_steps: int = 0
+        self.frames: int = 0
+        self.steps_per_second: float = 0.0
+        self._rate_start: float = time.perf_counter()
+        self._rate_steps: int = 0
+        self.set_mode(mode)
+
+    def set_mode(self, mode: str) -> None:
+        if mode not in SPEED_MODES:
+            raise ValueError(f"Unknown speed mode '{mode}', expected one of {list(SPEED_MODES)}.")
+        self.mode = mode
+
+    def cycle_mode(self) -> str:
+        modes = list(SPEED_MODES)
+        self.set_mode(modes[(modes.index(self.mode) + 1) % len(modes)])
+        return self.mode
+
+    def start(self) -> None:
+        """Schedule the next slice, unless one is already scheduled or running."""
+        if self.pending or self.in_tick:
+            return
+        self.pending = True
+        self.after(0, self.tick)
+
+    def tick(self) -> None:
+        self.pending = False
+        if not self.is_active():
+            return
+
+        self.in_tick = True
+        try:
+            keep_running = self.run_slice()
+        finally:
+            self.in_tick = False
+
+        if keep_running and self.is_active():
+            self.pending = True
+            self.after(self.tick_ms if SPEED_MODES[self.mode] is not None else 1, self.tick)
+
+    def run_slice(self) -> bool:
+        steps_per_tick = SPEED_MODES[self.mode]
+        deadline = time.perf_counter() + self.slice_ms / 1000
+        keep_running = True
+        steps = 0
+
+        while keep_running:
+            keep_running = self.step()
+            steps += 1
+            self.steps_since_render += 1
+            if steps_per_tick is not None:
+                if steps >= steps_per_tick:
+                    break
+            elif time.perf_counter() >= deadline:
+                break
+
+        self.total_steps += steps
+        self.update_rate(steps)
+        if keep_running and self.is_render_due():
+            self.render_frame()
+        return keep_running
+
+    def is_render_due(self) -> bool:
+        if self.mode == 'off':
+            return False
+        if self.mode == '1x':
+            return True
+        if self.render_every is not None:
+            return self.steps_since_render >= self.render_every
+        return time.perf_counter() - self.last_render >= 1 / self.target_fps
+
+    def render_frame(self) -> None:
+        self.render()
+        self.frames += 1
+        self.steps_since_render = 0
+        self.last_render = time.perf_counter()
+
+    def update_rate(self, steps: int) -> None:
+        self._rate_steps += steps
+        elapsed = time.perf_counter() - self._rate_start
+        if elapsed >= 1.0:
+            self.steps_per_second = self._rate_steps / elapsed
+            self._rate_start, self._rate_steps = time.perf_counter(), 0
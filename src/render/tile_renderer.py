@@ -0,0 +1,127 @@
+import time
+from collections import deque
+from tkinter import NW, Canvas, PhotoImage
+from typing import Any, Deque, Optional, Sequence, Set, Tuple
+import numpy as np
+from src.render.renderer import Renderer
+from src.utils.constants import BACKGROUND_COLOR
+
+
+EMPTY, BODY, HEAD, FOOD = 0, 1, 2, 3  # Palette indices
+
+
+class TileRenderer(Renderer):
+    """
+    Draws the whole board into one `PhotoImage` from NumPy arrays, for boards too big for one canvas item per segment.
+
+    A per-cell segment count is updated for the cells that changed since the last
+    frame (O(k) for `k` moves, as in `CanvasRenderer`), and only the pixel rows of
+    board rows that changed are rebuilt and uploaded, as binary PPM, with `put`.
+    Food is drawn as a filled tile rather than an oval.
+    """
+
+    name = 'tiles'
+
+    def __init__(self, canvas: Canvas, *args: Any, background_color: str = BACKGROUND_COLOR, **kwargs: Any) -> None:
+        super().__init__(canvas, *args, **kwargs)
+        self.cols: int = self.width // self.space_size
+        self.rows: int = self.height // self.space_size
+        self.palette: np.ndarray = np.array(
+            [[channel >> 8 for channel in canvas.winfo_rgb(color)] for color in (background_color, self.snake_color, self.head_color, self.food_color)],
+            dtype=np.uint8
+        )
+
+        self.counts: np.ndarray = np.zeros((self.rows, self.cols), dtype=np.int32)  # Segments per cell
+        self.segments: Deque[Tuple[int, int]] = deque()  # (col, row) per segment as drawn, head first
+        self.head_cell: Optional[Tuple[int, int]] = None
+        self.food_cell: Optional[Tuple[int, int]] = None
+        self.dirty_rows: Set[int] = set()
+        self.rows_uploaded: int = 0
+
+        self.image: PhotoImage = PhotoImage(width=self.cols * self.space_size, height=self.rows * self.space_size)
+        self.item: int = canvas.create_image(0, 0, anchor=NW, image=self.image, tags=(self.tag,))
+        self.upload(0, self.rows)
+
+    def draw(self, coordinates: Sequence[Sequence[int]], food: Sequence[int], episode: int, steps: int) -> bool:
+        food_cell = (food[0] // self.space_size, food[1] // self.space_size)
+        moved = self.moved_since_last_frame(episode, steps)
+        if moved == 0 and self.food_cell == food_cell:
+            return False
+
+        start = time.perf_counter()
+        self.show()
+        if 0 < moved < len(coordinates):
+            self.advance(coordinates, moved)
+        elif moved != 0:
+            self.sync(coordinates)
+        self.move_marker('head_cell', self.segments[0] if self.segments else None)
+        self.move_marker('food_cell', food_cell)
+        self.flush()
+        self.episode, self.steps = episode, steps
+        self.record_frame(start)
+        return True
+
+    def advance(self, coordinates: Sequence[Sequence[int]], moved: int) -> None:
+        kept = min(len(self.segments), len(coordinates) - moved)
+        for _ in range(len(self.segments) - kept):
+            self.remove_segment(*self.segments.pop())
+        for index in range(moved - 1, -1, -1):
+            x, y = coordinates[index]
+            self.add_segment(x // self.space_size, y // self.space_size)
+
+    def sync(self, coordinates: Sequence[Sequence[int]]) -> None:
+        self.counts[:] = 0
+        self.segments.clear()
+        self.dirty_rows.update(range(self.rows))
+        for x, y in reversed(coordinates):
+            self.add_segment(x // self.space_size, y // self.space_size)
+
+    def add_segment(self, col: int, row: int) -> None:
+        self.segments.appendleft((col, row))
+        if 0 <= col < self.cols and 0 <= row < self.rows:
+            self.counts[row, col] += 1
+            self.dirty_rows.add(row)
+
+    def remove_segment(self, col: int, row: int) -> None:
+        if 0 <= col < self.cols and 0 <= row < self.rows:
+            self.counts[row, col] -= 1
+            self.dirty_rows.add(row)
+
+    def move_marker(self, name: str, cell: Optional[Tuple[int, int]]) -> None:
+        """Point the head or food marker at `cell`, dirtying the rows it leaves and enters."""
+        previous = getattr(self, name)
+        if previous == cell:
+            return
+        for marked in (previous, cell):
+            if marked is not None and 0 <= marked[1] < self.rows:
+                self.dirty_rows.add(marked[1])
+        setattr(self, name, cell)
+
+    def flush(self) -> None:
+        """Upload the dirty rows, one `put` per run of adjacent rows."""
+        rows = sorted(self.dirty_rows)
+        self.dirty_rows.clear()
+        start = 0
+        for i in range(1, len(rows) + 1):
+            if i == len(rows) or rows[i] != rows[i - 1] + 1:
+                self.upload(rows[start], rows[i - 1] + 1)
+                start = i
+
+    def tiles(self, first_row: int, last_row: int) -> np.ndarray:
+        """Palette index of every cell in rows `first_row` to `last_row` (exclusive)."""
+        tiles = np.where(self.counts[first_row:last_row] > 0, BODY, EMPTY).astype(np.uint8)
+        for cell, index in ((self.food_cell, FOOD), (self.head_cell, HEAD)):
+            if cell is not None and first_row <= cell[1] < last_row and 0 <= cell[0] < self.cols:
+                if index == HEAD or tiles[cell[1] - first_row, cell[0]] == EMPTY:
+                    tiles[cell[1] - first_row, cell[0]] = index
+        return tiles
+
+    def upload(self, first_row: int, last_row: int) -> None:
+        rows, size = last_row - first_row, self.space_size
+        # Widen each board row to pixels once, then copy it down to fill the tile height.
+        row_pixels = np.repeat(self.palette[self.tiles(first_row, last_row)], size, axis=1)
+        pixels = np.empty((rows, size, self.cols * size, 3), dtype=np.uint8)
+        pixels[...] = row_pixels[:, None]
+        data = b''.join([b'P6 %d %d 255\n' % (self.cols * size, rows * size), pixels.data])
+        self.image.put(data, to=(0, first_row * size))  # type: ignore
+        self.rows_uploaded += last_row - first_row
@@ -0,0 +1,8 @@
+from .episodes import Learn, run_episode
+from .parallel import ParallelTrainer, merge_deltas, measure_scaling
+from .checkpoint import Checkpointer, load_trainer_state, restore_trainer_state, snapshot_q_table
+from .instrumentation import Instrumentation, instrument_agent, instrument_env
+from .metrics import EPISODE_DTYPE, MetricsWriter, load_metrics, moving_average
+from .evaluation import CAUSES, EvaluationResult, evaluate, greedy_action, run_episodes
+from .scaling import measure_board_scaling, train_on_board
+from .sweep import DEFAULT_SPACE, PARAMETERS, EarlyStopping, SweepResult, grid_search, random_search, sweep
@@ -0,0 +1,215 @@
+import os
+import glob
+import time
+import pickle
+import random
+import shutil
+import threading
+import functools
+from typing import Callable, Optional, Sequence, Tuple
+import numpy as np
+from src.agent import Agent, BatchedLearner, DQNAgent, QLearningAgent, QTableStore
+from src.agent.dqn import save_network_file
+from src.agent.weights import write_q_table_file
+from src.env import SnakeEnv
+from src.utils.types import EncodedState, TrainerState
+
+
+CHECKPOINT_VERSION = 2
+
+
+def snapshot_q_table(agent: QLearningAgent) -> Tuple[Sequence[EncodedState], np.ndarray]:
+    """Copy the agent's keys and Q-values so they can be written while training continues; a `QTableStore` leaves out its all-zero rows."""
+    if agent.q_values is not None:
+        return range(len(agent.q_values)), agent.q_values.copy()
+
+    q_table_root = agent.q_table['__root__']
+    if isinstance(q_table_root, QTableStore):
+        return q_table_root.saved_rows()
+
+    keys = list(q_table_root)
+    return keys, np.array([q_table_root[key] for key in keys], dtype=np.float32).reshape(len(keys), -1)
+
+
+def write_trainer_state(file_path: str, state: TrainerState) -> None:
+    """Pickle `state` to a temporary file and rename it over `file_path`."""
+    directory = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{file_path}.tmp"
+    with open(temp_path, 'wb') as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, file_path)
+
+
+def load_trainer_state(file_path: str) -> Optional[TrainerState]:
+    if not os.path.exists(file_path):
+        return None
+    with open(file_path, 'rb') as f:
+        state: TrainerState = pickle.load(f)
+    if state.get('version') not in (1, CHECKPOINT_VERSION):
+        raise ValueError(f"{file_path} has checkpoint version {state.get('version')}, expected {CHECKPOINT_VERSION}.")
+    return state
+
+
+def restore_trainer_state(agent: Agent, state: TrainerState, env: Optional[SnakeEnv] = None) -> None:
+    """
+    Put the agent's epsilon, the random generators and the food order back where a checkpoint left them.
+
+    :param env: The game, whose food generator and board are restored; the global `random` module's state is when None.
+    """
+    agent.epsilon = state['epsilon']
+    np.random.set_state(state['numpy_rng'])
+    if env is not None:
+        env.rng.setstate(state['python_rng'])
+        if 'board' in state:
+            env.restore_board_state(*state['board'])
+    else:
+        random.setstate(state['python_rng'])
+
+
+class Checkpointer:
+    """
+    Writes periodic checkpoints (Q-table file plus trainer state) from a background thread.
+
+    The Q-table, or a `DQNAgent`'s network, is copied on the training thread, then
+    hashed, pickled and written by the worker thread, so a save costs training
+    little more than a memcpy. Each checkpoint's weights go to a file of their
+    own, `<weights>.<id>`. The trainer state names that file and is renamed into
+    place last, so it always pairs with the weights it was saved with. The
+    weights are then hard-linked to `q_table_file_path` for everything else that
+    reads them, and the previous checkpoint's file is deleted.
+
+    A `DQNAgent`'s target network, Adam state, replay buffer and RNG, and those
+    of `learner`, are saved in the trainer state too, so resuming carries on
+    where training stopped. A `QTableStore`'s visit counts and access times are
+    not saved, so its eviction order starts afresh.
+    """
+
+    def __init__(
+        self,
+        q_table_file_path: str,
+        state_file_path: str,
+        every_episodes: Optional[int] = 100,
+        every_seconds: Optional[float] = 60.0,
+        learner: Optional[BatchedLearner] = None
+    ) -> None:
+        self.q_table_file_path: str = q_table_file_path
+        self.state_file_path: str = state_file_path
+        self.every_episodes: Optional[int] = every_episodes
+        self.every_seconds: Optional[float] = every_seconds
+        self.last_episode: int = 0
+        self.last_time: float = time.monotonic()
+        self.thread: Optional[threading.Thread] = None
+        self.learner: Optional[BatchedLearner] = learner
+        self.saves: int = 0
+
+    def is_due(self, episode: int) -> bool:
+        if self.every_episodes and episode - self.last_episode >= self.every_episodes:
+            return True
+        return bool(self.every_seconds and time.monotonic() - self.last_time >= self.every_seconds)
+
+    def is_busy(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def maybe_save(self, agent: Agent, reset_count: int, total_reward: int, env: Optional[SnakeEnv] = None) -> bool:
+        """Start a background checkpoint if one is due and the previous one has finished."""
+        if not self.is_due(reset_count) or self.is_busy():
+            return False
+        self.save(agent, reset_count, total_reward, env, background=True)
+        return True
+
+    def save(self, agent: Agent, reset_count: int, total_reward: int, env: Optional[SnakeEnv] = None, background: bool = False) -> None:
+        """
+        Checkpoint the agent and trainer state.
+
+        :param env: The game, whose food generator and board decide the food of later episodes; the global `random` module's state is saved when None.
+        """
+        self.wait()
+        weights_file_path = f"{self.q_table_file_path}.{time.time_ns()}"
+        write_weights: Callable[[], None]
+        if isinstance(agent, DQNAgent):
+            write_weights = functools.partial(save_network_file, weights_file_path, agent.weights_snapshot())
+        else:
+            keys, values = snapshot_q_table(agent)
+            write_weights = functools.partial(write_q_table_file, weights_file_path, keys, values, agent.encoder.name)
+        state = TrainerState(
+            version=CHECKPOINT_VERSION,
+            encoder=agent.encoder.name,
+            epsilon=agent.epsilon,
+            reset_count=reset_count,
+            total_reward=total_reward,
+            numpy_rng=np.random.get_state(),
+            python_rng=env.rng.getstate() if env is not None else random.getstate(),
+            saved_at=time.time(),
+            weights_file=os.path.basename(weights_file_path)
+        )
+        if env is not None:
+            state['board'] = env.board_state()
+        if isinstance(agent, DQNAgent):
+            state['agent_state'] = agent.training_state()
+        if self.learner is not None:
+            state['learner_state'] = self.learner.training_state()
+        self.last_episode = reset_count
+        self.last_time = time.monotonic()
+
+        if background:
+            self.thread = threading.Thread(target=self.write, args=(write_weights, state), daemon=True)
+            self.thread.start()
+        else:
+            self.write(write_weights, state)
+
+    def write(self, write_weights: Callable[[], None], state: TrainerState) -> None:
+        write_weights()
+        write_trainer_state(self.state_file_path, state)
+        weights_file_path = self.weights_file_path(state)
+        self.publish(weights_file_path)
+        for file_path in glob.glob(f"{glob.escape(self.q_table_file_path)}.*"):
+            if file_path != weights_file_path and file_path.rsplit('.', 1)[-1].isdigit():
+                os.remove(file_path)  # Earlier checkpoints, and any a crash left behind
+        self.saves += 1
+
+    def weights_file_path(self, state: Optional[TrainerState]) -> str:
+        """The weights file `state` was saved with; the published one for checkpoints that predate per-checkpoint files."""
+        if state is not None and 'weights_file' in state:
+            return os.path.join(os.path.dirname(self.q_table_file_path), state['weights_file'])
+        return self.q_table_file_path
+
+    def publish(self, weights_file_path: str) -> None:
+        """Atomically make `q_table_file_path` the same file as `weights_file_path`, copying it where hard links are not supported."""
+        temp_path = f"{self.q_table_file_path}.tmp"
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        try:
+            os.link(weights_file_path, temp_path)
+        except OSError:
+            shutil.copyfile(weights_file_path, temp_path)
+        os.replace(temp_path, self.q_table_file_path)
+
+    def wait(self) -> None:
+        """Block until the checkpoint being written, if any, is on disk."""
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def load(self, agent: Agent, env: Optional[SnakeEnv] = None) -> Optional[TrainerState]:
+        """Load the last checkpoint into `agent`, `learner` and the random generators; returns its trainer state, if any."""
+        state = load_trainer_state(self.state_file_path)
+        if state is not None and state['encoder'] != agent.encoder.name:
+            raise ValueError(f"{self.state_file_path} was saved for the '{state['encoder']}' encoder, not '{agent.encoder.name}'.")
+
+        weights_file_path = self.weights_file_path(state)
+        if not os.path.exists(weights_file_path):
+            if state is not None and weights_file_path != self.q_table_file_path:
+                raise FileNotFoundError(f"{self.state_file_path} was saved with {weights_file_path}, which is missing.")
+            return None
+        agent.load_weights(weights_file_path)
+
+        if state is not None:
+            restore_trainer_state(agent, state, env)
+            if isinstance(agent, DQNAgent) and 'agent_state' in state:
+                agent.restore_training_state(state['agent_state'])
+            if self.learner is not None and 'learner_state' in state:
+                self.learner.restore_training_state(state['learner_state'])
+            self.last_episode = state['reset_count']
+        return state
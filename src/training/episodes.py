@@ -0,0 +1,28 @@
+from typing import Callable, Optional
+from src.agent import Agent
+from src.env import SnakeEnv
+from src.utils.types import State
+
+
+# (state, action, reward, next_state, done) -> None, as `QLearningAgent.learn`.
+Learn = Callable[[State, int, int, State, bool], None]
+
+
+def run_episode(agent: Agent, env: SnakeEnv, learn: Optional[Learn] = None) -> int:
+    """
+    Play one training episode of `agent` on `env`, from a reset until the snake dies.
+
+    :param learn: Called with every transition in place of `agent.learn`, such as a `BatchedLearner`'s `observe`.
+    :return: The episode's total reward; its length and score are left in `env.steps` and `env.score`.
+    """
+    learn = learn or agent.learn
+    state = env.reset()
+    episode_reward = 0
+    done = False
+    while not done:
+        action = agent.choose_action(state)
+        next_state, reward, done = env.step(action)
+        learn(state, action, reward, next_state, done)
+        episode_reward += reward
+        state = next_state
+    return episode_reward
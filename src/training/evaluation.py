@@ -0,0 +1,198 @@
+import os
+import time
+import multiprocessing
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from src.agent import Agent, DQNAgent, QLearningAgent, get_encoder, is_network_file
+from src.env import SnakeEnv
+from src.utils.config import GameConfig
+from src.utils.types import State
+
+
+# How an evaluation episode ended, indexed by the codes in `EvaluationResult.causes`.
+CAUSES: Tuple[str, ...] = ('wall', 'self', 'step_limit', 'board_full')
+WALL, SELF, STEP_LIMIT, BOARD_FULL = range(len(CAUSES))
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+EpisodeStats = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]  # (scores, lengths, causes, lookups, unseen)
+
+_worker_agent: Optional[Agent] = None
+_worker_config: Optional[GameConfig] = None
+
+
+def greedy_action(agent: Agent, state: State) -> Tuple[int, bool]:
+    """
+    The agent's best action for `state` with no exploration, and whether the state is in its Q-table.
+
+    Unlike `choose_action`, unseen states are not inserted, so evaluating leaves
+    the Q-table untouched. They get action 0, as a new all-zero row would. A
+    `DQNAgent` has no table, so every state counts as seen.
+    """
+    if isinstance(agent, DQNAgent):
+        return int(agent.q_row(state).argmax()), True
+
+    state_key = agent.get_state_key(state)
+    if agent.q_values is not None:
+        row = agent.q_values[state_key]
+        action, seen = int(row.argmax()), bool(row.any())
+    elif state_key in agent.q_table['__root__']:
+        action, seen = int(np.argmax(agent.q_table['__root__'][state_key])), True
+    else:
+        action, seen = 0, False
+
+    if agent.symmetry is not None:
+        action = agent.symmetry.from_canonical(state, action)
+    return action, seen
+
+
+def run_episodes(agent: Agent, seeds: Sequence[int], config: GameConfig, step_limit: Optional[int] = None) -> EpisodeStats:
+    """
+    Play one greedy episode per seed and record how each went.
+
+    :param step_limit: Steps the snake may take without eating before the episode is cut short; the number of cells by default.
+    """
+    step_limit = step_limit or config.cell_count
+    scores = np.zeros(len(seeds), dtype=np.int32)
+    lengths = np.zeros(len(seeds), dtype=np.int32)
+    causes = np.zeros(len(seeds), dtype=np.int8)
+    lookups = np.zeros(len(seeds), dtype=np.int64)
+    unseen = np.zeros(len(seeds), dtype=np.int64)
+
+    for i, seed in enumerate(seeds):
+        # A fresh environment per episode: where food lands also depends on the order
+        # of the free-cell index, which a reused environment inherits from earlier episodes.
+        env = SnakeEnv.from_config(config, seed=seed)
+        state = env.reset()
+        done = False
+        hungry_steps, episode_unseen = 0, 0
+
+        while not done:
+            action, seen = greedy_action(agent, state)
+            episode_unseen += not seen
+            score = env.score
+            state, _, done = env.step(action)
+            hungry_steps = 0 if env.score > score else hungry_steps + 1
+            if not done and hungry_steps >= step_limit:
+                causes[i] = STEP_LIMIT
+                break
+        else:
+            if env.is_border_collision():
+                causes[i] = WALL
+            elif env.is_self_collision():
+                causes[i] = SELF
+            else:
+                causes[i] = BOARD_FULL
+
+        scores[i], lengths[i] = env.score, env.steps
+        lookups[i], unseen[i] = env.steps, episode_unseen
+
+    return scores, lengths, causes, lookups, unseen
+
+
+def load_agent(weights_file_path: str, encoder_name: str, config: GameConfig) -> Agent:
+    """An agent holding the Q-table in `weights_file_path`, memory-mapped so opening it is cheap, or the network saved there by a `DQNAgent`."""
+    if is_network_file(weights_file_path):
+        dqn_agent = DQNAgent(epsilon=0.0, config=config, buffer_capacity=1)
+        dqn_agent.load_weights(weights_file_path)
+        return dqn_agent
+
+    agent = QLearningAgent(epsilon=0.0, encoder=get_encoder(encoder_name, config.width, config.height, config.space_size))
+    agent.load_weights(weights_file_path, mmap=True)
+    return agent
+
+
+def init_worker(weights_file_path: str, encoder_name: str, config: GameConfig) -> None:
+    global _worker_agent, _worker_config
+    _worker_agent = load_agent(weights_file_path, encoder_name, config)
+    _worker_config = config
+
+
+def run_worker_episodes(task: Tuple[Sequence[int], Optional[int]]) -> EpisodeStats:
+    seeds, step_limit = task
+    if _worker_agent is None or _worker_config is None:
+        raise RuntimeError("Evaluation worker was not initialized.")
+    return run_episodes(_worker_agent, seeds, _worker_config, step_limit)
+
+
+class EvaluationResult:
+    """Per-episode scores, lengths, end causes and unseen-state lookups of an evaluation, in seed order."""
+
+    def __init__(self, stats: List[EpisodeStats], elapsed: float) -> None:
+        self.scores: np.ndarray = np.concatenate([part[0] for part in stats])
+        self.lengths: np.ndarray = np.concatenate([part[1] for part in stats])
+        self.causes: np.ndarray = np.concatenate([part[2] for part in stats])
+        self.lookups: np.ndarray = np.concatenate([part[3] for part in stats])
+        self.unseen: np.ndarray = np.concatenate([part[4] for part in stats])
+        self.elapsed: float = elapsed
+
+    @property
+    def episodes(self) -> int:
+        return len(self.scores)
+
+    def unseen_state_rate(self) -> float:
+        """Share of the agent's lookups that hit a state missing from its Q-table."""
+        lookups = int(self.lookups.sum())
+        return int(self.unseen.sum()) / lookups if lookups else 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        def describe(values: np.ndarray) -> Dict[str, float]:
+            stats = {'mean': float(values.mean()), 'max': float(values.max())}
+            stats.update({f"p{q}": float(value) for q, value in zip(PERCENTILES, np.percentile(values, PERCENTILES))})
+            return stats
+
+        cause_counts = np.bincount(self.causes, minlength=len(CAUSES))
+        return {
+            'episodes': self.episodes,
+            'elapsed_seconds': self.elapsed,
+            'episodes_per_second': self.episodes / max(self.elapsed, 1e-9),
+            'score': describe(self.scores),
+            'length': describe(self.lengths),
+            'causes': {name: int(count) for name, count in zip(CAUSES, cause_counts)},
+            'unseen_state_rate': self.unseen_state_rate(),
+        }
+
+    def format(self) -> str:
+        summary = self.summary()
+        lines = [f"{summary['episodes']:,} greedy episodes in {summary['elapsed_seconds']:.1f}s ({summary['episodes_per_second']:,.0f} episodes/s)"]
+        for name in ('score', 'length'):
+            stats = summary[name]
+            percentiles = ", ".join(f"p{q} {stats[f'p{q}']:.0f}" for q in PERCENTILES)
+            lines.append(f"  {name.capitalize():<7} mean {stats['mean']:.2f}, {percentiles}, max {stats['max']:.0f}")
+        causes = ", ".join(f"{name} {count / summary['episodes']:.1%}" for name, count in summary['causes'].items())
+        lines.append(f"  Endings {causes}")
+        lines.append(f"  Unseen states {summary['unseen_state_rate']:.2%} of lookups")
+        return "\n".join(lines)
+
+
+def evaluate(
+    weights_file_path: str,
+    episodes: int = 1000,
+    workers: Optional[int] = None,
+    seed: int = 0,
+    encoder_name: str = 'full',
+    config: Optional[GameConfig] = None,
+    step_limit: Optional[int] = None
+) -> EvaluationResult:
+    """
+    Play `episodes` greedy (epsilon 0) episodes with the Q-table in `weights_file_path`.
+
+    Episode `i` is played on food seed `seed + i`, so results do not depend on the
+    number of workers. Each worker process maps the Q-table file once and plays
+    batches of seeds; with one worker everything runs in this process.
+    """
+    config = config or GameConfig()
+    workers = max(1, min(workers or os.cpu_count() or 1, episodes))
+    seeds = list(range(seed, seed + episodes))
+    start_time = time.perf_counter()
+
+    if workers == 1:
+        stats = [run_episodes(load_agent(weights_file_path, encoder_name, config), seeds, config, step_limit)]
+    else:
+        # A few batches per worker so one slow batch does not hold up the rest.
+        batch_size = max(1, -(-episodes // (workers * 4)))
+        tasks = [(seeds[i:i + batch_size], step_limit) for i in range(0, episodes, batch_size)]
+        with multiprocessing.Pool(workers, initializer=init_worker, initargs=(weights_file_path, encoder_name, config)) as pool:
+            stats = pool.map(run_worker_episodes, tasks)
+
+    return EvaluationResult(stats, time.perf_counter() - start_time)
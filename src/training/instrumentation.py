@@ -0,0 +1,197 @@
+import os
+import json
+import time
+import cProfile
+import functools
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from src.agent import Agent, DQNAgent, QTableStore
+from src.env import SnakeEnv
+
+
+_MISSING = object()
+
+
+class Instrumentation:
+    """
+    Switchable per-phase timers and counters for the training loop.
+
+    Nothing is measured until a method is wrapped with `wrap`, which shadows it on
+    that one instance with a timed wrapper; `restore` puts the originals back, so
+    an uninstrumented run pays nothing. Phases can nest: a wrapped `get_state_key`
+    called from a wrapped `learn` is counted in both.
+    """
+
+    def __init__(
+        self,
+        dump_file_path: Optional[str] = None,
+        dump_every_episodes: Optional[int] = None,
+        dump_every_seconds: Optional[float] = None
+    ) -> None:
+        self.dump_file_path: Optional[str] = dump_file_path
+        self.dump_every_episodes: Optional[int] = dump_every_episodes
+        self.dump_every_seconds: Optional[float] = dump_every_seconds
+        self.phases: Dict[str, List[float]] = {}  # Phase -> [calls, seconds]
+        self.counters: Dict[str, int] = {}
+        self.wrapped: List[Tuple[Any, str, Any]] = []  # (object, attribute, instance value it shadowed)
+        self.episodes: int = 0
+        self.start_time: float = time.perf_counter()
+        self.last_dump_episode: int = 0
+        self.last_dump_time: float = time.monotonic()
+
+        self.profiler: Optional[cProfile.Profile] = None
+        self.profile_file_path: Optional[str] = None
+        self.profile_episodes_left: int = 0
+
+    def wrap(self, obj: Any, method_name: str, phase: Optional[str] = None) -> None:
+        """Time every call of `obj.method_name` under `phase` (the method name by default)."""
+        method = getattr(obj, method_name)
+        stats = self.phases.setdefault(phase or method_name, [0, 0.0])
+        perf_counter = time.perf_counter
+
+        @functools.wraps(method)
+        def timed(*args: Any, **kwargs: Any) -> Any:
+            start = perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                stats[0] += 1
+                stats[1] += perf_counter() - start
+
+        self.wrapped.append((obj, method_name, vars(obj).get(method_name, _MISSING)))
+        setattr(obj, method_name, timed)
+
+    def wrap_counter(self, obj: Any, method_name: str, classify: Callable[..., str]) -> None:
+        """Count calls of `obj.method_name` under the counter name `classify` returns for the call's arguments."""
+        method = getattr(obj, method_name)
+        counters = self.counters
+
+        @functools.wraps(method)
+        def counted(*args: Any, **kwargs: Any) -> Any:
+            name = classify(*args, **kwargs)
+            counters[name] = counters.get(name, 0) + 1
+            return method(*args, **kwargs)
+
+        self.wrapped.append((obj, method_name, vars(obj).get(method_name, _MISSING)))
+        setattr(obj, method_name, counted)
+
+    def restore(self) -> None:
+        """Remove every wrapper, newest first."""
+        while self.wrapped:
+            obj, method_name, original = self.wrapped.pop()
+            if original is _MISSING:
+                delattr(obj, method_name)
+            else:
+                setattr(obj, method_name, original)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def reset(self) -> None:
+        for stats in self.phases.values():
+            stats[0], stats[1] = 0, 0.0
+        self.counters.clear()
+        self.episodes = 0
+        self.start_time = time.perf_counter()
+
+    def profile(self, episodes: int, file_path: str) -> None:
+        """Run cProfile over the next `episodes` episodes and write its stats to `file_path`."""
+        self.profiler = cProfile.Profile()
+        self.profile_file_path = file_path
+        self.profile_episodes_left = episodes
+        self.profiler.enable()
+
+    def stop_profile(self) -> None:
+        if self.profiler is None or self.profile_file_path is None:
+            return
+        self.profiler.disable()
+        directory = os.path.dirname(self.profile_file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.profiler.dump_stats(self.profile_file_path)
+        print(f"Profile written to {self.profile_file_path}")
+        self.profiler = None
+
+    def on_episode_end(self, episode: Optional[int] = None) -> None:
+        """Count an episode, stop a finished profile and dump the stats if a dump is due."""
+        self.episodes += 1
+        episode = self.episodes if episode is None else episode
+
+        if self.profiler is not None:
+            self.profile_episodes_left -= 1
+            if self.profile_episodes_left <= 0:
+                self.stop_profile()
+
+        if self.dump_file_path is None:
+            return
+        due = bool(self.dump_every_episodes and episode - self.last_dump_episode >= self.dump_every_episodes)
+        due = due or bool(self.dump_every_seconds and time.monotonic() - self.last_dump_time >= self.dump_every_seconds)
+        if due:
+            self.dump(self.dump_file_path)
+            self.last_dump_episode, self.last_dump_time = episode, time.monotonic()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Calls, total and mean time and share of the wall time of every phase, plus the counters."""
+        elapsed = max(time.perf_counter() - self.start_time, 1e-9)
+        phases = {
+            name: {
+                'calls': int(calls),
+                'total_seconds': seconds,
+                'mean_us': seconds / calls * 1e6 if calls else 0.0,
+                'share': seconds / elapsed,
+            }
+            for name, (calls, seconds) in self.phases.items()
+        }
+        counters: Dict[str, Any] = dict(self.counters)
+        lookups = counters.get('q_table_hits', 0) + counters.get('q_table_misses', 0)
+        if lookups:
+            counters['q_table_hit_rate'] = counters.get('q_table_hits', 0) / lookups
+        return {'episodes': self.episodes, 'elapsed_seconds': elapsed, 'phases': phases, 'counters': counters}
+
+    def dump(self, file_path: str) -> None:
+        """Write `snapshot()` as JSON to a temporary file and rename it over `file_path`."""
+        directory = os.path.dirname(file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{file_path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(self.snapshot(), f, indent=2)
+        os.replace(temp_path, file_path)
+
+    def summary(self) -> str:
+        snapshot = self.snapshot()
+        lines = [f"{snapshot['episodes']} episodes in {snapshot['elapsed_seconds']:.1f}s"]
+        for name, stats in sorted(snapshot['phases'].items(), key=lambda item: -item[1]['total_seconds']):
+            lines.append(f"  {name:<16} {stats['calls']:>10,} calls {stats['mean_us']:9.2f} us/call {stats['share']:7.1%}")
+        for name, value in sorted(snapshot['counters'].items()):
+            lines.append(f"  {name:<16} {value:>10,.3f}" if isinstance(value, float) else f"  {name:<16} {value:>10,}")
+        return "\n".join(lines)
+
+
+def instrument_agent(instrumentation: Instrumentation, agent: Agent) -> None:
+    """
+    Time the agent's `choose_action`, `learn` and `get_state_key`, and count Q-table hits and misses (new-state inserts).
+
+    A bounded Q-table's evictions are timed too, as `q_table_evict`.
+
+    For a `DQNAgent`, time `features` and `train_step` instead of the Q-table.
+    """
+    instrumentation.wrap(agent, 'choose_action')
+    instrumentation.wrap(agent, 'learn')
+    if isinstance(agent, DQNAgent):
+        instrumentation.wrap(agent, 'features')
+        instrumentation.wrap(agent, 'train_step')
+        return
+    instrumentation.wrap(agent, 'get_state_key')
+
+    store = agent.q_table['__root__']
+    if agent.q_values is None and isinstance(store, QTableStore):
+        instrumentation.wrap_counter(store, 'row', lambda key: 'q_table_hits' if key in store.index else 'q_table_misses')
+        if store.max_states is not None:
+            instrumentation.wrap(store, 'evict', 'q_table_evict')
+
+
+def instrument_env(instrumentation: Instrumentation, env: SnakeEnv) -> None:
+    """Time the environment's moves, `State` building and food placement."""
+    instrumentation.wrap(env, 'move')
+    instrumentation.wrap(env, 'get_state')
+    instrumentation.wrap(env, 'place_food', 'create_food')
@@ -0,0 +1,121 @@
+import os
+import glob
+import time
+import queue
+import threading
+from typing import Any, Dict, List, Optional
+import numpy as np
+
+
+# One record per episode. wall_time is seconds since the writer was created.
+EPISODE_DTYPE = np.dtype([
+    ('episode', np.int64),
+    ('length', np.int32),
+    ('score', np.int32),
+    ('reward', np.int32),
+    ('epsilon', np.float32),
+    ('q_table_size', np.int64),
+    ('wall_time', np.float64),
+])
+
+
+class MetricsWriter:
+    """
+    Records per-episode metrics into a ring buffer and writes them out in chunks.
+
+    `record` only fills a row of a preallocated structured array. Every
+    `flush_every` records the new rows are copied out and handed to a background
+    thread, which saves them to `run_dir` as `chunk_NNNNNN.npz` with one array per
+    column. The ring keeps the last `capacity` records in memory for `recent`.
+    """
+
+    def __init__(self, run_dir: str, flush_every: int = 1000, capacity: Optional[int] = None) -> None:
+        self.run_dir: str = run_dir
+        self.flush_every: int = flush_every
+        self.capacity: int = max(capacity or 2 * flush_every, flush_every)
+        self.buffer: np.ndarray = np.zeros(self.capacity, dtype=EPISODE_DTYPE)
+        self.count: int = 0  # Records ever written to the ring
+        self.flushed: int = 0  # Records handed to the writer thread
+        self.start_time: float = time.perf_counter()
+        self.chunks: int = len(glob.glob(os.path.join(run_dir, "chunk_*.npz")))
+        self.queue: "queue.Queue[Optional[np.ndarray]]" = queue.Queue()
+        self.thread: Optional[threading.Thread] = None
+
+    def record(self, episode: int, length: int, score: int, reward: int, epsilon: float, q_table_size: int) -> None:
+        self.buffer[self.count % self.capacity] = (episode, length, score, reward, epsilon, q_table_size, time.perf_counter() - self.start_time)
+        self.count += 1
+        if self.count - self.flushed >= self.flush_every:
+            self.flush()
+
+    def recent(self, n: Optional[int] = None) -> np.ndarray:
+        """The last `n` records (all those still in the ring by default), oldest first."""
+        n = min(self.count, self.capacity) if n is None else min(n, self.count, self.capacity)
+        indices = np.arange(self.count - n, self.count) % self.capacity
+        return self.buffer[indices]
+
+    def mean(self, column: str, n: int) -> float:
+        """Mean of `column` over the last `n` records."""
+        records = self.recent(n)
+        return float(records[column].mean()) if len(records) else 0.0
+
+    def flush(self) -> None:
+        """Hand the records not yet written to the writer thread."""
+        pending = self.count - self.flushed
+        if pending <= 0:
+            return
+        if pending > self.capacity:
+            raise RuntimeError(f"{pending - self.capacity} metric records were overwritten before they were flushed.")
+
+        indices = np.arange(self.flushed, self.count) % self.capacity
+        self.flushed = self.count
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+        self.queue.put(self.buffer[indices])
+
+    def run(self) -> None:
+        while True:
+            records = self.queue.get()
+            if records is None:
+                break
+            self.write_chunk(records)
+
+    def write_chunk(self, records: np.ndarray) -> None:
+        os.makedirs(self.run_dir, exist_ok=True)
+        file_path = os.path.join(self.run_dir, f"chunk_{self.chunks:06d}.npz")
+        temp_path = f"{file_path}.tmp"
+        columns: Dict[str, Any] = {name: np.ascontiguousarray(records[name]) for name in EPISODE_DTYPE.names or ()}
+        with open(temp_path, 'wb') as f:
+            np.savez(f, **columns)
+        os.replace(temp_path, file_path)
+        self.chunks += 1
+
+    def close(self) -> None:
+        """Flush what is left and wait until every chunk is on disk."""
+        self.flush()
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+
+
+def load_metrics(run_dir: str) -> Dict[str, np.ndarray]:
+    """Every column of a run's metrics, concatenated across its chunks in order."""
+    columns: Dict[str, List[np.ndarray]] = {name: [] for name in EPISODE_DTYPE.names or ()}
+    for file_path in sorted(glob.glob(os.path.join(run_dir, "chunk_*.npz"))):
+        with np.load(file_path) as chunk:
+            for name in columns:
+                columns[name].append(chunk[name])
+    return {
+        name: np.concatenate(parts) if parts else np.zeros(0, dtype=EPISODE_DTYPE[name])
+        for name, parts in columns.items()
+    }
+
+
+def moving_average(values: np.ndarray, window: int) -> np.ndarray:
+    """Mean of each run of `window` consecutive values."""
+    if len(values) < window:
+        return np.zeros(0, dtype=np.float64)
+    sums = np.cumsum(values, dtype=np.float64)
+    sums[window:] = sums[window:] - sums[:-window]
+    return sums[window - 1:] / window
@@ -0,0 +1,222 @@
+import os
+import time
+import multiprocessing
+from multiprocessing.connection import Connection
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from src.agent import QLearningAgent, get_encoder
+from src.env import SnakeEnv
+from src.training.episodes import run_episode
+from src.utils.config import GameConfig
+from src.utils.types import EncodedState, State
+
+
+QRows = Dict[EncodedState, np.ndarray]
+QDelta = Dict[EncodedState, Tuple[np.ndarray, np.ndarray]]  # state -> (Q-value delta, per-action visit counts)
+WorkerResult = Tuple[QDelta, int, int, int]  # (deltas, steps, total score, total reward)
+
+
+def run_worker(conn: Connection, seed: int, agent_kwargs: Dict[str, Any], config: GameConfig) -> None:
+    """
+    Worker loop: receive `(sync_rows, episodes, epsilon)`, train a local Q-table
+    on that many episodes and send back the deltas of every state it updated.
+    A `None` message stops the worker.
+    """
+    np.random.seed(seed)
+    agent = QLearningAgent(**agent_kwargs)
+    env = SnakeEnv.from_config(config, seed=seed)
+    deltas: QDelta = {}
+
+    def learn(state: State, action: int, reward: int, next_state: State, done: bool) -> None:
+        """
+        `agent.learn`, adding the change it makes to the state's Q-value to the
+        round's delta and counting the visit. The change is taken per update
+        rather than once at the end of the round, as a bounded Q-table may evict
+        the state in between.
+        """
+        state_key = agent.get_state_key(state)
+        column = agent.canonical_action(state, action)
+        before = float(agent.q_row(state_key)[column])
+        agent.learn(state, action, reward, next_state, done)
+
+        if state_key not in deltas:
+            deltas[state_key] = (np.zeros(4), np.zeros(4, dtype=np.int64))
+        delta, visits = deltas[state_key]
+        visits[column] += 1
+        if agent.q_values is not None or state_key in agent.q_table['__root__']:
+            delta[column] += agent.q_row(state_key)[column] - before
+
+    while True:
+        message = conn.recv()
+        if message is None:
+            break
+
+        sync_rows, episodes, epsilon = message
+        for state_key, row in sync_rows.items():
+            agent.set_q_row(state_key, row)
+        agent.epsilon = epsilon
+
+        deltas.clear()
+        steps, score, reward = 0, 0, 0
+
+        for _ in range(episodes):
+            reward += run_episode(agent, env, learn)
+            steps += env.steps
+            score += env.score
+
+        conn.send((deltas, steps, score, reward))
+
+    conn.close()
+
+
+def merge_deltas(agent: QLearningAgent, results: List[QDelta]) -> QRows:
+    """
+    Apply the workers' deltas to the master agent's Q-table, averaging each
+    state-action update by how often each worker visited it.
+
+    :return: The merged rows of every state touched this round.
+    """
+    weighted: Dict[EncodedState, np.ndarray] = {}
+    totals: Dict[EncodedState, np.ndarray] = {}
+
+    for deltas in results:
+        for key, (delta, visits) in deltas.items():
+            if key in weighted:
+                weighted[key] += delta * visits
+                totals[key] += visits
+            else:
+                weighted[key] = delta * visits
+                totals[key] = visits.astype(np.float64)
+
+    merged: QRows = {}
+    for key, weighted_delta in weighted.items():
+        row = agent.q_row(key)
+        row += np.divide(weighted_delta, totals[key], out=np.zeros(4), where=totals[key] > 0)
+        merged[key] = row.copy()
+
+    return merged
+
+
+class ParallelTrainer:
+    """
+    Trains a `QLearningAgent` with a pool of worker processes.
+
+    Every round each worker plays `sync_every` episodes against its own copy of
+    the Q-table; the master then merges the deltas (visit-weighted average) and
+    sends the merged rows back so all copies agree before the next round.
+    Epsilon decays once per episode a worker plays, as it would training alone.
+    Set `episodes_done` and `total_reward` to carry on from a checkpoint; the
+    worker seeds are offset by `episodes_done` so a resumed run plays new episodes.
+    """
+
+    def __init__(
+        self,
+        agent: QLearningAgent,
+        workers: Optional[int] = None,
+        sync_every: int = 50,
+        seed: int = 0,
+        config: Optional[GameConfig] = None
+    ) -> None:
+        self.agent: QLearningAgent = agent
+        self.workers: int = workers or os.cpu_count() or 1
+        self.sync_every: int = sync_every
+        self.seed: int = seed
+        self.config: GameConfig = config or GameConfig()
+        self.episodes_done: int = 0
+        self.steps_done: int = 0
+        self.total_reward: int = 0
+
+    def agent_kwargs(self) -> Dict[str, Any]:
+        return {
+            'alpha': self.agent.alpha,
+            'gamma': self.agent.gamma,
+            'epsilon': self.agent.epsilon,
+            'epsilon_decay': self.agent.epsilon_decay,
+            'epsilon_min': self.agent.epsilon_min,
+            'encoder': self.agent.encoder,
+            'max_states': self.agent.max_states,
+            'eviction': self.agent.eviction,
+        }
+
+    def train(self, episodes: int, verbose: bool = True) -> float:
+        """
+        Run `episodes` episodes spread over the workers. The last round is
+        shortened, with the workers sharing what is left, so none are played past it.
+
+        :return: Aggregate episodes per second.
+        """
+        episodes_per_round = self.workers * self.sync_every
+        rounds = -(-episodes // episodes_per_round)
+
+        connections: List[Connection] = []
+        processes: List[multiprocessing.Process] = []
+        for worker_id in range(self.workers):
+            parent_conn, child_conn = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=run_worker,
+                args=(child_conn, self.seed + self.episodes_done + worker_id, self.agent_kwargs(), self.config),
+                daemon=True
+            )
+            process.start()
+            connections.append(parent_conn)
+            processes.append(process)
+
+        start_time = time.perf_counter()
+        if self.agent.q_values is not None:
+            sync_rows: QRows = dict(enumerate(self.agent.q_values))
+        else:
+            sync_rows = dict(self.agent.q_table['__root__'])
+
+        try:
+            for round_index in range(1, rounds + 1):
+                round_start = time.perf_counter()
+                round_episodes = min(episodes_per_round, episodes - (round_index - 1) * episodes_per_round)
+                shares = [round_episodes // self.workers + (worker_id < round_episodes % self.workers) for worker_id in range(self.workers)]
+                for conn, share in zip(connections, shares):
+                    conn.send((sync_rows, share, self.agent.epsilon))
+
+                results: List[WorkerResult] = [conn.recv() for conn in connections]
+                sync_rows = merge_deltas(self.agent, [deltas for deltas, _, _, _ in results])
+                self.agent.evict_if_full()  # The master only grows through merges, never `learn`
+
+                round_steps = sum(steps for _, steps, _, _ in results)
+                round_score = sum(score for _, _, score, _ in results)
+                self.steps_done += round_steps
+                self.episodes_done += round_episodes
+                self.total_reward += sum(reward for _, _, _, reward in results)
+                # The workers played side by side, so epsilon decays once per episode of the busiest worker.
+                self.agent.epsilon = max(self.agent.epsilon_min, self.agent.epsilon * self.agent.epsilon_decay ** shares[0])
+
+                if verbose:
+                    elapsed = max(time.perf_counter() - round_start, 1e-9)
+                    print(
+                        f"Round {round_index}/{rounds}, Episodes: {self.episodes_done}, "
+                        f"Mean Score: {round_score / round_episodes:.2f}, Epsilon: {self.agent.epsilon:.3f}, "
+                        f"States: {self.agent.state_count()}, Episodes/s: {round_episodes / elapsed:,.0f}, "
+                        f"Steps/s: {round_steps / elapsed:,.0f}"
+                    )
+        finally:
+            for conn in connections:
+                conn.send(None)
+            for process in processes:
+                process.join()
+
+        episodes_per_second = max(episodes, 0) / max(time.perf_counter() - start_time, 1e-9)
+        if verbose:
+            print(f"{self.workers} worker(s): {episodes_per_second:,.0f} episodes/s")
+        return episodes_per_second
+
+
+def measure_scaling(worker_counts: List[int], episodes_per_worker: int = 200, sync_every: int = 50, encoder_name: str = 'full', config: Optional[GameConfig] = None) -> Dict[int, float]:
+    """Train a fresh agent with each worker count and return episodes per second for each."""
+    config = config or GameConfig()
+    results: Dict[int, float] = {}
+    for workers in worker_counts:
+        agent = QLearningAgent(encoder=get_encoder(encoder_name, config.width, config.height, config.space_size))
+        trainer = ParallelTrainer(agent, workers=workers, sync_every=sync_every, config=config)
+        results[workers] = trainer.train(workers * episodes_per_worker, verbose=False)
+
+    baseline = results[worker_counts[0]] / worker_counts[0]
+    for workers, episodes_per_second in results.items():
+        print(f"{workers:>3} worker(s): {episodes_per_second:>10,.0f} episodes/s, speedup {episodes_per_second / baseline:.2f}x (ideal {workers}x)")
+    return results
@@ -0,0 +1,49 @@
+import time
+from typing import Dict, List, Optional
+import numpy as np
+from src.agent import QLearningAgent, get_encoder
+from src.env import SnakeEnv
+from src.training.episodes import run_episode
+from src.utils.config import GameConfig
+
+
+def train_on_board(config: GameConfig, episodes: int, encoder_name: str = 'full', seed: Optional[int] = 0) -> Dict[str, float]:
+    """
+    Train a fresh agent headless for `episodes` episodes on `config`'s board.
+
+    :return: Board cells, steps per second, mean score, Q-table states and Q-table bytes per state.
+    """
+    if seed is not None:
+        np.random.seed(seed)
+    agent = QLearningAgent(encoder=get_encoder(encoder_name, config.width, config.height, config.space_size))
+    env = SnakeEnv.from_config(config, seed=seed)
+    steps, score = 0, 0
+
+    start = time.perf_counter()
+    for _ in range(episodes):
+        run_episode(agent, env)
+        steps += env.steps
+        score += env.score
+    elapsed = max(time.perf_counter() - start, 1e-9)
+
+    return {
+        'cells': config.cell_count,
+        'steps_per_second': steps / elapsed,
+        'mean_score': score / episodes,
+        'states': agent.state_count(),
+        'bytes_per_state': agent.memory_per_state(),
+    }
+
+
+def measure_board_scaling(board_sizes: List[int], episodes: int = 200, encoder_name: str = 'full', space_size: int = 10, seed: Optional[int] = 0) -> Dict[int, Dict[str, float]]:
+    """Train a fresh agent on square boards of each size (in cells a side) and report throughput and Q-table size for each."""
+    results: Dict[int, Dict[str, float]] = {}
+    for size in board_sizes:
+        results[size] = train_on_board(GameConfig.for_board(size, size, space_size), episodes, encoder_name, seed)
+
+    for size, result in results.items():
+        print(
+            f"{size:>4}x{size:<4} {result['steps_per_second']:>10,.0f} steps/s, mean score {result['mean_score']:5.2f}, "
+            f"{result['states']:>8,.0f} states, {result['bytes_per_state']:6.0f} bytes/state"
+        )
+    return results
@@ -0,0 +1,250 @@
+import os
+import csv
+import math
+import time
+import itertools
+import multiprocessing
+from collections import deque
+from typing import Any, Deque, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+import numpy as np
+from src.agent import QLearningAgent, get_encoder
+from src.env import SnakeEnv
+from src.training.episodes import run_episode
+from src.utils.config import GameConfig
+
+
+# `QLearningAgent` hyperparameters a sweep can vary.
+PARAMETERS: Tuple[str, ...] = ('alpha', 'gamma', 'epsilon', 'epsilon_decay', 'epsilon_min')
+
+# Per parameter, a list of values to try or, for random search, a `(low, high)` range to draw from.
+ParameterSpace = Mapping[str, Union[List[float], Tuple[float, float]]]
+Params = Dict[str, float]
+
+DEFAULT_SPACE: Dict[str, Union[List[float], Tuple[float, float]]] = {
+    'alpha': [0.05, 0.1, 0.2],
+    'gamma': [0.9, 0.99],
+    'epsilon_decay': [0.99, 0.995, 0.999],
+}
+
+SUMMARY_COLUMNS: Tuple[str, ...] = ('run', 'seed') + PARAMETERS + ('episodes', 'steps', 'score', 'best_score', 'stopped', 'states', 'elapsed')
+
+# (run index, parameters, seed, episode budget, step budget, encoder name, config, early stopping, Q-table file path)
+RunTask = Tuple[int, Params, int, int, Optional[int], str, GameConfig, 'EarlyStopping', str]
+
+
+def check_space(space: ParameterSpace) -> None:
+    unknown = set(space) - set(PARAMETERS)
+    if unknown:
+        raise ValueError(f"Unknown hyperparameter(s) {', '.join(sorted(unknown))}; choose from {', '.join(PARAMETERS)}.")
+
+
+def grid_search(space: ParameterSpace) -> List[Params]:
+    """Every combination of the listed values."""
+    check_space(space)
+    for name, values in space.items():
+        if isinstance(values, tuple):
+            raise ValueError(f"Grid search needs a list of values for '{name}', not a range.")
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+
+def random_search(space: ParameterSpace, runs: int, seed: int = 0) -> List[Params]:
+    """
+    `runs` configurations, each parameter drawn from its list of values or from its range.
+
+    A range spanning more than a factor of 10, such as a learning rate of
+    `(0.001, 0.5)`, is sampled log-uniformly; narrower ranges uniformly.
+    """
+    check_space(space)
+    rng = np.random.default_rng(seed)
+    configurations: List[Params] = []
+    for _ in range(runs):
+        params: Params = {}
+        for name, values in space.items():
+            if isinstance(values, tuple):
+                low, high = values
+                if low > 0 and high / low > 10:
+                    params[name] = float(math.exp(rng.uniform(math.log(low), math.log(high))))
+                else:
+                    params[name] = float(rng.uniform(low, high))
+            else:
+                params[name] = float(values[rng.integers(len(values))])
+        configurations.append(params)
+    return configurations
+
+
+class EarlyStopping:
+    """
+    Decides from a run's own learning curve when it is not worth finishing.
+
+    The curve is the mean score of every `window` episodes. Once `grace`
+    episodes are played and epsilon is down to `max_epsilon`, so scores reflect
+    what was learned rather than exploration, a run stops if its latest window
+    scores below `min_score`, or if its best window has not improved by
+    `min_delta` for `patience` windows (`None` never stops a run for that).
+    Only the run's own curve counts, so whether it stops does not depend on the
+    other runs or on the order they finish in.
+    """
+
+    def __init__(self, window: int = 100, grace: int = 500, min_score: float = 0.5, max_epsilon: float = 0.1, patience: Optional[int] = 10, min_delta: float = 0.05) -> None:
+        self.window: int = window
+        self.grace: int = grace
+        self.min_score: float = min_score
+        self.max_epsilon: float = max_epsilon
+        self.patience: Optional[int] = patience
+        self.min_delta: float = min_delta
+
+    def check(self, episodes: int, epsilon: float, curve: Sequence[float]) -> str:
+        """Why a run with this curve after `episodes` episodes should stop, or '' to keep going."""
+        if episodes < self.grace or epsilon > self.max_epsilon or not curve:
+            return ''
+        if curve[-1] < self.min_score:
+            return 'low_score'
+        if self.patience is not None and len(curve) > self.patience:
+            best_before = max(curve[:-self.patience])
+            if max(curve[-self.patience:]) < best_before + self.min_delta:
+                return 'plateau'
+        return ''
+
+
+def run_configuration(task: RunTask) -> Dict[str, Any]:
+    """Train a fresh agent with one configuration, save its Q-table and return its row of the summary."""
+    run, params, seed, episodes, max_steps, encoder_name, config, stopping, file_path = task
+    np.random.seed(seed)
+    agent_kwargs: Dict[str, Any] = dict(params)
+    agent = QLearningAgent(encoder=get_encoder(encoder_name, config.width, config.height, config.space_size), **agent_kwargs)
+    env = SnakeEnv.from_config(config, seed=seed)
+    row: Dict[str, Any] = {'run': run, 'seed': seed}
+    row.update({name: getattr(agent, name) for name in PARAMETERS})  # Before epsilon decays
+    recent: Deque[int] = deque(maxlen=stopping.window)  # Scores of the last `window` episodes
+    curve: List[float] = []
+    episode, steps, stopped = 0, 0, ''
+
+    start = time.perf_counter()
+    while episode < episodes and (max_steps is None or steps < max_steps):
+        run_episode(agent, env)
+        episode += 1
+        steps += env.steps
+        recent.append(env.score)
+        if episode % stopping.window == 0:
+            curve.append(sum(recent) / len(recent))
+            stopped = stopping.check(episode, agent.epsilon, curve)
+            if stopped:
+                break
+    elapsed = time.perf_counter() - start
+
+    agent.save_q_table(file_path)
+    row.update({
+        'episodes': episode,
+        'steps': steps,
+        'score': sum(recent) / len(recent) if recent else 0.0,
+        'best_score': max(curve, default=0.0),
+        'stopped': stopped,
+        'states': agent.state_count(),
+        'elapsed': elapsed,
+    })
+    return row
+
+
+class SweepResult:
+    """The summary rows of a sweep, best first, and where the best run's Q-table was saved."""
+
+    def __init__(self, rows: List[Dict[str, Any]], best_file_path: Optional[str], elapsed: float) -> None:
+        self.rows: List[Dict[str, Any]] = sorted(rows, key=lambda row: (-row['score'], row['run']))
+        self.best_file_path: Optional[str] = best_file_path
+        self.elapsed: float = elapsed
+
+    @property
+    def best(self) -> Optional[Dict[str, Any]]:
+        return self.rows[0] if self.rows else None
+
+    def write_csv(self, file_path: str) -> None:
+        temp_path = f"{file_path}.tmp"
+        with open(temp_path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=SUMMARY_COLUMNS)
+            writer.writeheader()
+            writer.writerows(self.rows)
+        os.replace(temp_path, file_path)
+
+    def format(self) -> str:
+        stopped = sum(1 for row in self.rows if row['stopped'])
+        lines = [f"{len(self.rows)} run(s) in {self.elapsed:.1f}s, {stopped} stopped early"]
+        lines.append(f"{'run':>4} {'alpha':>8} {'gamma':>6} {'epsilon':>7} {'decay':>7} {'eps_min':>7} {'episodes':>8} {'score':>6} {'best':>6} {'states':>9}  stopped")
+        for row in self.rows:
+            lines.append(
+                f"{row['run']:>4} {row['alpha']:>8.4g} {row['gamma']:>6.4g} {row['epsilon']:>7.3g} {row['epsilon_decay']:>7.5g} "
+                f"{row['epsilon_min']:>7.3g} {row['episodes']:>8} {row['score']:>6.2f} {row['best_score']:>6.2f} {row['states']:>9,}  {row['stopped']}"
+            )
+        if self.best_file_path is not None:
+            lines.append(f"Best Q-table (run {self.rows[0]['run']}) saved to {self.best_file_path}")
+        return "\n".join(lines)
+
+
+def sweep(
+    configurations: Sequence[Params],
+    output_dir: str,
+    episodes: int = 2000,
+    max_steps: Optional[int] = None,
+    workers: Optional[int] = None,
+    seed: int = 0,
+    encoder_name: str = 'full',
+    config: Optional[GameConfig] = None,
+    stopping: Optional[EarlyStopping] = None,
+    verbose: bool = True
+) -> SweepResult:
+    """
+    Train one fresh agent per configuration headless, on a pool of worker processes.
+
+    Each run stops after `episodes` episodes or `max_steps` steps, or earlier if
+    `stopping` gives up on it. Run `i` is seeded with `seed + i`, so results do
+    not depend on the number of workers. The summary is written to
+    `output_dir/summary.csv` and the Q-table of the best-scoring run (mean score
+    of its last window of episodes) to `output_dir/best.qtab`; the other runs'
+    Q-tables are deleted as soon as a better one is in.
+    """
+    config = config or GameConfig()
+    stopping = stopping or EarlyStopping()
+    workers = max(1, min(workers or os.cpu_count() or 1, len(configurations)))
+    runs_dir = os.path.join(output_dir, "runs")
+    os.makedirs(runs_dir, exist_ok=True)
+    tasks: List[RunTask] = [
+        (run, dict(params), seed + run, episodes, max_steps, encoder_name, config, stopping, os.path.join(runs_dir, f"run_{run:04d}.qtab"))
+        for run, params in enumerate(configurations)
+    ]
+
+    rows: List[Dict[str, Any]] = []
+    best: Optional[Dict[str, Any]] = None
+    best_file_path = os.path.join(output_dir, "best.qtab")
+    start_time = time.perf_counter()
+
+    def collect(row: Dict[str, Any]) -> None:
+        nonlocal best
+        rows.append(row)
+        run_file_path = tasks[row['run']][-1]
+        if best is None or (row['score'], -row['run']) > (best['score'], -best['run']):
+            os.replace(run_file_path, best_file_path)
+            best = row
+        else:
+            os.remove(run_file_path)
+        if verbose:
+            stopped = f", stopped early ({row['stopped']})" if row['stopped'] else ""
+            print(f"Run {row['run']} ({len(rows)}/{len(tasks)}): score {row['score']:.2f} after {row['episodes']} episodes in {row['elapsed']:.1f}s{stopped}")
+
+    try:
+        if workers == 1:
+            for task in tasks:
+                collect(run_configuration(task))
+        else:
+            with multiprocessing.Pool(workers) as pool:
+                for row in pool.imap_unordered(run_configuration, tasks):
+                    collect(row)
+    except KeyboardInterrupt:
+        print(f"Sweep interrupted after {len(rows)} of {len(tasks)} runs.")
+
+    for name in os.listdir(runs_dir):
+        os.remove(os.path.join(runs_dir, name))  # Runs cut short by an interrupt
+    os.rmdir(runs_dir)
+
+    result = SweepResult(rows, best_file_path if best is not None else None, time.perf_counter() - start_time)
+    result.write_csv(os.path.join(output_dir, "summary.csv"))
+    return result
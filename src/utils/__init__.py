@@ -16,4 +16,5 @@ from .constants import (
     text_file_path,
     q_table_file_path
 )
+from .config import GameConfig
 from .utils import load_high_score, save_high_score, clean_up, get_executable_name, install_pre_commit_hooks, print_output, read_output
@@ -0,0 +1,93 @@
+import os
+import argparse
+from typing import List, Mapping, Optional
+from .constants import GAME_WIDTH, GAME_HEIGHT, SPACE_SIZE, BODY_PARTS, SPEED, episodes
+
+
+# Environment variables read by `GameConfig.from_env`, keyed by attribute.
+ENV_VARS = {
+    'width': 'SNAKE_WIDTH',
+    'height': 'SNAKE_HEIGHT',
+    'space_size': 'SNAKE_SPACE_SIZE',
+    'body_parts': 'SNAKE_BODY_PARTS',
+    'speed': 'SNAKE_SPEED',
+    'episodes': 'SNAKE_EPISODES',
+}
+
+
+class GameConfig:
+    """
+    Board geometry and game parameters, defaulting to the module constants.
+
+    One is passed to `Game`, `Snake`, `Food`, the agent and the environments so
+    boards of different sizes can be run side by side in one process. Width and
+    height are in pixels and must be multiples of `space_size`.
+    """
+
+    def __init__(
+        self,
+        width: int = GAME_WIDTH,
+        height: int = GAME_HEIGHT,
+        space_size: int = SPACE_SIZE,
+        body_parts: int = BODY_PARTS,
+        speed: int = SPEED,
+        episodes: int = episodes
+    ) -> None:
+        if space_size <= 0 or width < space_size or height < space_size:
+            raise ValueError(f"The board must be at least one {space_size}px cell, got {width}x{height}.")
+        if width % space_size or height % space_size:
+            raise ValueError(f"Board size {width}x{height} is not a multiple of the cell size {space_size}.")
+
+        self.width: int = width
+        self.height: int = height
+        self.space_size: int = space_size
+        self.body_parts: int = body_parts
+        self.speed: int = speed  # Milliseconds between ticks
+        self.episodes: int = episodes
+
+    @classmethod
+    def for_board(cls, cols: int, rows: int, space_size: int = SPACE_SIZE, **kwargs: int) -> 'GameConfig':
+        """A config for a board of `cols` x `rows` cells."""
+        return cls(width=cols * space_size, height=rows * space_size, space_size=space_size, **kwargs)
+
+    @classmethod
+    def from_env(cls, environ: Optional[Mapping[str, str]] = None) -> 'GameConfig':
+        """Defaults overridden by any `SNAKE_*` variables set in `environ` (`os.environ` by default)."""
+        environ = os.environ if environ is None else environ
+        return cls(**{name: int(environ[var]) for name, var in ENV_VARS.items() if var in environ})
+
+    @classmethod
+    def from_args(cls, argv: Optional[List[str]] = None) -> 'GameConfig':
+        """
+        Parse command-line overrides on top of `from_env`.
+
+        :param argv: Arguments to parse; `sys.argv[1:]` when None. Unknown arguments are left alone.
+        """
+        defaults = cls.from_env()
+        parser = argparse.ArgumentParser(add_help=False)
+        parser.add_argument('--width', type=int, default=defaults.width, help="Board width in pixels.")
+        parser.add_argument('--height', type=int, default=defaults.height, help="Board height in pixels.")
+        parser.add_argument('--space-size', type=int, default=defaults.space_size, help="Cell size in pixels.")
+        parser.add_argument('--body-parts', type=int, default=defaults.body_parts, help="Length of a new snake.")
+        parser.add_argument('--speed', type=int, default=defaults.speed, help="Milliseconds between ticks.")
+        parser.add_argument('--episodes', type=int, default=defaults.episodes, help="Episodes to train the RL agent for.")
+        args, _ = parser.parse_known_args(argv)
+        return cls(args.width, args.height, args.space_size, args.body_parts, args.speed, args.episodes)
+
+    @property
+    def cols(self) -> int:
+        return self.width // self.space_size
+
+    @property
+    def rows(self) -> int:
+        return self.height // self.space_size
+
+    @property
+    def cell_count(self) -> int:
+        return self.cols * self.rows
+
+    def __repr__(self) -> str:
+        return (
+            f"GameConfig(width={self.width}, height={self.height}, space_size={self.space_size}, "
+            f"body_parts={self.body_parts}, speed={self.speed}, episodes={self.episodes})"
+        )
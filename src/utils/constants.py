@@ -1,7 +1,6 @@
 import os
 import sys
 from typing import Literal
-from .utils import find_root_dir
 
 
 APP_NAME = 'Snake Game'
@@ -24,9 +23,18 @@ RL_AGENT: Literal['RL_Agent'] = 'RL_Agent'
 HUMAN_AGENT: Literal['Human_Agent'] = 'Human_Agent'
 
 episodes = 1000
+checkpoint_every_episodes = 100
+checkpoint_every_seconds = 60.0
 
+# Rewards handed to the RL agent, shared by the Tk game loop and the headless environments.
+FOOD_REWARD = 5
+DEATH_REWARD = -10
+STEP_REWARD = 0
 
-root_dir = find_root_dir(os.path.dirname(__file__))
+
+# Two packages up from this file. Worked out from the path alone, so importing does no filesystem work;
+# directories are created by whatever writes into them first.
+root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Check if running in a bundled exe or as a script
 if getattr(sys, 'frozen', False):
@@ -40,8 +48,12 @@ icon_file_path = os.path.join(base_path, 'assets', 'icons', ICON_FILE)
 soundtrack_path = os.path.join(base_path, 'assets', 'soundtrack', BACKGROUND_MUSIC_FILES[0])
 text_file_dir = os.path.join(base_path, "saved")
 weights_dir = os.path.join(base_path, "weights")
-os.makedirs(text_file_dir, exist_ok=True)
-os.makedirs(weights_dir, exist_ok=True)
 text_file_path = os.path.join(text_file_dir, TXT_FILE)
-q_table_file_path = os.path.join(weights_dir, "q_table.pkl")
+profile_stats_file_path = os.path.join(text_file_dir, "profile_stats.json")
+profile_file_path = os.path.join(text_file_dir, "profile.prof")
+q_table_file_path = os.path.join(weights_dir, "q_table.qtab")
+legacy_q_table_file_path = os.path.join(weights_dir, "q_table.pkl")
+metrics_dir = os.path.join(weights_dir, "metrics")
+sweeps_dir = os.path.join(weights_dir, "sweeps")
+episode_log_file_path = os.path.join(weights_dir, "episodes.snakelog")
     
\ No newline at end of file
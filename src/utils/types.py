@@ -1,18 +1,45 @@
-from typing import Dict, List, Literal, Tuple, TypedDict, Union
-import numpy as np
+from typing import TYPE_CHECKING, Any, Dict, List, Literal, MutableMapping, Tuple, TypedDict, Union
+
+if TYPE_CHECKING:
+    import numpy as np  # Only for annotations, so the human game can start without NumPy
+    from src.env.occupancy import OccupancyGrid
 
 Position = Tuple[int, int]  # Represents (x, y) coordinates
 Body = List[List[int]]  # Represents the snake's body
 BodyRelative = Tuple[Tuple[int, int], ...]  # Represents the relative positions of body parts
 NearBorder = Tuple[bool, bool]  # Represents whether the snake is near the border
 
-class State(TypedDict):
+class StateOccupancy(TypedDict, total=False):
+    occupancy: 'OccupancyGrid'  # Grid of the game the state was read from, if it keeps one
+    occupancy_version: int  # `occupancy.version` when the state was read; the grid is stale once they differ
+
+class State(StateOccupancy):
     head: Position
     food: Position
     body: Body
     near_border: NearBorder
     
 StateKey = Tuple[int, int, int, BodyRelative, NearBorder]
+
+EncodedState = Union[StateKey, int]  # Represents a state key produced by a state encoder
+
+StepResult = Tuple[State, int, bool]  # Represents (next_state, reward, done) returned by an environment step
     
 class QTable(TypedDict):
-    __root__: Dict[StateKey, np.ndarray]
\ No newline at end of file
+    __root__: MutableMapping[EncodedState, 'np.ndarray']
+
+class CheckpointContents(TypedDict, total=False):
+    weights_file: str  # Name of the weights file this checkpoint was saved with, next to the published one
+    agent_state: Dict[str, Any]  # `DQNAgent.training_state`
+    learner_state: Dict[str, Any]  # `BatchedLearner.training_state`
+    board: Tuple[List[int], List[int]]  # `SnakeEnv.board_state`
+
+class TrainerState(CheckpointContents):
+    version: int
+    encoder: str
+    epsilon: float
+    reset_count: int
+    total_reward: int
+    numpy_rng: Any
+    python_rng: Tuple[Any, ...]
+    saved_at: float
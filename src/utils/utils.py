@@ -1,7 +1,5 @@
 import os
-import shutil
-import platform
-import subprocess
+import time
 from typing import List, Callable, Optional, TextIO
 
 def find_root_dir(start_dir: str, markers: Optional[List[str]] = None) -> Optional[str]:
@@ -43,6 +41,8 @@ def get_relative_path(target_path: str) -> str:
 
 def clean_up(paths: List[str]) -> None:
     """Remove specified files and directories."""
+    import shutil
+
     for path in paths:
         if os.path.isdir(path):
             print(f"Removing directory {path}...")
@@ -63,11 +63,14 @@ def print_output(line: str) -> None:
     
 def install_pre_commit_hooks() -> None:
     """Install pre-commit hooks."""
+    import subprocess
+
     print("\nInstalling pre-commit hooks.\n")
     subprocess.check_call(['pre-commit', 'install'])
     
 def get_executable_name() -> str:
     """Get the executable name based on the operating system."""
+    import platform
     from .constants import APP_NAME
     
     system = platform.system()
@@ -80,6 +83,48 @@ def get_executable_name() -> str:
     else:
         raise ValueError(f"Unsupported OS: {system}")
     
+def get_q_table_file_path(encoder_name: str = 'full') -> str:
+    """Path of the saved Q-table for a state encoder. The full encoder keeps the original `q_table` name."""
+    from .constants import q_table_file_path, weights_dir
+
+    if encoder_name == 'full':
+        return q_table_file_path
+    return os.path.join(weights_dir, f"q_table_{encoder_name}.qtab")
+
+def get_network_file_path() -> str:
+    """Path of the saved `DQNAgent` network."""
+    from .constants import weights_dir
+
+    return os.path.join(weights_dir, "dqn.npz")
+
+def get_trainer_state_file_path(encoder_name: str = 'full') -> str:
+    """Path of the trainer state (epsilon, episode count, RNG) checkpointed alongside a Q-table."""
+    from .constants import weights_dir
+
+    return os.path.join(weights_dir, f"trainer_state_{encoder_name}.pkl")
+
+def get_metrics_run_dir(encoder_name: str = 'full', run_name: Optional[str] = None) -> str:
+    """Directory a training run writes its per-episode metrics to, named after the encoder and start time by default."""
+    from .constants import metrics_dir
+
+    return os.path.join(metrics_dir, run_name or f"{encoder_name}-{time.strftime('%Y%m%d-%H%M%S')}")
+
+def get_sweep_dir(sweep_name: Optional[str] = None) -> str:
+    """Directory a hyperparameter sweep writes its summary and best Q-table to, named after its start time by default."""
+    from .constants import sweeps_dir
+
+    return os.path.join(sweeps_dir, sweep_name or time.strftime('%Y%m%d-%H%M%S'))
+
+def get_latest_metrics_run_dir() -> Optional[str]:
+    """The most recently started run in the metrics directory, if any."""
+    from .constants import metrics_dir
+
+    if not os.path.isdir(metrics_dir):
+        return None
+    runs = [os.path.join(metrics_dir, name) for name in os.listdir(metrics_dir)]
+    runs = [run for run in runs if os.path.isdir(run)]
+    return max(runs, key=os.path.getmtime) if runs else None
+
 def load_high_score() -> int:
     """Load high score from file. If file or line does not exist, return 0."""
     from .constants import text_file_path
@@ -101,7 +146,7 @@ def load_high_score() -> int:
 
 def save_high_score(high_score: int) -> None:
     """Save the high score to the file, ensuring it is on the correct line."""
-    from .constants import text_file_path
+    from .constants import text_file_dir, text_file_path
     
     lines = []
     if os.path.exists(text_file_path):
@@ -118,5 +163,6 @@ def save_high_score(high_score: int) -> None:
     if not found:
         lines.append(f"HIGH_SCORE={high_score}\n")
     
+    os.makedirs(text_file_dir, exist_ok=True)
     with open(text_file_path, "w") as file:
         file.writelines(lines)
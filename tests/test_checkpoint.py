@@ -0,0 +1,50 @@
+from typing import Any, Optional, Tuple
+import numpy as np
+import pytest
+from src.agent import BatchedLearner, QLearningAgent, get_encoder
+from src.env import SnakeEnv
+from src.training import Checkpointer, run_episode
+
+WIDTH, HEIGHT, SPACE_SIZE = 160, 160, 20
+
+
+def make_run(tmp_path: Any, encoder_name: str, replay: bool) -> Tuple[QLearningAgent, SnakeEnv, Optional[BatchedLearner], Checkpointer]:
+    agent = QLearningAgent(encoder=get_encoder(encoder_name, WIDTH, HEIGHT, SPACE_SIZE))
+    learner = BatchedLearner(agent) if replay else None
+    checkpointer = Checkpointer(str(tmp_path / 'q_table.qtab'), str(tmp_path / 'trainer_state.pkl'), learner=learner)
+    return agent, SnakeEnv(WIDTH, HEIGHT, SPACE_SIZE, seed=10), learner, checkpointer
+
+
+def train(agent: QLearningAgent, env: SnakeEnv, learner: Optional[BatchedLearner], episodes: int) -> int:
+    return sum(run_episode(agent, env, learner.observe if learner is not None else None) for _ in range(episodes))
+
+
+def q_table(agent: QLearningAgent) -> Any:
+    if agent.q_values is not None:
+        return agent.q_values.copy()
+    # A missing state and an all-zero row are the same to the agent, and checkpoints leave the latter out.
+    store = agent.q_table['__root__']
+    return {key: store[key].tolist() for key in store if store[key].any()}
+
+
+@pytest.mark.parametrize('encoder_name, replay', [('full', False), ('compact', False), ('full', True), ('compact', True)])
+def test_resumed_training_matches_uninterrupted_training(tmp_path: Any, encoder_name: str, replay: bool) -> None:
+    np.random.seed(11)
+    agent, env, learner, checkpointer = make_run(tmp_path, encoder_name, replay)
+    total_reward = train(agent, env, learner, 30)
+    checkpointer.save(agent, 30, total_reward, env)
+    total_reward += train(agent, env, learner, 30)
+
+    np.random.seed(12)  # Whatever the new process starts with, the checkpoint's RNG states take over
+    resumed, resumed_env, resumed_learner, resumed_checkpointer = make_run(tmp_path, encoder_name, replay)
+    state = resumed_checkpointer.load(resumed, resumed_env)
+    assert state is not None and state['reset_count'] == 30
+    resumed_reward = state['total_reward'] + train(resumed, resumed_env, resumed_learner, 30)
+
+    assert resumed_reward == total_reward
+    assert resumed.epsilon == agent.epsilon
+    expected, actual = q_table(agent), q_table(resumed)
+    if isinstance(expected, np.ndarray):
+        np.testing.assert_array_equal(actual, expected)
+    else:
+        assert actual == expected
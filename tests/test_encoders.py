@@ -0,0 +1,55 @@
+import random
+import pytest
+from src.agent.encoders import ACTION_INVERSES, ACTION_TRANSFORMS, SymmetricEncoder, get_encoder
+from src.env import SnakeEnv
+from src.env.directions import DELTAS
+from src.utils.types import State
+
+SPACE_SIZE = 20
+
+
+def moved(state: State, action: int) -> State:
+    """`state` with the head one cell further in direction `action`."""
+    dx, dy = DELTAS[action]
+    x, y = state['head']
+    return State(head=(x + dx * SPACE_SIZE, y + dy * SPACE_SIZE), food=state['food'], body=state['body'], near_border=state['near_border'])
+
+
+def test_action_inverses_undo_transforms() -> None:
+    for transforms, inverses in zip(ACTION_TRANSFORMS, ACTION_INVERSES):
+        assert sorted(transforms) == [0, 1, 2, 3]
+        for action in range(4):
+            assert inverses[transforms[action]] == action
+            assert transforms[inverses[action]] == action
+
+
+@pytest.mark.parametrize('name, width, height', [('full_sym', 160, 160), ('compact_sym', 160, 160), ('full_sym', 200, 120)])
+def test_symmetric_encoder_maps_actions_with_the_board(name: str, width: int, height: int) -> None:
+    encoder = get_encoder(name, width, height, SPACE_SIZE)
+    assert isinstance(encoder, SymmetricEncoder)
+    env = SnakeEnv(width, height, SPACE_SIZE, seed=5)
+    rng = random.Random(6)
+    state = env.reset()
+    for _ in range(300):
+        for action in range(4):
+            assert encoder.from_canonical(state, encoder.to_canonical(state, action)) == action
+        for symmetry in encoder.symmetries:
+            # Moving and then transforming the board is transforming it and then taking the transformed action.
+            for action in range(4):
+                expected = moved(encoder.transform_state(state, symmetry), ACTION_TRANSFORMS[symmetry][action])['head']
+                assert encoder.transform_state(moved(state, action), symmetry)['head'] == expected
+        state, _, done = env.step(rng.randrange(4))
+        if done:
+            state = env.reset()
+
+
+def test_symmetric_encoder_keys_mirror_images_alike() -> None:
+    encoder = get_encoder('full_sym', 160, 160, SPACE_SIZE)
+    assert isinstance(encoder, SymmetricEncoder)
+    env = SnakeEnv(160, 160, SPACE_SIZE, seed=7)
+    state = env.reset()
+    for _ in range(5):
+        state = env.step(1)[0]
+    key = encoder.encode(state)
+    for symmetry in encoder.symmetries:
+        assert encoder.encode(encoder.transform_state(state, symmetry)) == key
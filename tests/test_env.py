@@ -0,0 +1,84 @@
+import random
+from typing import Any, Dict, List
+import numpy as np
+from src.env import SnakeEnv
+from src.env.directions import DOWN, LEFT, RIGHT, UP
+from src.env.batch_env import BatchSnakeEnv
+from src.env.recording import EpisodeLog, EpisodeRecorder, EpisodeReplay
+from src.utils.types import State
+
+WIDTH, HEIGHT, SPACE_SIZE = 160, 160, 20
+
+
+def positions(state: State) -> Dict[str, Any]:
+    """The parts of a `State` every environment fills in, without the occupancy grid."""
+    return {'head': tuple(state['head']), 'food': tuple(state['food']), 'body': [list(part) for part in state['body']], 'near_border': tuple(state['near_border'])}
+
+
+def toward_food(state: State, rng: random.Random) -> int:
+    """Mostly head for the food, so episodes eat and grow, with some random moves."""
+    (head_x, head_y), (food_x, food_y) = state['head'], state['food']
+    if rng.random() < 0.2 or (head_x, head_y) == (food_x, food_y):
+        return rng.randrange(4)
+    if head_y != food_y:
+        return UP if food_y < head_y else DOWN
+    return LEFT if food_x < head_x else RIGHT
+
+
+def test_batch_env_matches_snake_env() -> None:
+    # The single game follows the batch's food draws, so every transition must agree.
+    batch = BatchSnakeEnv(1, WIDTH, HEIGHT, SPACE_SIZE, seed=1)
+    batch.reset()
+    env = SnakeEnv(WIDTH, HEIGHT, SPACE_SIZE)
+    env.scripted_food.append(int(batch.food[0]))
+    state = env.reset()
+    assert positions(state) == positions(batch.get_state(0))
+
+    actions = random.Random(2)
+    episodes = eaten = 0
+    while episodes < 20:
+        action = toward_food(state, actions)
+        rewards, done = batch.step(np.array([action]))
+        if batch.score[0] > env.score and not done[0]:
+            env.scripted_food.append(int(batch.food[0]))
+        state, reward, env_done = env.step(action)
+        assert (reward, env_done) == (rewards[0], done[0])
+        if env_done:
+            eaten += env.score
+            assert (env.score, env.steps) == (batch.final_scores[0], batch.final_steps[0])
+            env.scripted_food.append(int(batch.food[0]))
+            state = env.reset()
+            episodes += 1
+        assert positions(state) == positions(batch.get_state(0))
+    assert eaten > 0
+
+
+def test_episode_replay_reproduces_recorded_episodes(tmp_path: Any) -> None:
+    log_path = str(tmp_path / 'episodes.snakelog')
+    recorder = EpisodeRecorder(log_path)
+    env = SnakeEnv(WIDTH, HEIGHT, SPACE_SIZE, seed=3)
+    actions = random.Random(4)
+    played: List[List[Dict[str, Any]]] = []
+    for episode in range(1, 6):
+        recorder.begin(env, episode, env.reseed())
+        states = []
+        state = env.reset()
+        while not env.done:
+            state = env.step(toward_food(state, actions))[0]
+            states.append(positions(state))
+        played.append(states)
+        recorder.end(env)
+    recorder.close()
+
+    log = EpisodeLog(log_path)
+    assert log.episodes() == [1, 2, 3, 4, 5]
+    assert sum(log[index].score for index in range(len(log))) > 0
+    for index, states in enumerate(played):
+        record = log[index]
+        assert record.seed is not None and record.steps == len(states)
+        replay = EpisodeReplay(record)
+        assert [positions(state) for state in replay.states()] == states
+        # Seeking back re-simulates from the start and lands on the same board.
+        for step in range(len(states), 0, -1):
+            replay.seek(step)
+            assert positions(replay.env.get_state()) == states[step - 1]
@@ -0,0 +1,83 @@
+import numpy as np
+from src.agent.q_table import HEADROOM, QTableStore
+
+
+def check_bookkeeping(store: QTableStore) -> None:
+    """Index, keys, values and visit counts all describe the same rows, and nothing lingers past the last one."""
+    size = len(store.row_keys)
+    assert store.index == {key: row for row, key in enumerate(store.row_keys)}
+    assert not store.matrix[size:].any()
+    assert all(store.visits[row] > 0 for row in range(size))
+    assert not any(store.visits[size:]) and not any(store.last_access[size:])
+
+
+def test_eviction_keeps_rows_in_step_with_their_counts() -> None:
+    store = QTableStore(max_states=100, eviction='lru')
+    for key in range(300):
+        store[key] = [key + 1, 0, 0, 0]
+        if store.over_limit():
+            store.evict()
+            check_bookkeeping(store)
+            np.testing.assert_array_equal(store.matrix[:len(store), 0], np.array(store.row_keys) + 1)
+        assert len(store.matrix) <= 100 + HEADROOM
+    assert len(store) <= 100
+    assert store.evicted > 0 and store.evictions > 0
+    # LRU keeps the most recent states.
+    assert 299 in store and 0 not in store
+
+
+def test_least_visited_eviction_keeps_busy_states() -> None:
+    store = QTableStore(max_states=20, eviction='least_visited')
+    for _ in range(5):
+        for key in range(5):
+            store[key] = [1, 0, 0, 0]
+    for key in range(30):
+        store[100 + key] = [1, 0, 0, 0]
+        if store.over_limit():
+            store.evict()
+            check_bookkeeping(store)
+    assert all(key in store for key in range(5))
+
+
+def test_row_map_follows_moved_rows() -> None:
+    store = QTableStore(max_states=10)
+    for key in range(11):
+        store[key] = [key + 1, 0, 0, 0]
+    rows = dict(store.index)
+    store.evict()
+    assert store.row_map is not None
+    for state_key, row in rows.items():
+        new_row = store.row_map[row]
+        assert (new_row >= 0) == (state_key in store)
+        if new_row >= 0:
+            assert store.index[state_key] == new_row
+
+
+def test_zero_rows_survive_the_pass_after_they_are_touched() -> None:
+    store = QTableStore(max_states=10)
+    for key in range(8):
+        store[key] = [1, 0, 0, 0]
+    store.row(100)
+    store.row(101)
+    store.row(102)
+    store.evict()
+    check_bookkeeping(store)
+    # Just reached, not yet learned from: kept, with their counts.
+    assert 102 in store
+    assert store.visits[store.index[102]] == 1
+    assert store.compacted == 0
+
+    store[8] = [1, 0, 0, 0]
+    store.evict()
+    check_bookkeeping(store)
+    assert not any(100 + key in store for key in range(3))
+    assert store.compacted == 3
+
+
+def test_compact_drops_only_zero_rows() -> None:
+    store = QTableStore()
+    for key in range(10):
+        store[key] = np.full(4, key % 2, dtype=np.float32)
+    assert store.compact() == 5
+    check_bookkeeping(store)
+    assert sorted(store) == list(range(1, 10, 2))
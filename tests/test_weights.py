@@ -0,0 +1,81 @@
+from typing import Any, Dict, List
+import numpy as np
+import pytest
+from src.agent.q_table import QTableStore
+from src.utils.types import EncodedState
+from src.agent.weights import DENSE, MappedQTable, load_dense_file, load_q_table_file, read_header, save_dense_file, save_q_table_file
+
+
+KEY: EncodedState = (1, 2, 3, ((4, 5),), (True, False))
+ZERO_KEY: EncodedState = (0, 0, 3, (), (False, False))
+NEW_KEY: EncodedState = (1000, 1, 3, (), (False, False))
+
+
+def make_table() -> Dict[EncodedState, np.ndarray]:
+    rng = np.random.default_rng(8)
+    keys: List[EncodedState] = [KEY, -1, -2, 2**40, -(2**40)]  # hash(-1) == hash(-2)
+    keys += [(x, y - 10, 3, ((x, -y), (y, x)), (x % 2 == 0, y % 3 == 0)) for x in range(20) for y in range(20)]
+    return {key: rng.standard_normal(4).astype(np.float32) for key in keys}
+
+
+def test_q_table_file_round_trip(tmp_path: Any) -> None:
+    table = make_table()
+    table[ZERO_KEY] = np.zeros(4, dtype=np.float32)
+    file_path = str(tmp_path / 'q_table.qtab')
+    save_q_table_file(file_path, table, 'full')
+    header = read_header(file_path)
+    assert header.encoder_name == 'full' and not header.flags & DENSE
+
+    del table[ZERO_KEY]  # All-zero rows are left out
+    loaded = load_q_table_file(file_path)
+    assert isinstance(loaded, QTableStore)
+    mapped = load_q_table_file(file_path, mmap=True)
+    assert isinstance(mapped, MappedQTable)
+    for result in (loaded, mapped):
+        assert len(result) == len(table)
+        assert sorted(map(repr, result)) == sorted(map(repr, table))
+        for key, values in table.items():
+            assert key in result
+            np.testing.assert_array_equal(result[key], values)
+        assert ZERO_KEY not in result and -3 not in result
+
+
+def test_mapped_table_writes_stay_in_memory(tmp_path: Any) -> None:
+    table = make_table()
+    file_path = str(tmp_path / 'q_table.qtab')
+    save_q_table_file(file_path, table, 'full')
+    mapped = MappedQTable(file_path)
+    mapped[KEY] = [9, 9, 9, 9]
+    mapped[NEW_KEY] = [1, 2, 3, 4]
+    assert mapped[KEY][0] == 9 and NEW_KEY in mapped
+    reread = load_q_table_file(file_path)
+    np.testing.assert_array_equal(reread[KEY], table[KEY])
+    assert NEW_KEY not in reread
+
+
+def test_store_round_trip_matches_file_order(tmp_path: Any) -> None:
+    store = QTableStore.from_mapping(make_table())
+    file_path = str(tmp_path / 'q_table.qtab')
+    save_q_table_file(file_path, store, 'full')
+    loaded = load_q_table_file(file_path)
+    assert isinstance(loaded, QTableStore)
+    assert loaded.row_keys == store.row_keys
+    np.testing.assert_array_equal(loaded.used_values(), store.used_values())
+
+
+def test_dense_file_round_trip(tmp_path: Any) -> None:
+    q_values = np.random.default_rng(9).standard_normal((50, 4)).astype(np.float32)
+    file_path = str(tmp_path / 'dense.qtab')
+    save_dense_file(file_path, q_values, 'compact')
+    assert read_header(file_path).flags & DENSE
+    for mmap in (False, True):
+        loaded, encoder_name = load_dense_file(file_path, mmap=mmap)
+        assert encoder_name == 'compact'
+        np.testing.assert_array_equal(loaded, q_values)
+
+
+def test_sparse_file_is_not_dense(tmp_path: Any) -> None:
+    file_path = str(tmp_path / 'q_table.qtab')
+    save_q_table_file(file_path, make_table(), 'full')
+    with pytest.raises(ValueError):
+        load_dense_file(file_path)